@@ -33,7 +33,17 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import time, threading, os, ephem, serial, curses
 from copy import copy
-from cpredict import quick_find, quick_predict, PredictException
+from passCache import PassCache
+from passEphemeris import PassEphemeris
+from tleCatalog import open_catalog
+from solarEphemeris import SolarEphemeris
+from trackScheduler import TrackScheduler
+from motorWorker import MotorWorker
+from mountPlanner import candidates, plan_mount
+from rotorTrajectory import trajectory
+from commandLatency import pointing_lag, LatencyEstimator, command_lead
+from cpredict import quick_find, quick_predict, observe_many, observe_catalog, passes, \
+                     Predictor, PredictException
 
 ##############################################################################################
 # THINGS TO DO:
@@ -65,6 +75,24 @@ class GUI:
         self.motorPath = '/dev/serial/by-id/usb-FTDI_FT232R_USB_UART_AH01B33D-if00-port0'
         self.GPSPath = '/dev/serial/by-id/usb-Prolific_Technology_Inc._USB-Serial_Controller_D-if00-port0'
         self.degree_sign = u'\N{DEGREE SIGN}' # degree sign for printing
+        self.predictor, self.predictorKey = None, None # Cached satellite predictor
+        self.passCache = PassCache() # Predicted passes kept on disk between runs
+        self.ephemeris, self.upcoming = None, None # Fitted current pass and next pass summary
+        self.ephemerisLead = 300 # seconds before AOS to start the pass ephemeris
+        self.solar = None # Sun and Moon positions for the current location
+        self.sunOutageRadius = 5.0 # degrees - Sun this close to the satellite drowns it out
+        self.trackScheduler = None # Timing of the tracking loop, kept for its histograms
+        self.motorLock = threading.Lock() # One command on the serial link at a time
+        self.motorWorker = MotorWorker(self.track_set) # Sends tracking setpoints, latest first
+        self.latency = LatencyEstimator() # Seconds from posting a command to the rotor getting there
+        self.lagInterval = 5.0 # seconds - how often to read the rotor back while tracking
+        self.lastReadback = 0.0 # Monotonic time of the last tracking readback
+        self.mountPlan = None # Planned mount pointing over the ephemeris' pass
+        self.planStep = 1.0 # seconds between planned setpoints
+        self.trajectory, self.commandIndex = None, -1 # Motor commands for the pass, last one sent
+        self.pointingError = 0.5 # degrees - largest pointing error, half the antenna beamwidth
+        self.rotorRate = (3.0, 3.0) # degrees/s - rotor azimuth and elevation top speeds
+        self.rotorAccel = (6.0, 6.0) # degrees/s^2 - rotor azimuth and elevation accelerations
         self.buildGUI() # Build the GUI for ARGUS
 
 ##############################################################################################
@@ -184,22 +212,7 @@ class GUI:
         # Start/stop plotting button
         self.b1 = Button(self.b, text="Start Tracking", command=self.azel_handler, bg="green2", fg='black')
         
-        starttime, endtime, startaz, endaz, maxel, self.satname = \
-                self.nextpass(str(self.tleloc.get()))
-        self.np_l = Label(self.t1b, text = \
-                "Upcoming Passes for "+str(self.satname)+":\n"+
-                "\nPass 1:\nStart: "+starttime[0]+", Azimuth: "+
-                str(round(startaz[0],2))+self.degree_sign+"\nFinish: "+endtime[0]+
-                ", Azimuth: "+str(round(endaz[0],2))+self.degree_sign+
-                "\nMaximum Elevation: "+str(round(maxel[0],2))+self.degree_sign+
-                "\nPass 2:\nStart: "+starttime[1]+", Azimuth: "+
-                str(round(startaz[1],2))+self.degree_sign+"\nFinish: "+endtime[1]+
-                ", Azimuth: "+str(round(endaz[1],2))+self.degree_sign+
-                "\nMaximum Elevation: "+str(round(maxel[1],2))+self.degree_sign+
-                "\nPass 3:\nStart: "+starttime[2]+", Azimuth: "+
-                str(round(startaz[2],2))+self.degree_sign+"\nFinish: "+endtime[2]+
-                ", Azimuth: "+str(round(endaz[2],2))+self.degree_sign+
-                "\nMaximum Elevation: "+str(round(maxel[2],2))+self.degree_sign)
+        self.np_l = Label(self.t1b, text=self.pass_label()) # Upcoming passes
         
         # Button for recalculation of future passes
         self.np_button = Button(self.t1b, text="Recalculate Passes", command=self.recalculate, 
@@ -269,7 +282,8 @@ class GUI:
     def stopMotor(self):
         ''' Disconnect motor. '''
         try:
-            self.MotSer.close() #Close connection with motor
+            with self.motorLock: #Not while a command is being written
+                self.MotSer.close() #Close connection with motor
         except:
             pass #No motor connected
         self.motorOn = False
@@ -283,35 +297,70 @@ class GUI:
         current and motor azimuth and elevation.
         """
         if self.motorOn:
-            # Create command
-            cmd = [b'\x57', b'\x00', b'\x00', b'\x00', b'\x00', b'\x00', b'\x00', b'\x00',
-                                           b'\x00', b'\x00', b'\x00', b'\x1f', b'\x20']
-            packet = b"".join(cmd) #join into string
-            self.MotSer.write(packet) #Write to serial connection
-            self.MotSer.flush() #Flush through
-
-            rec_packet = self.MotSer.read(12) #Received packet
-            az = (rec_packet[1] * 100) + (rec_packet[2] * 10) + \
-                   rec_packet[3] + (rec_packet[4] / 10) - 360.0
-            el = (rec_packet[6] * 100) + (rec_packet[7] * 10) + \
-                   rec_packet[8] + (rec_packet[9] / 10) - 360.0
-            ph = rec_packet[5]
-            pv = rec_packet[10]
-
-            assert(ph == pv) #Asert pulses are equal
-            self.pulse = ph
+            az, el, _ = self.readback()
             if self.debug:
                 print("STATUS COMMAND SENT")
-                print("Sent: " + str(packet))
                 print("Azimuth:   " + str(az))
                 print("Elevation: " + str(el))
-                print("PH: " + str(ph))
-                print("PV: " + str(pv) + "\n")
+                print("Pulse: " + str(self.pulse) + "\n")
             self.currentAz, self.currentEl = az, el #set az/el's
             self.motorAz, self.motorEl = az, el
         else:
             print("Motor not connected.")
     
+    def readback(self):
+        """
+        Send a status command to the controller and return the azimuth and elevation of the
+        rotor, and the unix time they were read (halfway through the exchange). Raises IOError
+        on a short or inconsistent reply.
+        """
+        # Create command
+        cmd = [b'\x57', b'\x00', b'\x00', b'\x00', b'\x00', b'\x00', b'\x00', b'\x00',
+                                       b'\x00', b'\x00', b'\x00', b'\x1f', b'\x20']
+        packet = b"".join(cmd) #join into string
+        with self.motorLock:
+            start = time.time()
+            self.MotSer.write(packet) #Write to serial connection
+            self.MotSer.flush() #Flush through
+            rec_packet = self.MotSer.read(12) #Received packet
+            end = time.time()
+        if len(rec_packet) != 12:
+            raise IOError("status reply of %d bytes, not 12" % len(rec_packet))
+        az = (rec_packet[1] * 100) + (rec_packet[2] * 10) + \
+               rec_packet[3] + (rec_packet[4] / 10) - 360.0
+        el = (rec_packet[6] * 100) + (rec_packet[7] * 10) + \
+               rec_packet[8] + (rec_packet[9] / 10) - 360.0
+        ph = rec_packet[5]
+        pv = rec_packet[10]
+        if ph != pv: # Pulses are equal in a good reply
+            raise IOError("status reply pulses differ (%d, %d)" % (ph, pv))
+        self.pulse = ph
+        return az, el, (start + end)/2
+
+    def track_set(self, az, el):
+        """
+        Send a tracking set command, then every lagInterval seconds during a pass read the
+        rotor back to measure how far behind the satellite it is, updating the command latency.
+        No readbacks are sent while following a trajectory, as its commands are off on purpose.
+        """
+        self.set(az, el)
+        eph = self.ephemeris # Can be replaced by the tracking loop meanwhile
+        if not self.motorOn or eph is None or self.following(time.time()) or \
+                time.monotonic() - self.lastReadback < self.lagInterval:
+            return
+        self.lastReadback = time.monotonic()
+        lead = self.latency.latency # Lead the command was aimed with
+        try:
+            rotorAz, rotorEl, t = self.readback()
+        except IOError as e: # Skip the sample, the set command itself went through
+            print("Rotor readback failed: " + str(e))
+            return
+        lag = pointing_lag(eph, t, rotorAz, rotorEl)
+        if lag is not None and eph.azel(t)[1] > self.minEl: # Not parked at minEl
+            self.latency.add(lag, lead)
+            if self.debug:
+                print("Rotor %.2f s behind, command latency %.2f s" % (lag, self.latency.latency))
+
     def stop(self):
         """
         Send a stop command to the controller, which causes the rotor to stop moving and
@@ -323,10 +372,10 @@ class GUI:
             cmd = [b'\x57', b'\x00', b'\x00', b'\x00', b'\x00', b'\x00', b'\x00', b'\x00',
                                            b'\x00', b'\x00', b'\x00', b'\x0f', b'\x20']
             packet = b"".join(cmd) #Join into single string
-            self.MotSer.write(packet) #Write to serial connection
-            self.MotSer.flush() #Flush through
-
-            rec_packet = self.MotSer.read(12) #Received packet
+            with self.motorLock:
+                self.MotSer.write(packet) #Write to serial connection
+                self.MotSer.flush() #Flush through
+                rec_packet = self.MotSer.read(12) #Received packet
             az = (rec_packet[1] * 100) + (rec_packet[2] * 10) + \
                    rec_packet[3] + (rec_packet[4] / 10) - 360.0
             el = (rec_packet[6] * 100) + (rec_packet[7] * 10) + \
@@ -348,29 +397,31 @@ class GUI:
         else:
             print("Motor not connected.")
     
-    def set(self):
+    def set(self, az1=None, el1=None):
         """
         Send a set command to the controller, which causes the rotor to adjust its position
-        to the azimuth and elevation specified by the motor azimuth and elivation parameters.
+        to the azimuth and elevation given, or else specified by the motor azimuth and
+        elivation parameters.
         """
         if self.motorOn:
-            az1 = self.motorAz
-            el1 = self.motorEl
+            if az1 is None:
+                az1, el1 = self.motorAz, self.motorEl
             assert(float(az1) <= self.maxAz) #Ensure az and el values are in correct range
             assert(float(az1) >= self.minAz)
             assert(float(el1) <= self.maxEl)
             assert(float(el1) >= self.minEl)
 
             # Create command
-            az = "0" + str(int(self.pulse * (float(az1) + 360)))
-            el = "0" + str(int(self.pulse * (float(el1) + 360)))
+            az = "0" + str(int(round(self.pulse * (float(az1) + 360)))) #Nearest pulse
+            el = "0" + str(int(round(self.pulse * (float(el1) + 360))))
             cmd = [b'\x57', az[-4].encode(), az[-3].encode(), az[-2].encode(), az[-1].encode(), 
                    chr(self.pulse).encode(), el[-4].encode(), el[-3].encode(), el[-2].encode(), 
                    el[-1].encode(), chr(self.pulse).encode(), b'\x2f', b'\x20']
             packet = b"".join(cmd)
 
-            self.MotSer.write(packet) #Write to serial connection
-            self.MotSer.flush() #Flush through
+            with self.motorLock:
+                self.MotSer.write(packet) #Write to serial connection
+                self.MotSer.flush() #Flush through
             if self.debug:
                 print("SET COMMAND SENT")
                 print("Sent: " + str(packet))
@@ -479,70 +530,59 @@ class GUI:
         on the motor conroller and therefore motor. """
         i = 0 # For plotting (only plots every 5 new values translating to about 1Hz)
         tlefile = str(self.tleloc.get()) #Find tle file
-        while self.azelplotflag: #While plotting is active
-            az, el, self.satname = self.azel_points(tlefile) #Find az, el, and satname
+        # Fires every motWaitTime seconds on the monotonic clock, however long each tick takes
+        self.trackScheduler = TrackScheduler(self.motWaitTime)
+        for _, t in self.trackScheduler.run(lambda: self.azelplotflag): #While plotting is active
+            # Aim at where the satellite will be when the rotor gets there, the measured
+            # command latency after the tick's scheduled time. Trajectory commands already
+            # allow for the rotor's travel with the rotor model, so they only lead by the time
+            # to reach the rotor; the measured latency is for the setpoints sent otherwise.
+            transport = self.motorWorker.delay
+            following = self.following(t + transport)
+            aim = t + command_lead(self.latency.latency, transport, following)
+            az, el, self.satname = self.azel_points(tlefile, aim) #Find az, el, and satname
             
-            # If in program track mode AND if norm of difference from current motor values
-            # is greater than 0.3 degrees. If this is not here it will oscillate and move
+            # If in program track mode with a trajectory for the pass, send its commands as
+            # they come due. They keep the rotor within pointingError of the satellite.
+            if following and self.following(aim): # The pass can be replanned by azel_points
+                k = int(np.searchsorted(self.trajectory['time'], aim, side='right')) - 1
+                if k > self.commandIndex: # Next command is due (the latest if ticks were skipped)
+                    self.commandIndex = k
+                    self.currentAz = float(self.trajectory['azimuth'][k])
+                    self.currentEl = float(self.trajectory['elevation'][k])
+                    self.motorAz, self.motorEl = self.currentAz, self.currentEl
+                    self.motorWorker.post(self.motorAz, self.motorEl)
+            # Otherwise (no pass trajectory, e.g. outside a pass or no plan fits the mount
+            # limits) if in program track mode AND if norm of difference from current motor
+            # values is greater than 0.3 degrees. If this is not here it will oscillate and move
             # very choppy so it is better to only send commands when there are big changes.
-            if self.progflag and np.sqrt((az-self.motorAz)**2+(el-self.motorEl)**2) >= 0.3:
+            elif self.progflag and np.sqrt((az-self.motorAz)**2+(el-self.motorEl)**2) >= 0.3:
                 if el<self.minEl: #Ensure elevation is greater than or equal to minimum value
                     el = self.minEl
                 
-                # Define cost for four different possible values of azimuth and elevation
-                # all representing the same pointing location. This ensures that we find
-                # the values that require the least motion to get to.
-                azvec = []
-                azvec.append(az)
-                elvec = []
-                elvec.append(el)
-                if az>180: #if the value is 180-360 the values are all underneath
-                    azvec.append(az-180)
-                    elvec.append(180-el)
-                    azvec.append(az-360)
-                    elvec.append(el)
-                    azvec.append(az-540)
-                    elvec.append(180-el)
-                else: #if the value is 0-180 two values are under and one is above
-                    azvec.append(az+180)
-                    elvec.append(180-el)
-                    azvec.append(az-180)
-                    elvec.append(180-el)
-                    azvec.append(az-360)
-                    elvec.append(el)
-                # Create cost vector
-                cost = []
-                cost.append((azvec[0]-self.currentAz)**2+(elvec[0]-self.currentEl)**2)
-                cost.append((azvec[1]-self.currentAz)**2+(elvec[1]-self.currentEl)**2)
-                cost.append((azvec[2]-self.currentAz)**2+(elvec[2]-self.currentEl)**2)
-                cost.append((azvec[3]-self.currentAz)**2+(elvec[3]-self.currentEl)**2)
-                ind = cost.index(min(cost)) #Find closest representation of location
-                az = azvec[ind] # Azimuth of closest location
-                el = elvec[ind] # Elevation of closest location
+                # Four different possible values of azimuth and elevation all represent the
+                # same pointing location. Take the one requiring the least motion to get to.
+                azvec, elvec = candidates(az, el)
+                cost = (azvec-self.currentAz)**2+(elvec-self.currentEl)**2
+                ind = np.argmin(cost) #Find closest representation of location
+                az = float(azvec[ind]) # Azimuth of closest location
+                el = float(elvec[ind]) # Elevation of closest location
                 self.currentAz, self.currentEl = az, el # Set to current az/el
-                
-                # If norm of difference between motor location and desired location is less than
-                # two degrees AND elevation change is greater than 0.1 degrees,
-                # THEN double the change of motor location so that on average the location 
-                # of the motors is directly on the location of the satellite.
-                # If change is bigger than two it is most likely moving to its initial 
-                # location so doubling the change would be a bad thing. If the elevation change
-                # is less than 0.1 then it is most likely at the peak of the pass and it will
-                # Oscillate around the value.
-                if np.sqrt((az-self.motorAz)**2+(el-self.motorEl)**2)<=2 and el-self.motorEl>=0.1:
-                        self.motorAz = (az-self.motorAz)*1 + az
-                        self.motorEl = (el-self.motorEl)*1 + el
-                else: #Otherwise just go to satellite location
-                    self.motorAz, self.motorEl = self.currentAz, self.currentEl
-                # Start thread to send command to set motor position. This is done with a thread
-                # To speed up this thread of finding locations.
-                threading.Thread(target=self.set).start()
+                self.motorAz, self.motorEl = az, el # Already led by the command latency
+                # Hand the setpoint to the motor worker thread so this loop doesn't wait on the
+                # serial link. It replaces any setpoint the worker hasn't sent yet.
+                self.motorWorker.post(self.motorAz, self.motorEl)
             if i%5 == 0: #Every fifth value, plot
                 self.plotAz, self.plotEl = self.currentAz, self.currentEl
                 threading.Thread(target=self.azelplot).start() #Start new process to plot
             i += 1 #increment plotting counter
-            #Sleep so that commands can only be sent at minimum every 0.2 seconds.
-            time.sleep(self.motWaitTime) 
+        if self.debug:
+            print(self.trackScheduler.summary())
+            stats = self.motorWorker.stats()
+            print("Motor: %d setpoints, %d sent, %d dropped, %d failed, worst write %.1f ms" %
+                  (stats['posted'], stats['sent'], stats['dropped'], stats['failed'], 1000*stats['worst']))
+            print("Command latency: %.2f s from %d readbacks" %
+                  (self.latency.latency, len(self.latency.delays)))
     
     def azelplot(self):
         ''' Function to plot azimuth and elevation on GUI. '''
@@ -582,12 +622,59 @@ class GUI:
             self.azelplotflag = False
             self.b1.configure(text="Start Tracking", bg="green2", fg='black') #configure button
         
-    def azel_points(self, tlefile):
-        """ Function to Produce Azimuth and Elevation using Predict. """
-        qth = (self.lat, self.lon, self.alt) #Ground station location
-        tle, satname = self.load_tle(tlefile) #Satellite tle file
-        data = observe(tle, qth) #find current state
-        return data['azimuth'], data['elevation'], satname
+    def azel_points(self, tlefile, now=None):
+        """ Function to Produce Azimuth and Elevation using Predict, at unix time now (default
+        the current time). """
+        predictor = self.load_predictor(tlefile) #Parsed satellite, only rebuilt on changes
+        if now is None:
+            now = time.time()
+        eph = self.load_ephemeris(predictor, now)
+        if eph is not None: # Around a pass, interpolate the fitted ephemeris
+            az, el = eph.azel(now)
+        else:
+            az, el = predictor.observe(now, ('azimuth', 'elevation')) #find current position only
+        return az, el, predictor.name
+    
+    def load_ephemeris(self, predictor, now):
+        """ Function to get a pass ephemeris covering now if a pass is in progress or starts
+        within ephemerisLead seconds, fitting it the first time it is needed. """
+        if self.ephemeris is not None and self.ephemeris.predictor is predictor \
+                and self.ephemeris.covers(now):
+            return self.ephemeris
+        if self.upcoming is None or self.upcoming[0] is not predictor or \
+                (self.upcoming[1] is not None and self.upcoming[1].los < now):
+            try:
+                self.upcoming = (predictor, predictor.next_pass(now))
+            except PredictException: # Geostationary, never rises or decayed, so no passes
+                self.upcoming = (predictor, None)
+        summary = self.upcoming[1]
+        if summary is None or summary.aos - self.ephemerisLead > now:
+            return None
+        self.ephemeris = PassEphemeris(predictor, now, summary.los)
+        self.mountPlan = self.plan_pass(self.ephemeris)
+        self.trajectory, self.commandIndex = None, -1
+        if self.mountPlan is not None: # Fewest commands keeping within pointingError
+            self.trajectory = trajectory(self.mountPlan, (self.currentAz, self.currentEl),
+                                         self.pointingError, self.rotorRate, self.rotorAccel, self.pulse)
+        return self.ephemeris
+
+    def following(self, t):
+        """ Function to return whether program tracking follows a pass trajectory at unix
+        time t. """
+        plan, commands = self.mountPlan, self.trajectory # Can be replaced by the tracking loop
+        return bool(self.progflag and commands is not None and len(commands) and plan is not None
+                    and plan['time'][0] <= t <= plan['time'][-1])
+
+    def plan_pass(self, eph):
+        """ Function to plan the mount pointing every planStep seconds over a pass ephemeris,
+        starting from the current pointing. Returns None if no plan fits the mount limits. """
+        times = np.append(np.arange(eph.start, eph.end, self.planStep), eph.end)
+        az, el = eph.azel(times)
+        try:
+            return plan_mount(times, az, el, (self.currentAz, self.currentEl),
+                              (self.minAz, self.maxAz, self.minEl, self.maxEl))
+        except ValueError:
+            return None
     
 ##############################################################################################
 # Define Functions to set the azimuth and elevation along with the labels
@@ -654,18 +741,37 @@ class GUI:
         qth = (qth[0], -qth[1], qth[2])
         return qth
     
-    def load_tle(self, tlefile):
-        """ Function to Load orbital elements. """
+    def load_tle(self, tlefile, satellite=None):
+        """ Function to Load orbital elements. The file can hold many TLEs, in which case
+        satellite picks one by NORAD id or name (default the first). """
         try:
-            with open(tlefile, 'r') as myfile: # Try reading file
-                tle = myfile.read()
+            catalog = open_catalog(tlefile) # Only read again when the file changes
         except IOError:
             print('Error Reading '+tlefile+". Exiting.")
             os._exit(1)
-        tle = massage_tle(tle) #use predict.py to separate elements
+        if satellite is None:
+            tle = catalog.first()
+        elif satellite in catalog:
+            tle = catalog[satellite]
+        else:
+            raise PredictException("%s is not in %s" % (satellite, tlefile))
         satname = tle[0]
         return tle, satname
     
+    def load_predictor(self, tlefile):
+        """ Function to get a Predictor for the given tle file and current location. The TLE
+        is only read and parsed again when the file or the ground station location changes. """
+        try:
+            mtime = os.path.getmtime(tlefile)
+        except OSError:
+            mtime = None # load_tle will report the error
+        key = (tlefile, mtime, self.lat, self.lon, self.alt)
+        if key != self.predictorKey:
+            tle, _ = self.load_tle(tlefile)
+            self.predictor = Predictor(tle, massage_qth((self.lat, self.lon, self.alt)))
+            self.predictorKey = key
+        return self.predictor
+    
 ##############################################################################################
 # Define Calibration Functions
     def call_calibrate(self):
@@ -675,87 +781,88 @@ class GUI:
     def calibrate(self):
         """ Fuction to Calibrate Pointing angles using the Sun. """
         print("Calibrating...")
-        qth = (self.lat, self.lon, self.alt)
-        observer = ephem.Observer() #Find sun observer and set values
-        observer.lat = intdeg2dms(qth[0])
-        observer.lon = intdeg2dms(-qth[1])
-        observer.elevation = qth[2]
-
         # Track Sun to determine azimuth and elevation
-        sun = ephem.Sun()
-        sun.compute(observer)
-        if sun.alt<0:
+        sunAz, sunEl = self.findsun()
+        if sunEl<0:
             print("Sun not visible, Calibration not possible. Exiting.")
             os._exit(1)
         # Assume pointing close enough to the sun to get a signal
         # Set current Az/El to this azimuth and elevation
-        self.currentAz, self.currentEl = sun.az*180/np.pi, sun.alt*180/np.pi
+        self.currentAz, self.currentEl = sunAz, sunEl
         print("Done. SET AZ and EL on Controller!\n")
     
 ##############################################################################################
 # Define Functions for finding sun
+    def load_solar(self):
+        """ Function to get the Sun and Moon ephemeris for the current location, only made
+        again when the location changes. """
+        qth = (self.lat, self.lon, self.alt)
+        if self.solar is None or self.solar.qth != qth:
+            self.solar = SolarEphemeris(*qth)
+        return self.solar
+
     def findsun(self):
         """ Function to find the Sun for display & plotting. """
-        qth = (self.lat, self.lon, self.alt)
-        observer = ephem.Observer() # Create observer and set values
-        observer.lat = intdeg2dms(qth[0])
-        observer.lon = intdeg2dms(-qth[1])
-        observer.elevation = qth[2]
-        sun = ephem.Sun() # Find sun
-        sun.compute(observer)
-        sunAz, sunEl = sun.az*180/np.pi, sun.alt*180/np.pi
-        return sunAz, sunEl
+        return self.load_solar().position(time.time())
     
     def recalculateSun(self):
         """ Function to recalculate the Sun's postion for display. """
-        qth = (self.lat, self.lon, self.alt)
-        observer = ephem.Observer() # Create observer and set values
-        observer.lat = intdeg2dms(qth[0])
-        observer.lon = intdeg2dms(-qth[1])
-        observer.elevation = qth[2]
-        sun = ephem.Sun() # Find sun
-        sun.compute(observer)
-        self.sunAz, self.sunEl = sun.az*180/np.pi, sun.alt*180/np.pi
+        self.sunAz, self.sunEl = self.findsun()
         self.sunazellabel.configure(text="Sun Azimuth: %3.2f, Sun Elevation: %3.2f" %
                                                                 (self.sunAz, self.sunEl))
         
     def recalculate(self):
         """ Function to recalculate future passes if new TLE loaded. """
+        self.np_l.configure(text=self.pass_label()) # Configure label
+
+    def pass_label(self):
+        """ Function to describe the next 3 passes, with any sun outages, for the pass label. """
         starttime, endtime, startaz, endaz, maxel, self.satname = \
                  self.nextpass(str(self.tleloc.get())) #Find upcoming passes
-        # Configure label
-        self.np_l.configure(text = \
-                "Upcoming Passes for "+str(self.satname)+":\n"+
-                "\nPass 1:\nStart: "+starttime[0]+", Azimuth: "+
-                str(round(startaz[0],2))+self.degree_sign+"\nFinish: "+endtime[0]+
-                ", Azimuth: "+str(round(endaz[0],2))+self.degree_sign+
-                "\nMaximum Elevation: "+str(round(maxel[0],2))+self.degree_sign+
-                "\nPass 2:\nStart: "+starttime[1]+", Azimuth: "+
-                str(round(startaz[1],2))+self.degree_sign+"\nFinish: "+endtime[1]+
-                ", Azimuth: "+str(round(endaz[1],2))+self.degree_sign+
-                "\nMaximum Elevation: "+str(round(maxel[1],2))+self.degree_sign+
-                "\nPass 3:\nStart: "+starttime[2]+", Azimuth: "+
-                str(round(startaz[2],2))+self.degree_sign+"\nFinish: "+endtime[2]+
-                ", Azimuth: "+str(round(endaz[2],2))+self.degree_sign+
-                "\nMaximum Elevation: "+str(round(maxel[2],2))+self.degree_sign)
+        outages = self.sun_outages(str(self.tleloc.get())) #Warn of the Sun in the beam
+        text = "Upcoming Passes for "+str(self.satname)+":\n"
+        for k in range(len(starttime)):
+            text += "\nPass "+str(k+1)+":\nStart: "+starttime[k]+", Azimuth: "+ \
+                    str(round(startaz[k],2))+self.degree_sign+"\nFinish: "+endtime[k]+ \
+                    ", Azimuth: "+str(round(endaz[k],2))+self.degree_sign+ \
+                    "\nMaximum Elevation: "+str(round(maxel[k],2))+self.degree_sign+outages[k]
+        return text
         
 ##############################################################################################
 # Define Function for finding upcoming passes
     def nextpass(self, tlefile):
         """ Determine Next 3 Pass timing and azimuth of start and finish time/azimuth. """
-        qth = (self.lat, self.lon, self.alt)
         tle, satname = self.load_tle(tlefile) # load tle
-        p = transits(tle, qth) # predict future passes
-        starttime, endtime, startaz, endaz, maxel = ([] for i in range(5)) #initialize
-        for i in range(3): # Predict 3 passes
-            transit = next(p) #Find next pass
-            starttime.append(time.ctime(transit.start))
-            endtime.append(time.ctime(transit.end))
-            startaz.append(observe(tle, qth, transit.start)['azimuth'])
-            endaz.append(observe(tle, qth, transit.end)['azimuth'])
-            maxel.append(transit.peak()['elevation'])
+        data = self.upcoming_passes(tle)
+        starttime = [time.ctime(t) for t in data['start']]
+        endtime = [time.ctime(t) for t in data['end']]
+        startaz, endaz, maxel = data['start_az'].tolist(), data['end_az'].tolist(), data['max_el'].tolist()
         return starttime, endtime, startaz, endaz, maxel, satname
 
+    def upcoming_passes(self, tle, count=3):
+        """ Function to find the next count passes over the current location. """
+        qth = (self.lat, self.lon, self.alt)
+        now, window = time.time(), 86400
+        data = self.passCache.passes(tle, qth, now, now+window) # cached future passes
+        while len(data) < count and window < 365*86400: # Look further ahead for high orbits
+            window *= 4
+            data = self.passCache.passes(tle, qth, now, now+window)
+        return data[:count]
+
+    def sun_outages(self, tlefile, count=3):
+        """ Function to describe when the Sun is within sunOutageRadius of the satellite
+        during each of the next count passes, as a line for the pass label (empty if never). """
+        tle, _ = self.load_tle(tlefile)
+        data = self.upcoming_passes(tle, count)
+        notes = [""]*count
+        if len(data) == 0:
+            return notes
+        outages = self.load_solar().outages(self.load_predictor(tlefile), data, self.sunOutageRadius)
+        for row in outages:
+            start, end = [time.strftime('%H:%M:%S', time.localtime(t)) for t in (row['start'], row['end'])]
+            notes[row['pass']] += "\nSun Outage: %s - %s" % (start, end)
+        return notes
+
 ##############################################################################################
 # Define Azimuth and Elevation changes for Manual Mode
     def increase_elevation(self):
@@ -857,65 +964,54 @@ def observe(tle, qth, at=None):
         at = time.time()
     return quick_find(tle, at, qth)
 
+def load_catalog(tlefile):
+    """ Function to load every satellite in a multi-satellite (e.g. Celestrak) TLE file as a
+    list of 3 line TLEs, leaving out ones with bad checksums. """
+    return open_catalog(tlefile).tles()
+
+def above_horizon(predictors, at=None, elevation=0):
+    """ Function to find which of many satellites are above an elevation at a certain time.
+    Returns a list of (predictor, azimuth, elevation). """
+    if at is None:
+        at = time.time()
+    data = observe_catalog(predictors, [at])[:, 0] # All satellites in one call
+    up = np.nonzero(data['elevation'] >= elevation)[0]
+    return [(predictors[i], data['azimuth'][i], data['elevation'][i]) for i in up]
+
 def transits(tle, qth, ending_after=None, ending_before=None):
     """ Function to find upcoming passes of a specific satellite. """
     tle = massage_tle(tle)
     qth = massage_qth(qth)
     if ending_after is None: #If not specified
         ending_after = time.time()
-    ts = ending_after
-    while True: #Find passes
-        transit = quick_predict(tle, ts, qth)
-        t = Transit(tle, qth, start=transit[0]['epoch'], end=transit[-1]['epoch'])
-        if (ending_before != None and t.end > ending_before):
+    predictor = Predictor(tle, qth)
+    for summary in predictor.iter_passes(ending_after): #Each pass searched for from the last LOS
+        if (ending_before != None and summary.los > ending_before):
             break
-        if (t.end > ending_after):
-            yield t
-        # Need to advance time cursor so predict doesn't yield same pass
-        ts = t.end + 60 #60 seconds after end
+        if (summary.los > ending_after):
+            yield Transit(tle, qth, start=summary.aos, end=summary.los, predictor=predictor)
         
 class Transit():
     """ Transit is a class representing a pass of a satellite over a groundstation. """
-    def __init__(self, tle, qth, start, end):
-        """ Initialization class. """
+    def __init__(self, tle, qth, start, end, predictor=None):
+        """ Initialization class. predictor can be shared with other passes of the same
+        satellite and ground station. """
         self.tle = massage_tle(tle)
         self.qth = massage_qth(qth)
         self.start = start
         self.end = end
+        if predictor is None:
+            predictor = Predictor(self.tle, self.qth) # Parsed once for all observations
+        self.predictor = predictor
 
     def peak(self, epsilon=0.1):
         """ Function to find peak elevation. """
-        # NOTE: Assumes elevation is strictly monotonic or concave over the [start,end] interval
-        ts =  (self.end + self.start)/2
-        step = (self.end - self.start)
-        while (step > epsilon):
-            step /= 4
-            # Ascend the gradient at this step size
-            direction = None
-            while True:
-                mid   = observe(self.tle, self.qth, ts)['elevation']
-                left  = observe(self.tle, self.qth, ts - step)['elevation']
-                right = observe(self.tle, self.qth, ts + step)['elevation']
-                # Break if we're at a peak
-                if (left <= mid >= right):
-                    break
-                # Ascend up slope
-                slope = -1 if (left > right) else 1
-                # Break if we stepped over a peak (switched directions)
-                if direction is None:
-                    direction = slope
-                if direction != slope:
-                    break
-                # Break if stepping would take us outside of transit
-                next_ts = ts + (direction * step)
-                if (next_ts < self.start) or (next_ts > self.end):
-                    break
-                # Step towards the peak
-                ts = next_ts
+        # Bracketed and refined to within epsilon seconds by Brent's method in cpredict
+        ts, _ = self.predictor.peak(self.start, self.end, epsilon)
         return self.at(ts)
 
     def at(self, t):
         """ Function to return azimuth and elevation at certain time. """
         if t < self.start or t > self.end:
             raise PredictException("time %f outside transit [%f, %f]" % (t, self.start, self.end))
-        return observe(self.tle, self.qth, t)
+        return self.predictor.observe(t)
@@ -12,8 +12,21 @@
 
 ##############################################################################################
 ### Necessary Modules
-import unittest, time
+import unittest, time, threading, os, sys, tempfile
 from argusUtils import *
+from passScheduler import schedule, sun_outages, SCHEDULE_DTYPE
+from passTimeline import plan
+from dopplerProfile import doppler_profile, load_profile
+from solarEphemeris import SolarEphemeris, direction
+from tleCatalog import open_catalog
+from upcomingPasses import load_tle
+import upcomingPasses
+from eclipseTimeline import pass_eclipses
+from trackScheduler import TrackScheduler
+from motorWorker import MotorWorker
+from mountPlanner import candidates, plan_mount, setpoint, slew
+from rotorTrajectory import trajectory, follow, separation, travel, quantize
+from commandLatency import pointing_lag, LatencyEstimator, command_lead
 import numpy as np
 
 ##############################################################################################
@@ -230,7 +243,629 @@ class argusTestCase(unittest.TestCase):
         now = observe(tle, qth)
         self.assertTrue(now['azimuth'] >= 0 and now['azimuth'] <= 360)
         self.assertTrue(now['elevation'] >= -90 and now['elevation'] <= 90)
-    
+
+##############################################################################################
+class predictTestCase(unittest.TestCase):
+    """ Tests for the prediction code. These do not need the GUI, motor or GPS. """
+
+    tle = ['MTI',
+           '1 26102U 00014A   18335.92389211 +.00003214 +00000-0 +56025-4 0  9993',
+           '2 26102 097.5707 178.9696 0010150 129.3477 230.8676 15.51507910037022']
+    qth = (40.015, 105.27, 1624)
+    t0 = 1543708800.0 # 12/2/2018 00:00 UTC, shortly after the TLE epoch
+    yaogan = ['Yaogan 6',
+              '1 34839U 09021A   18303.64686392  .00000352  00000-0  16060-4 0  9995',
+              '2 34839  97.0796 334.9705 0027849 346.4602  13.5887 15.26336490528919']
+    # Deep space: geostationary (never transits), Molniya and GPS
+    geo = ['GEO', '1 28884U 05041A   18335.50000000 -.00000282  00000-0  00000+0 0  9997',
+           '2 28884 000.0512 085.3364 0002104 301.7782 183.5390 01.00272109 48120']
+    molniya = ['MOLNIYA', '1 40296U 14069A   18335.50000000 -.00000074  00000-0  10000-3 0  9992',
+               '2 40296 062.7842 287.0652 7205391 269.4716 016.9930 02.00615126 29309']
+    gps = ['GPS', '1 24876U 97035A   18335.50000000  .00000020  00000-0  00000+0 0  9997',
+           '2 24876 055.4990 143.1322 0048321 048.1734 312.3061 02.00562011155017']
+
+    def first_pass(self):
+        """ Predictor and pass table row of the first pass above 10 degrees """
+        p = Predictor(self.tle, self.qth)
+        return p, p.passes(self.t0, self.t0 + 86400, 10)[0]
+
+    def plan_pass(self, p, row, start=None, limits=(-360, 360, 5, 175)):
+        """ Observations every second over a pass table row, and the mount plan for them """
+        times = np.append(np.arange(row['start'], row['end'], 1.0), row['end'])
+        data = p.observe_many(times)
+        return times, data, plan_mount(times, data['azimuth'], data['elevation'], start, limits)
+
+    def test_predictorObserve(self):
+        p = Predictor(self.tle, self.qth)
+        self.assertEqual(p.name, "MTI")
+        self.assertEqual(p.norad_id, 26102)
+        for k in range(10):
+            t = self.t0 + 60*k
+            self.assertEqual(p.observe(t), quick_find(self.tle, t, self.qth))
+
+    def test_predictorThreads(self):
+        times = [self.t0 + 10*k for k in range(2000)]
+        expected = [quick_find(self.tle, t, self.qth) for t in times]
+        results = {}
+        def worker(n):
+            p = Predictor(self.tle, self.qth)
+            results[n] = [p.observe(t) for t in times]
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for n in range(4):
+            self.assertEqual(results[n], expected)
+
+    def test_predictorRepeat(self):
+        p = Predictor(self.tle, self.qth)
+        first = p.observe(self.t0)
+        for k in range(100):
+            p.observe(self.t0 + 86400*k)
+        self.assertEqual(p.observe(self.t0), first)
+
+    def test_predictorFields(self):
+        p = Predictor(self.tle, self.qth)
+        obs = p.observe(self.t0)
+        self.assertEqual(p.observe(self.t0, fields=list(obs)), tuple(obs.values()))
+        self.assertEqual(p.observe(self.t0, ('elevation', 'azimuth')),
+                         (obs['elevation'], obs['azimuth']))
+        self.assertRaises(KeyError, p.observe, self.t0, ('azimuth', 'bogus'))
+
+    def test_observeMany(self):
+        times = self.t0 + np.arange(0, 600, 0.1)
+        data = observe_many(self.tle, self.qth, times)
+        self.assertEqual(len(data), len(times))
+        self.assertTrue(np.array_equal(data['epoch'], Predictor(self.tle, self.qth).observe_many(times)['epoch']))
+        for k in range(0, len(times), 500):
+            obs = quick_find(self.tle, times[k], self.qth)
+            for field in ('azimuth', 'elevation', 'slant_range', 'doppler', 'latitude', 'longitude'):
+                self.assertEqual(data[field][k], obs[field])
+        self.assertEqual(len(observe_many(self.tle, self.qth, [])), 0)
+
+    def test_observeCatalog(self):
+        path = os.path.join(tempfile.mkdtemp(), 'catalog.tle')
+        with open(path, 'w') as f:
+            f.write('\n'.join(self.tle + ['MTI 2'] + self.tle[1:]) + '\n')
+        tles = load_catalog(path)
+        self.assertEqual(tles, [self.tle, ['MTI 2', self.tle[1], self.tle[2]]])
+        predictors = [Predictor(tle, self.qth) for tle in tles]
+        times = self.t0 + np.arange(0, 6000, 60)
+        data = observe_catalog(predictors, times)
+        self.assertEqual(data.shape, (2, len(times)))
+        single = observe_many(self.tle, self.qth, times)
+        self.assertTrue(np.array_equal(data[0], single) and np.array_equal(data[1], single))
+        up = above_horizon(predictors, times[0], -90)
+        self.assertEqual([p.name for p, az, el in up], ['MTI', 'MTI 2'])
+        self.assertRaises(TypeError, observe_catalog, tles, times)
+        self.assertRaises(TypeError, observe_catalog, 5, times)
+        # Another thread emptying the list meanwhile doesn't free the Predictors in use
+        predictors = [Predictor(self.tle, self.qth) for k in range(20)]
+        times = self.t0 + np.arange(0, 40000, 1.0)
+        def clear():
+            time.sleep(0.01)
+            predictors[:] = [None]*len(predictors)
+        thread = threading.Thread(target=clear)
+        thread.start()
+        data = observe_catalog(predictors, times)
+        thread.join()
+        self.assertTrue(np.array_equal(data[0], data[-1]))
+
+    def test_observeCatalogThreads(self):
+        # Deep space satellites on the one day and half day resonances, and a GPS satellite
+        tles = (self.tle, self.geo, self.molniya, self.gps, self.tle)
+        predictors = [Predictor(tle, self.qth) for tle in tles]
+        times = self.t0 + np.arange(0, 3*86400, 30.0)
+        serial = observe_catalog(predictors, times)
+        for name in ('azimuth', 'elevation', 'slant_range', 'latitude', 'longitude', 'altitude'):
+            self.assertTrue(np.all(np.isfinite(serial[name])), name)
+        self.assertTrue(np.all(serial['altitude'][1] > 35000)) # Really at GEO
+        # The same bit for bit when split over threads, after the predictors were used for
+        # later times, and in reverse order (the deep space resonance terms integrate from
+        # the epoch, so they must not depend on earlier calls)
+        for threads in (2, 3, 0):
+            self.assertEqual(observe_catalog(predictors, times, threads=threads).tobytes(), serial.tobytes())
+        self.assertEqual(observe_catalog(predictors, times[::-1], threads=4).tobytes(),
+                         serial[:, ::-1].tobytes())
+        self.assertEqual(observe_catalog(predictors, times[::-1]).tobytes(), serial[:, ::-1].tobytes())
+        self.assertEqual(observe_catalog(predictors, [], threads=4).shape, (5, 0))
+        self.assertEqual(observe_catalog([], times, threads=4).shape, (0, len(times)))
+
+    def test_nextPass(self):
+        p = Predictor(self.tle, self.qth)
+        passes, ts = [], self.t0
+        while True:
+            summary = p.next_pass(ts, before=self.t0 + 86400)
+            if summary is None:
+                break
+            passes.append(summary)
+            ts = summary.los + 60
+        # Compare with the horizon crossings of a 1 second track
+        data = observe_many(self.tle, self.qth, np.arange(self.t0, self.t0 + 86400, 1.0))
+        up = data['elevation'] >= 0
+        rises = data['epoch'][1:][up[1:] & ~up[:-1]]
+        self.assertEqual(len(passes), len(rises))
+        for summary, rise in zip(passes, rises):
+            self.assertTrue(rise - 1 <= summary.aos <= rise)
+            self.assertTrue(summary.aos < summary.tca < summary.los)
+            self.assertAlmostEqual(p.observe(summary.aos)['elevation'], 0, places=3)
+            self.assertAlmostEqual(p.observe(summary.los)['elevation'], 0, places=3)
+            self.assertAlmostEqual(p.observe(summary.los)['azimuth'], summary.los_az, places=3)
+            track = data['elevation'][(data['epoch'] > summary.aos) & (data['epoch'] < summary.los)]
+            self.assertTrue(summary.max_el >= track.max() - 1e-6)
+        # In the middle of a pass the pass in progress is returned
+        for a, b in zip(p.next_pass(passes[0].tca), passes[0]):
+            self.assertAlmostEqual(a, b, delta=0.01)
+
+    def test_transitPeak(self):
+        summary = Predictor(self.tle, self.qth).next_pass(self.t0)
+        transit = Transit(self.tle, self.qth, summary.aos, summary.los)
+        peak = transit.peak()
+        self.assertAlmostEqual(peak['elevation'], summary.max_el, places=6)
+        for dt in (-1, 1):
+            self.assertTrue(transit.at(peak['epoch'] + dt)['elevation'] < peak['elevation'])
+        # The standalone pass listing finds the same peak
+        transit = next(upcomingPasses.transits(self.tle, self.qth, self.t0))
+        self.assertAlmostEqual(transit.peak()['elevation'], summary.max_el, places=6)
+
+    def test_passes(self):
+        data = passes(self.tle, self.qth, self.t0, self.t0 + 3*86400)
+        p = Predictor(self.tle, self.qth)
+        summary = p.next_pass(self.t0)
+        self.assertEqual((data['start'][0], data['end'][0], data['max_el'][0]),
+                         (summary.aos, summary.los, summary.max_el))
+        self.assertTrue(np.all(data['start'][1:] > data['end'][:-1]))
+        self.assertTrue(np.allclose(data['duration'], data['end'] - data['start']))
+        high = p.passes(self.t0, self.t0 + 3*86400, min_el=30)
+        self.assertTrue(0 < len(high) < len(data))
+        self.assertTrue(np.array_equal(high, data[data['max_el'] >= 30]))
+
+    def test_passCache(self):
+        path = os.path.join(tempfile.mkdtemp(), 'passes.sqlite')
+        cache = PassCache(path)
+        day = 86400
+        first = cache.passes(self.tle, self.qth, self.t0, self.t0 + day)
+        self.assertTrue(np.array_equal(first, passes(self.tle, self.qth, self.t0, self.t0 + day)))
+        # Extending both ends only adds the missing passes
+        wide = PassCache(path).passes(self.tle, self.qth, self.t0 - day, self.t0 + 2*day)
+        direct = passes(self.tle, self.qth, self.t0 - day, self.t0 + 2*day)
+        self.assertEqual(len(wide), len(direct))
+        self.assertTrue(np.allclose(wide['start'], direct['start'], atol=0.01))
+        high = cache.passes(self.tle, self.qth, self.t0, self.t0 + day, min_el=30)
+        self.assertTrue(np.array_equal(high, first[first['max_el'] >= 30]))
+        # A different station is cached separately
+        other = cache.passes(self.tle, (30.369, 96.542, 801), self.t0, self.t0 + day)
+        self.assertFalse(np.array_equal(other['start'], first['start']))
+
+    def test_passEphemeris(self):
+        p = Predictor(self.tle, self.qth)
+        summary = p.next_pass(self.t0)
+        eph = PassEphemeris(p, summary.aos - 300, summary.los)
+        times = np.arange(eph.start, eph.end, 0.1)
+        data = p.observe_many(times)
+        az, el, rng, rate = eph(times)
+        self.assertTrue(np.all(np.abs((az - data['azimuth'] + 180) % 360 - 180) <= eph.tol[0]))
+        self.assertTrue(np.all(np.abs(el - data['elevation']) <= eph.tol[1]))
+        self.assertTrue(np.all(np.abs(rng - data['slant_range']) <= eph.tol[2]))
+        self.assertTrue(np.all(np.abs(rate - data['range_rate']) <= eph.tol[3]))
+        for k in range(0, len(times), 997): # Single times give the same values
+            self.assertAlmostEqual(eph.azel(times[k])[1], el[k], places=9)
+        self.assertRaises(ValueError, eph, eph.end + 1)
+
+    def test_passScheduler(self):
+        stations = [self.qth, (64.8, 147.7, 200)]
+        t1 = self.t0 + 2*86400
+        table = schedule([self.tle, self.yaogan], stations, self.t0, t1, 10, processes=2)
+        self.assertTrue(np.all(np.diff(table['start']) >= 0))
+        for sat, tle in enumerate([self.tle, self.yaogan]):
+            for station, qth in enumerate(stations):
+                mine = table[(table['satellite'] == sat) & (table['station'] == station)]
+                single = passes(tle, qth, self.t0, t1, 10)
+                self.assertEqual(len(mine), len(single))
+                self.assertTrue(np.allclose(mine['start'], single['start'], atol=0.01))
+        # One pair split into time windows finds the same passes
+        split = schedule([self.tle], [self.qth], self.t0, t1, 0, processes=4)
+        self.assertTrue(np.allclose(split['start'], passes(self.tle, self.qth, self.t0, t1)['start'], atol=0.01))
+        errors = []
+        self.assertEqual(len(schedule([self.geo], [self.qth], self.t0, t1, 0, 1, errors)), 0)
+        self.assertEqual(len(errors), 1)
+
+    def test_tleCatalog(self):
+        bad = ['Bad', self.tle[1][:-1] + '0', self.tle[2]] # Wrong checksum
+        path = os.path.join(tempfile.mkdtemp(), 'catalog.tle')
+        with open(path, 'w') as f:
+            f.write('\r\n'.join(self.tle + [''] + bad + self.yaogan) + '  \r\n\n')
+        catalog = open_catalog(path)
+        self.assertIs(open_catalog(path), catalog) # Not read again
+        self.assertEqual(len(catalog), 3)
+        self.assertEqual(catalog.bad.tolist(), [1])
+        self.assertEqual(catalog.norad_ids.tolist(), [26102, 26102, 34839])
+        self.assertEqual(catalog[34839], self.yaogan)
+        self.assertEqual(catalog['MTI'], self.tle)
+        self.assertEqual(catalog[26102], self.tle)
+        self.assertFalse('Bad' in catalog)
+        self.assertEqual(catalog.tles(), [self.tle, self.yaogan])
+        self.assertEqual(catalog.first(), self.tle)
+        self.assertEqual(catalog.predictor('Yaogan 6', self.qth).norad_id, 34839)
+        self.assertRaises(KeyError, catalog.find, 12345)
+        with open_catalog(path) as shared: # Doesn't close the cached catalog
+            self.assertIs(shared, catalog)
+        self.assertEqual(catalog[34839], self.yaogan)
+        os.replace(path, path + '.old') # A new file at the same path is read again
+        with open(path, 'w') as f:
+            f.write('\n'.join(self.yaogan))
+        self.assertEqual(open_catalog(path).tles(), [self.yaogan])
+        self.assertEqual(catalog['MTI'], self.tle) # Still usable by whoever holds the old one
+        self.assertRaises(PredictException, load_tle, path, 'MTI') # Gone from the new file
+        with open(path, 'w') as f:
+            f.write('\n'.join(self.yaogan[:2]))
+        self.assertRaises(PredictException, open_catalog, path)
+
+    def test_passTimeline(self):
+        table = np.zeros(4, dtype=SCHEDULE_DTYPE)
+        # start, end, start_az, end_az: pass 1 overlaps 0 and 2, and 3 starts too soon after 2
+        # for a 180 degree slew at 3 degrees/s
+        for k, row in enumerate([(0, 600, 0, 180), (500, 1000, 90, 90), (620, 1200, 180, 0),
+                                 (1230, 1800, 180, 180)]):
+            table['start'][k], table['end'][k], table['start_az'][k], table['end_az'][k] = row
+        table['duration'] = table['end'] - table['start']
+        table['max_el'] = 90
+        chosen, total = plan(table)
+        self.assertEqual(chosen.tolist(), [0, 2])
+        self.assertAlmostEqual(total, 1180)
+        self.assertEqual(plan(table, az_rate=10.0)[0].tolist(), [0, 2, 3]) # Faster rotor
+        self.assertEqual(plan(table, weights=[1, 5, 1, 1])[0].tolist(), [1, 3])
+        # A shorter overhead pass wins over a longer grazing one, unless only duration counts
+        table['max_el'] = [10, 85, 10, 10]
+        self.assertEqual(plan(table)[0].tolist(), [1, 3])
+        self.assertEqual(plan(table, elevation=0)[0].tolist(), [0, 2])
+        self.assertEqual(len(plan(table[:0])[0]), 0)
+        # Real passes never overlap in the plan
+        table = schedule([self.tle], [self.qth], self.t0, self.t0 + 86400, 0, 1)
+        chosen, total = plan(table)
+        self.assertEqual(len(chosen), len(table))
+
+    def test_dopplerProfile(self):
+        p = Predictor(self.tle, self.qth)
+        summary = p.next_pass(self.t0)
+        profile = doppler_profile(p, summary.aos, summary.los, 2.4e9, rate=10)
+        self.assertTrue(profile.start == summary.aos and profile.end >= summary.los)
+        times = np.linspace(summary.aos, summary.los, 1000)
+        doppler = p.observe_many(times)['doppler']*24 # 100 MHz to 2.4 GHz
+        self.assertTrue(np.all(np.abs(profile.at(times) - doppler) < 1.0))
+        path = os.path.join(tempfile.mkdtemp(), 'pass.dop')
+        profile.save(path)
+        loaded = load_profile(path)
+        self.assertEqual(loaded.carrier, 2.4e9)
+        self.assertTrue(np.array_equal(loaded.offsets, profile.offsets))
+        self.assertEqual(loaded.at(summary.tca), profile.at(summary.tca))
+        self.assertAlmostEqual(loaded.frequency(times[500]), 2.4e9 + doppler[500], delta=1.0)
+        self.assertRaises(ValueError, loaded.at, summary.aos - 1)
+
+    def test_observeRates(self):
+        p = Predictor(self.tle, self.qth)
+        summary = p.next_pass(self.t0)
+        times = np.linspace(summary.aos + 1, summary.los - 1, 200)
+        data = p.observe_many(times)
+        after, before = p.observe_many(times + 0.01), p.observe_many(times - 0.01)
+        az_rate = ((after['azimuth'] - before['azimuth'] + 180) % 360 - 180)/0.02
+        el_rate = (after['elevation'] - before['elevation'])/0.02
+        self.assertTrue(np.all(np.abs(data['azimuth_rate'] - az_rate) < 0.01))
+        self.assertTrue(np.all(np.abs(data['elevation_rate'] - el_rate) < 0.01))
+        obs = p.observe(times[50])
+        self.assertEqual(obs['azimuth_rate'], data['azimuth_rate'][50])
+        self.assertEqual(p.observe(times[50], ('elevation_rate',)), (obs['elevation_rate'],))
+        # Fastest rates of each pass, compared with sampling every 0.1 s
+        table = p.passes(self.t0, self.t0 + 2*86400)
+        rates = p.max_rates(table['start'], table['end'])
+        for k in range(len(table)):
+            data = p.observe_many(np.arange(table['start'][k], table['end'][k], 0.1))
+            for name, column in (('max_az_rate', 'azimuth_rate'), ('max_el_rate', 'elevation_rate')):
+                sampled = np.abs(data[column]).max() # Can fall just short of a sharp peak
+                self.assertTrue(sampled - 1e-9 <= rates[name][k] <= sampled*1.001 + 1e-6)
+        self.assertRaises(ValueError, p.max_rates, table['start'], table['end'][:1])
+
+    def test_solarEphemeris(self):
+        solar = SolarEphemeris(*self.qth)
+        observer = ephem.Observer() # Built as the GUI used to, without refraction
+        observer.lat, observer.lon = intdeg2dms(self.qth[0]), intdeg2dms(-self.qth[1])
+        observer.elevation, observer.pressure = self.qth[2], 0
+        observer.date = ephem.Date(time.strftime('%Y/%m/%d %H:%M:%S', time.gmtime(self.t0)))
+        sun = ephem.Sun(observer)
+        az, el = solar.position(self.t0)
+        self.assertAlmostEqual(az, np.degrees(sun.az), places=6)
+        self.assertAlmostEqual(el, np.degrees(sun.alt), places=6)
+        times = self.t0 + np.linspace(0, 3*86400, 500)
+        for body in ('sun', 'moon'): # Interpolated directions are within 0.01 degrees
+            exact = direction(*np.array([solar.position(t, body) for t in times]).T)
+            cosine = np.sum(solar.directions(times, body)*exact, axis=1)
+            self.assertTrue(np.all(np.degrees(np.arccos(np.clip(cosine, -1, 1))) < 0.01))
+        # Threads sharing the observer each get the Sun at their own times
+        expected = [solar.position(t) for t in times]
+        results = [None]*4
+        def work(n):
+            results[n] = [solar.position(t) for t in times]
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6) # Switch threads as often as possible
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(results, [expected]*4)
+        # Sun outages agree with sampling each pass every 0.05 s
+        p = Predictor(self.tle, self.qth)
+        table = p.passes(self.t0, self.t0 + 5*86400)
+        outages = solar.outages(p, table, radius=30)
+        self.assertTrue(len(outages) > 0)
+        for k in range(len(table)):
+            times = np.arange(table['start'][k], table['end'][k], 0.05)
+            separation, _ = solar.separation(p, times)
+            mine = outages[outages['pass'] == k]
+            self.assertEqual(len(mine) > 0, bool(np.any(separation <= 30)))
+            if len(mine):
+                self.assertAlmostEqual(mine['start'][0], times[separation <= 30][0], delta=0.1)
+                self.assertAlmostEqual(mine['end'][-1], times[separation <= 30][-1], delta=0.1)
+                self.assertAlmostEqual(mine['min_separation'].min(), separation.min(), places=2)
+        # The scheduler's per pass totals, for the operator
+        schedule_table = schedule([self.tle], [self.qth], self.t0, self.t0 + 5*86400, 0, 1)
+        seconds = sun_outages([self.tle], [self.qth], schedule_table, 30)
+        self.assertEqual(len(seconds), len(schedule_table))
+        self.assertAlmostEqual(seconds.sum(), (outages['end'] - outages['start']).sum(), delta=1.0)
+
+    def test_eclipses(self):
+        p = Predictor(self.tle, self.qth)
+        eclipses = p.eclipses(self.t0, self.t0 + 86400)
+        self.assertTrue(len(eclipses) > 0)
+        self.assertTrue(np.all(np.diff(eclipses['start']) > 0))
+        self.assertTrue(np.allclose(eclipses['duration'], eclipses['end'] - eclipses['start']))
+        # Agrees with the sunlit flag sampled every 5 s, away from the edges
+        times = self.t0 + np.arange(0, 86400, 5.0)
+        sunlit = np.array([p.observe(t)['sunlit'] for t in times])
+        inside = np.zeros(len(times), dtype=bool)
+        edge = np.zeros(len(times), dtype=bool)
+        for start, end, _ in eclipses:
+            inside |= (times >= start) & (times <= end)
+            edge |= (np.abs(times - start) < 0.01) | (np.abs(times - end) < 0.01)
+        self.assertTrue(np.all(((sunlit == 0) == inside) | edge))
+        # Seconds eclipsed during each pass, compared with sampling every second
+        table = p.passes(self.t0, self.t0 + 2*86400)
+        result = pass_eclipses(p, table)
+        for k in range(len(table)):
+            times = np.arange(table['start'][k], table['end'][k], 1.0)
+            eclipsed = sum(p.observe(t)['sunlit'] == 0 for t in times)
+            self.assertAlmostEqual(result['eclipsed'][k], eclipsed, delta=2)
+            self.assertEqual(np.isnan(result['eclipse_start'][k]), eclipsed == 0)
+
+    def test_stations(self):
+        stations = [self.qth, (64.8, 147.7, 200), (-33.9, -18.4, 10)]
+        p = Predictor(self.tle, self.qth)
+        times = self.t0 + np.arange(0, 86400, 30.0)
+        data = p.observe_stations(stations, times)
+        self.assertEqual(data.shape, (3, len(times)))
+        for k, qth in enumerate(stations): # Same as observing from each station on its own
+            self.assertEqual(data[k].tobytes(), Predictor(self.tle, qth).observe_many(times).tobytes())
+        self.assertEqual(p.qth, self.qth)
+        self.assertEqual(p.observe(self.t0), quick_find(self.tle, self.t0, self.qth))
+        # Starting in the middle of a pass over the first station
+        start = p.next_pass(self.t0).aos + 60
+        table = p.station_passes(stations, start, start + 2*86400, 5)
+        self.assertTrue(np.all(np.diff(table['start']) >= 0))
+        for k, qth in enumerate(stations):
+            single = Predictor(self.tle, qth).passes(start, start + 2*86400, 5)
+            mine = table[table['station'] == k]
+            self.assertEqual(len(mine), len(single))
+            for name in ('start', 'end', 'tca'):
+                self.assertTrue(np.allclose(mine[name], single[name], rtol=0, atol=0.01))
+            self.assertTrue(np.allclose(mine['max_el'], single['max_el'], rtol=0, atol=1e-3))
+        self.assertRaises(ValueError, p.station_passes, [], start, start + 86400)
+        self.assertRaises(TypeError, p.observe_stations, [(40.0, 105.0)], times)
+
+    def test_iterPasses(self):
+        p = Predictor(self.tle, self.qth)
+        t1 = self.t0 + 3*86400
+        table = p.passes(self.t0, t1, 10)
+        found = list(p.iter_passes(self.t0, t1, min_el=10))
+        self.assertEqual([s.aos for s in found], table['start'].tolist())
+        self.assertEqual([s.max_el for s in found], table['max_el'].tolist())
+        # Unbounded, interleaved with other use of the predictor
+        it = iter(p.iter_passes(self.t0))
+        for summary in p.iter_passes(self.t0, t1):
+            p.observe(self.t0 + 12345)
+            self.assertEqual(next(it), summary)
+        self.assertEqual(len(list(transits(self.tle, self.qth, self.t0, t1))), len(p.passes(self.t0, t1)))
+        self.assertRaises(PredictException, next, Predictor(self.geo, self.qth).iter_passes(self.t0))
+
+    def test_trackScheduler(self):
+        """ Ticks stay on their deadlines whatever the work takes, late ones are skipped """
+        clock = [100.0]
+        def sleep(dt):
+            clock[0] += dt
+        work = [0.03, 0.25, 0.03, 0.03, 0.12, 0.03] # seconds taken by each tick
+        scheduler = TrackScheduler(0.1, lambda: clock[0], lambda: 5000.0, sleep)
+        ticks = []
+        for k, t in scheduler.run(lambda: len(ticks) < len(work)):
+            ticks.append((k, t, clock[0]))
+            clock[0] += work[len(ticks)-1]
+        self.assertEqual([k for k, _, _ in ticks], [0, 1, 4, 5, 6, 8])
+        for k, t, now in ticks:
+            self.assertAlmostEqual(t, 5000.0 + 0.1*k) # Scheduled, not actual, time
+            self.assertAlmostEqual(now, 100.0 + 0.1*k) # Woken on the deadline, no drift
+        self.assertEqual((scheduler.ticks, scheduler.skipped), (6, 3))
+        self.assertEqual(scheduler.lateness.sum(), 6)
+        self.assertEqual(scheduler.overrun.sum(), 2)
+        self.assertIn("6 ticks every 0.1 s, 3 skipped", scheduler.summary())
+
+    def test_motorWorker(self):
+        """ Setpoints posted while a command is being written replace each other """
+        sent, release = [], threading.Event()
+        def send(az, el):
+            release.wait(5)
+            if az < 0:
+                raise IOError("bad setpoint")
+            sent.append((az, el))
+        worker = MotorWorker(send)
+        worker.post(1.0, 10.0) # Taken by the worker, held in send
+        while worker.depth() or not worker.busy:
+            time.sleep(0.001)
+        for k in range(2, 6):
+            worker.post(float(k), 10.0 + k)
+        self.assertEqual(worker.depth(), 1)
+        release.set()
+        self.assertTrue(worker.wait(5))
+        self.assertEqual(sent, [(1.0, 10.0), (5.0, 15.0)]) # Only the latest after the first
+        worker.post(-1.0, 0.0)
+        self.assertTrue(worker.wait(5))
+        stats = worker.stats()
+        self.assertEqual((stats['posted'], stats['sent'], stats['dropped'], stats['failed'], stats['depth']),
+                         (6, 2, 3, 1, 0))
+        self.assertEqual(stats['latency'].sum(), 2)
+        self.assertGreaterEqual(stats['delay'], 0.0)
+        worker.close()
+        self.assertFalse(worker.thread.is_alive())
+
+    def test_trackSetReadback(self):
+        """ A bad latency readback skips the sample without failing the set command """
+        class Link: # Serial link answering status commands with a short reply
+            def write(self, packet):
+                pass
+            def flush(self):
+                pass
+            def read(self, n):
+                return b'\x57\x03'
+        gui = GUI.__new__(GUI) # Only the tracking state, no window
+        gui.set = lambda az, el: None
+        gui.MotSer, gui.motorLock, gui.motorOn = Link(), threading.Lock(), True
+        gui.ephemeris, gui.progflag, gui.mountPlan, gui.trajectory = object(), False, None, None
+        gui.latency, gui.lagInterval, gui.lastReadback = LatencyEstimator(), 5.0, 0.0
+        self.assertRaises(IOError, gui.readback)
+        worker = MotorWorker(gui.track_set)
+        worker.post(10.0, 20.0)
+        self.assertTrue(worker.wait(5))
+        stats = worker.stats()
+        self.assertEqual((stats['sent'], stats['failed']), (1, 0))
+        self.assertEqual(gui.latency.delays, [])
+        worker.close()
+
+    def test_mountPlanner(self):
+        azs, els = candidates([100.0, 300.0], [30.0, 30.0])
+        self.assertEqual(azs.tolist(), [[100, -260, 280, -80], [300, -60, 120, -240]])
+        self.assertEqual(els.tolist(), [[30, 30, 150, 150], [30, 30, 150, 150]])
+        p = Predictor(self.tle, self.qth)
+        limits = (-90, 270, 5, 175) # Less than a full turn of azimuth either way
+        start = (0.0, 5.0)
+        for row in p.passes(self.t0, self.t0 + 2*86400):
+            times, data, table = self.plan_pass(p, row, start, limits)
+            self.assertTrue(np.all((table['azimuth'] >= -90) & (table['azimuth'] <= 270)))
+            self.assertTrue(np.all((table['elevation'] >= 5) & (table['elevation'] <= 175)))
+            # Same direction as the satellite, never flipping or jumping mid-pass
+            a, e = np.radians(table['azimuth']), np.radians(table['elevation'])
+            b, f = np.radians(data['azimuth']), np.radians(np.maximum(data['elevation'], 5))
+            cosine = np.cos(e)*np.cos(f)*np.cos(a - b) + np.sin(e)*np.sin(f)
+            self.assertTrue(np.all(cosine > 1 - 1e-9))
+            self.assertEqual(len(np.unique(table['flipped'])), 1)
+            self.assertLess(np.abs(np.diff(table['azimuth'])).max(), 90) # No wraps
+            # Nothing cheaper than the shortest path through the candidates with no limits
+            free = plan_mount(times, data['azimuth'], data['elevation'], start, (-360, 360, 5, 175), 0)
+            total = lambda t: slew(t) + np.hypot(t['azimuth'][0] - start[0], t['elevation'][0] - start[1])
+            self.assertGreaterEqual(total(table) + 1e-6, total(free))
+            self.assertEqual(setpoint(table, times[3] + 0.4)['time'], times[3])
+            self.assertIsNone(setpoint(table, times[-1] + 1))
+            start = table['azimuth'][-1], table['elevation'][-1]
+        self.assertRaises(ValueError, plan_mount, [0.0], [180.0], [45.0], None, (0, 90, 5, 85))
+
+    def test_rotorTrajectory(self):
+        # Trapezoidal move: 3 deg/s top speed reached after 0.5 s at 6 deg/s^2
+        self.assertEqual(travel(np.array([10.0, 10.0, 10.0, 1.0]), np.array([0.5, 2.0, 10.0, 0.25]), 3.0, 6.0).tolist(),
+                         [0.75, 5.25, 10.0, 0.1875])
+        self.assertAlmostEqual(quantize(12.36, 10), 12.4)
+        p, row = self.first_pass()
+        times, data, table = self.plan_pass(p, row)
+        commands = trajectory(table, max_error=0.5, pulse=10)
+        self.assertTrue(np.all(np.diff(commands['time']) > 0))
+        self.assertTrue(np.all(commands['max_error'] <= 0.5))
+        self.assertTrue(np.all(np.round(commands['azimuth']*10, 6) % 1 == 0)) # Pulse resolution
+        # Fewer commands than one per 0.3 degrees of motion, rotor within bound on the samples
+        motion = np.hypot(np.diff(table['azimuth']), np.diff(table['elevation'])).sum()
+        self.assertLess(len(commands), motion/0.3/2)
+        az, el = follow(commands, times, start=(table['azimuth'][0], table['elevation'][0]))
+        self.assertLessEqual(separation(az, el, table['azimuth'], table['elevation']).max(), 0.5 + 1e-9)
+        # A rotor starting far away catches up, then stays within bound
+        commands = trajectory(table, start=(table['azimuth'][0] + 90, 60.0))
+        az, el = follow(commands, times, start=(table['azimuth'][0] + 90, 60.0))
+        error = separation(az, el, table['azimuth'], table['elevation'])
+        self.assertGreater(error[0], 30)
+        caught = np.argmax(error <= 0.5)
+        self.assertLess(times[caught] - times[0], 60)
+        self.assertTrue(np.all(error[caught:] <= 0.5 + 1e-9))
+
+    def test_commandLatency(self):
+        p, row = self.first_pass()
+        eph = PassEphemeris(p, row['start'], row['end'])
+        t = row['tca'] - 60
+        az, el = eph.azel(t - 2.0) # Rotor two seconds behind
+        self.assertAlmostEqual(pointing_lag(eph, t, az, el), 2.0, delta=0.05)
+        self.assertAlmostEqual(pointing_lag(eph, t, az - 180, 180 - el), 2.0, delta=0.05) # Flipped
+        az, el = eph.azel(t + 1.0)
+        self.assertAlmostEqual(pointing_lag(eph, t, az, el), -1.0, delta=0.05)
+        self.assertIsNone(pointing_lag(eph, t, az + 30, el)) # Off the track
+        self.assertIsNone(pointing_lag(eph, row['end'] + 10, az, el))
+        # Closed loop: commands aimed the estimate ahead, rotor 1.5 s behind its commands
+        latency = LatencyEstimator(window=5)
+        for k in range(10):
+            lag = 1.5 - latency.latency
+            latency.add(lag, latency.latency)
+        self.assertAlmostEqual(latency.latency, 1.5)
+        latency.add(60.0, 1.5) # One odd readback doesn't move it
+        self.assertAlmostEqual(latency.latency, 1.5)
+        self.assertEqual(LatencyEstimator(limits=(0, 5)).add(-3.0, 0.0), 0.0)
+
+    def test_trajectoryLatency(self):
+        """ Trajectory commands lead only by the transport delay, and readbacks while following
+        one don't measure the command latency """
+        p, row = self.first_pass()
+        times, data, table = self.plan_pass(p, row)
+        commands = trajectory(table, max_error=0.5, pulse=10)
+        start = (table['azimuth'][0], table['elevation'][0])
+        transport, latency = 0.3, 2.0 # Rotor travel makes up the rest of the latency
+        self.assertEqual(command_lead(latency, transport, False), latency)
+        def error(lead): # Posted lead seconds before due, at the rotor transport seconds later
+            sent = commands.copy()
+            sent['time'] += transport - lead
+            az, el = follow(sent, times, start=start)
+            return separation(az, el, table['azimuth'], table['elevation']).max()
+        self.assertLessEqual(error(command_lead(latency, transport, True)), 0.5 + 1e-9)
+        self.assertGreater(error(latency), 0.5) # Leading by the latency too sends them early
+        # On time, yet the lag swings with the deliberate pointing error
+        eph = PassEphemeris(p, row['start'], row['end'])
+        az, el = follow(commands, times, start=start)
+        lags = [pointing_lag(eph, t, a, e) for t, a, e in zip(times, az, el)]
+        lags = np.array([lag for lag in lags if lag is not None])
+        self.assertGreater(np.abs(lags).max(), 0.5)
+
+    def test_loadEphemerisNoPasses(self):
+        """ Tracking a satellite with no passes falls back to observe """
+        gui = GUI.__new__(GUI) # Only the pass state, no window
+        gui.ephemeris, gui.upcoming = None, None
+        p = Predictor(self.geo, self.qth)
+        self.assertIsNone(gui.load_ephemeris(p, self.t0))
+        self.assertEqual(gui.upcoming, (p, None)) # Not searched again every tick
+        self.assertIsNone(gui.load_ephemeris(p, self.t0 + 1))
+
+    def test_predictorUninitialized(self):
+        p = Predictor.__new__(Predictor) # __init__ never run
+        self.assertRaises(PredictException, p.observe, self.t0)
+        self.assertRaises(PredictException, p.passes, self.t0, self.t0 + 86400)
+        self.assertRaises(PredictException, observe_catalog, [p], [self.t0])
+
+    def test_predictorBadTLE(self):
+        tle = [self.tle[0], self.tle[1][:-1]+'0', self.tle[2]] # Wrong checksum
+        self.assertRaises(PredictException, Predictor, tle, self.qth)
+
 ##############################################################################################
 # Main: Run Test Cases
 if __name__ == '__main__':
@@ -9,7 +9,7 @@ import time, threading, unittest, os
 from random import random, randint
 import multiprocessing as mp
 import predict
-from cpredict import quick_find, quick_predict, PredictException
+from cpredict import quick_find, quick_predict, observe_many, PredictException
 import ephem
 
 ################################################################
@@ -69,15 +69,10 @@ if __name__ == "__main__":
         startaz.append(predict.observe(tle, qth, transit.start)['azimuth'])
         endaz.append(predict.observe(tle, qth, transit.end)['azimuth'])
         maxel.append(transit.peak()['elevation'])
-        azvec, elvec = [], []
-        t = transit.start
         if i==0:
-            while t < transit.end:
-                az, el, locname, satname = azel_points(tlefile, qthfile, t)
-                azvec.append(az*np.pi/180)
-                elvec.append(90-el)
-                t = t+1
-            ax.plot(azvec, elvec, color='blue')
+            # Whole pass at 1 second steps in one call
+            data = observe_many(tle, qth, np.arange(transit.start, transit.end, 1))
+            ax.plot(data['azimuth']*np.pi/180, 90-data['elevation'], color='blue')
     
     print(maxel)
     # Fix
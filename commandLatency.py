@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Command Latency
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file measures how long after a motor command the rotor actually points where it was
+# told, so the tracker can aim each command that far ahead. The delay covers the wait for
+# the motor worker, the serial write at 600 baud and the rotor getting there. It is found
+# from status readbacks during a pass: the rotor's position is compared with where the pass
+# ephemeris had the satellite, which gives how many seconds behind the satellite the rotor
+# is. Adding the lead the commands were already aimed with gives the delay. The estimate is
+# the median of the recent delays, so one odd readback doesn't move it.
+
+# Commands from a rotor trajectory already allow for the rotor's travel and are deliberately
+# up to the pointing error off the satellite, so they are led only by the time to get the
+# command to the controller, and no readbacks are taken while following one. The measured
+# latency applies to the setpoints the tracking loop sends when it has no trajectory.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+from solarEphemeris import direction
+
+##############################################################################################
+def pointing_lag(eph, t, az, el, step=1.0, max_offset=1.0):
+    """ Function to find how many seconds behind (negative if ahead of) a pass ephemeris the
+    rotor is, from its azimuth and elevation (mount degrees, flipped or not) read back at
+    unix time t. Returns None if the satellite is barely moving, the ephemeris doesn't cover
+    t, or the rotor is more than max_offset degrees off the satellite's track. """
+    if not (eph.covers(t) and eph.covers(t - step)):
+        return None
+    now, before = direction(*eph.azel(t)), direction(*eph.azel(t - step))
+    velocity = (now - before)/step # Radians per second across the sky
+    speed = np.dot(velocity, velocity)
+    if speed < np.radians(0.01)**2:
+        return None
+    offset = now - direction(az, el)
+    lag = float(np.dot(offset, velocity)/speed)
+    if np.degrees(np.linalg.norm(offset - lag*velocity)) > max_offset:
+        return None
+    return lag
+
+class LatencyEstimator:
+    """ LatencyEstimator is a class for estimating the motor command latency from readbacks. """
+    def __init__(self, window=15, initial=0.0, limits=(0.0, 5.0)):
+        """ Initialization function. The estimate is the median of the last window delays,
+        kept within limits (seconds), and initial until there are any. """
+        self.window, self.limits = window, limits
+        self.delays = [] # Most recent last
+        self.latency = float(initial)
+
+    def add(self, lag, lead):
+        """ Function to add a readback showing the rotor lag seconds behind the satellite
+        while commands were aimed lead seconds ahead. Returns the new estimate. """
+        self.delays = self.delays[-(self.window-1):] + [lag + lead]
+        self.latency = float(np.clip(np.median(self.delays), *self.limits))
+        return self.latency
+
+def command_lead(latency, transport, following):
+    """ Function to find how many seconds after a tick to aim the tracking loop's command:
+    the transport delay (seconds from posting to the serial write finishing) when following
+    a rotor trajectory, else the command latency (seconds). """
+    return transport if following else latency
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Doppler Profile
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file makes the Doppler offset of a carrier over a pass as evenly spaced samples, so a
+# receiver can retune from a table instead of running the propagator. The samples come from
+# one cpredict observe_many call. A profile can be saved as a small binary file (a 40 byte
+# header followed by float32 offsets in Hz) and loaded again memory mapped. The offset at any
+# time is found from the two samples around it, by index, without searching.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+
+##############################################################################################
+HEADER = np.dtype([('magic', 'S8'), ('start', '<f8'), ('step', '<f8'), ('carrier', '<f8'),
+                   ('count', '<u4'), ('reserved', '<u4')]) # 40 bytes
+MAGIC = b'ARGUSDOP'
+
+class DopplerProfile:
+    """ DopplerProfile is a class for looking up the Doppler offset of a carrier over time. """
+    def __init__(self, start, step, carrier, offsets):
+        """ Initialization function. offsets (Hz) are sampled every step seconds from start. """
+        if len(offsets) < 2:
+            raise ValueError("a profile needs at least 2 samples")
+        self.start, self.step, self.carrier = float(start), float(step), float(carrier)
+        self.offsets = offsets
+        self.end = self.start + self.step*(len(offsets)-1)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def times(self):
+        """ Function to return the sample times. """
+        return self.start + self.step*np.arange(len(self.offsets))
+
+    def at(self, t):
+        """ Function to return the Doppler offset (Hz) at time(s) t, interpolating linearly
+        between samples. """
+        if np.ndim(t) == 0:
+            if t < self.start or t > self.end:
+                raise ValueError("time outside profile [%f, %f]" % (self.start, self.end))
+            x = (t - self.start)/self.step
+            k = min(int(x), len(self.offsets)-2)
+            a, b = float(self.offsets[k]), float(self.offsets[k+1])
+            return a + (b - a)*(x - k)
+        t = np.asarray(t, dtype=float)
+        if np.any(t < self.start) or np.any(t > self.end):
+            raise ValueError("time outside profile [%f, %f]" % (self.start, self.end))
+        x = (t - self.start)/self.step
+        k = np.minimum(x.astype(int), len(self.offsets)-2)
+        a, b = self.offsets[k], self.offsets[k+1]
+        return a + (b - a)*(x - k)
+
+    def frequency(self, t):
+        """ Function to return the frequency (Hz) to tune to at time(s) t. """
+        return self.carrier + self.at(t)
+
+    def save(self, path):
+        """ Function to write the profile to a binary file. """
+        header = np.array([(MAGIC, self.start, self.step, self.carrier, len(self.offsets), 0)],
+                          dtype=HEADER)
+        with open(path, 'wb') as myfile:
+            myfile.write(header.tobytes())
+            myfile.write(np.asarray(self.offsets, dtype='<f4').tobytes())
+
+def load_profile(path):
+    """ Function to load a profile written by DopplerProfile.save, memory mapping the offsets. """
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) != 1 or header['magic'][0] != MAGIC:
+        raise ValueError("%s is not a Doppler profile" % path)
+    header = header[0]
+    offsets = np.memmap(path, dtype='<f4', mode='r', offset=HEADER.itemsize,
+                        shape=(int(header['count']),))
+    return DopplerProfile(header['start'], header['step'], header['carrier'], offsets)
+
+def doppler_profile(predictor, start, end, carrier, rate=1.0):
+    """ Function to make the Doppler profile of a carrier (Hz) between unix times start and
+    end (e.g. the aos and los of Predictor.next_pass) with rate samples a second. """
+    step = 1.0/rate
+    count = max(int(np.ceil((end - start)/step - 1e-9)) + 1, 2) # Last sample at or after end
+    data = predictor.observe_many(start + step*np.arange(count))
+    # observe gives the Doppler shift of 100 MHz, which scales with frequency
+    offsets = (data['doppler']*(carrier/100.0e6)).astype(np.float32)
+    return DopplerProfile(start, step, carrier, offsets)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Eclipse Timeline
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file finds when a satellite is in the Earth's shadow during each pass of a pass table,
+# so downlinks can be planned around the satellite's power. The eclipses of each satellite
+# over the whole table come from one cpredict Predictor.eclipses call, which finds the enter
+# and exit times by root finding on the eclipse depth, and are matched to the passes with
+# array searches.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+
+##############################################################################################
+PASS_ECLIPSE_DTYPE = np.dtype([('eclipse_start', 'f8'), ('eclipse_end', 'f8'), ('eclipsed', 'f8'),
+                               ('sunlit_fraction', 'f8')])
+
+def eclipsed_before(eclipses, times):
+    """ Function to find the total seconds of eclipse (from Predictor.eclipses) before each
+    unix time in times. """
+    times = np.asarray(times, dtype=float)
+    if len(eclipses) == 0:
+        return np.zeros(times.shape)
+    before = np.concatenate(([0.0], np.cumsum(eclipses['duration'])))
+    k = np.searchsorted(eclipses['start'], times, side='right') - 1 # Last eclipse starting by each time
+    last = np.maximum(k, 0)
+    partial = np.clip(times - eclipses['start'][last], 0, eclipses['duration'][last])
+    return np.where(k >= 0, before[last] + partial, 0.0)
+
+def pass_eclipses(predictors, table):
+    """ Function to find the eclipses during each pass of a pass table (from cpredict.passes,
+    or passScheduler.schedule). predictors is one Predictor, or a list indexed by the table's
+    satellite column. Returns a record array with, for each pass, the start and end of the
+    first eclipse during it (cut to the pass, NaN if it is sunlit throughout), the seconds
+    eclipsed and the fraction of the pass in sunlight. """
+    result = np.zeros(len(table), dtype=PASS_ECLIPSE_DTYPE)
+    result['eclipse_start'] = result['eclipse_end'] = np.nan
+    result['sunlit_fraction'] = 1.0
+    many = isinstance(predictors, (list, tuple))
+    satellites = table['satellite'] if many else np.zeros(len(table), dtype=int)
+    for sat in np.unique(satellites).tolist():
+        predictor = predictors[sat] if many else predictors
+        index = np.flatnonzero(satellites == sat)
+        start, end = table['start'][index], table['end'][index]
+        eclipses = predictor.eclipses(start.min(), end.max())
+        if len(eclipses) == 0:
+            continue
+        eclipsed = eclipsed_before(eclipses, end) - eclipsed_before(eclipses, start)
+        result['eclipsed'][index] = eclipsed
+        duration = end - start
+        result['sunlit_fraction'][index] = np.where(duration > 0, 1 - eclipsed/np.maximum(duration, 1e-9), 1.0)
+        # First eclipse ending after the pass starts, if it starts before the pass ends
+        k = np.minimum(np.searchsorted(eclipses['end'], start, side='right'), len(eclipses)-1)
+        during = (eclipses['end'][k] > start) & (eclipses['start'][k] < end)
+        result['eclipse_start'][index[during]] = np.maximum(eclipses['start'][k], start)[during]
+        result['eclipse_end'][index[during]] = np.minimum(eclipses['end'][k], end)[during]
+    return result
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Motor Worker
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file sends set commands to the motor controller from one long lived thread. The
+# tracking loop posts setpoints to a mailbox holding only the latest one: a setpoint posted
+# while the previous one is still waiting replaces it, since the rotor should go where the
+# satellite is now and not everywhere it has been. Over the 600 baud link a backlog of
+# commands would otherwise build up behind the slow writes, and one thread per command could
+# write to the serial port at the same time.
+
+# The worker counts posted, sent, dropped and failed setpoints and how long each command took,
+# in the same histogram bins as the tracking scheduler. The delay from posting a setpoint to
+# its write finishing is how far ahead the tracking loop leads trajectory commands.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+import threading, time
+from trackScheduler import HISTOGRAM_EDGES
+
+##############################################################################################
+class MotorWorker:
+    """ MotorWorker is a class for sending the latest motor setpoint from a single thread. """
+    def __init__(self, send, clock=time.monotonic):
+        """ Initialization function. send(az, el) writes one set command. """
+        self.send, self.clock = send, clock
+        self.condition = threading.Condition()
+        self.pending = None # Latest setpoint not yet sent, (az, el, time posted)
+        self.busy = False # A command is being written
+        self.running = True
+        self.posted, self.sent, self.dropped, self.failed = 0, 0, 0, 0
+        self.latency = np.zeros(len(HISTOGRAM_EDGES), dtype=int) # Seconds per command, last bin is >= 1 s
+        self.worst = 0.0 # Longest command in seconds
+        self.age = 0.0 # Seconds the last sent setpoint waited in the mailbox
+        self.delay = 0.0 # Seconds from posting the last sent setpoint to its write finishing
+        self.thread = threading.Thread(target=self.run, name="MotorWorker", daemon=True)
+        self.thread.start()
+
+    def post(self, az, el):
+        """ Function to ask for the rotor to be set to az, el, replacing any setpoint still
+        waiting to be sent. """
+        with self.condition:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = (az, el, self.clock())
+            self.posted += 1
+            self.condition.notify_all()
+
+    def depth(self):
+        """ Function to return the number of setpoints waiting to be sent (0 or 1). """
+        return int(self.pending is not None)
+
+    def run(self):
+        """ Function to send setpoints as they are posted until close is called. """
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                az, el, posted = self.pending
+                self.pending, self.busy = None, True
+            start = self.clock()
+            try:
+                self.send(az, el)
+                ok = True
+            except Exception as e: # Keep serving later setpoints
+                print("Motor command failed: " + str(e))
+                ok = False
+            end = self.clock()
+            with self.condition:
+                if ok:
+                    self.sent += 1
+                    self.latency[np.searchsorted(HISTOGRAM_EDGES, end - start, side='right') - 1] += 1
+                    self.worst = max(self.worst, end - start)
+                    self.age = start - posted
+                    self.delay = end - posted
+                else:
+                    self.failed += 1
+                self.busy = False
+                self.condition.notify_all()
+
+    def wait(self, timeout=None):
+        """ Function to wait until every posted setpoint has been sent or dropped. Returns
+        False if timeout seconds pass first. """
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending is None and not self.busy, timeout)
+
+    def close(self):
+        """ Function to stop the worker thread, dropping any setpoint not yet sent. """
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if threading.current_thread() is not self.thread:
+            self.thread.join()
+
+    def stats(self):
+        """ Function to return the mailbox depth, counts and command latencies as a dict. """
+        with self.condition:
+            return {'depth': self.depth(), 'posted': self.posted, 'sent': self.sent,
+                    'dropped': self.dropped, 'failed': self.failed, 'worst': self.worst,
+                    'age': self.age, 'delay': self.delay, 'latency': self.latency.copy()}
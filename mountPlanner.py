@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Mount Planner
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file plans how the rotor points along a whole pass. Every azimuth and elevation can be
+# reached four ways on the mount: at the azimuth or 360 degrees below it, and "flipped" with
+# the azimuth turned 180 degrees and the elevation past 90. Choosing the pointing nearest the
+# rotor one sample at a time can walk into the azimuth limit partway through a pass, or keep
+# the normal pointing through an overhead pass and swing the azimuth 180 degrees at the top.
+# Here the pointings for every sample of the pass are chosen together by dynamic programming
+# (Viterbi): the path through the candidates with the least total slew, plus a penalty for
+# each flip, that stays within the mount limits the whole way.
+
+# The result is a table of setpoints, which rotorTrajectory turns into the motor commands the
+# tracking loop sends during the pass.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+
+##############################################################################################
+MOUNT_DTYPE = np.dtype([('time', 'f8'), ('azimuth', 'f8'), ('elevation', 'f8'), ('flipped', '?')])
+FLIPPED = np.array([False, False, True, True]) # Which of the candidates are flipped
+
+def candidates(az, el):
+    """ Function to find the four mount pointings (degrees) equivalent to each azimuth and
+    elevation: the azimuth and the azimuth less 360, then both flipped. Returns azimuth and
+    elevation arrays with a last axis of 4. """
+    az = np.asarray(az, dtype=float) % 360
+    el = np.asarray(el, dtype=float)
+    flip = np.where(az > 180, az - 180, az + 180)
+    return np.stack([az, az - 360, flip, flip - 360], axis=-1), np.stack([el, el, 180 - el, 180 - el], axis=-1)
+
+def plan_mount(times, az, el, start=None, limits=(-360, 360, 5, 175), flip_cost=10.0):
+    """ Function to plan the mount pointing for a satellite at azimuth, elevation (degrees)
+    at each unix time in times. start is the rotor's (azimuth, elevation) before the first
+    sample, if the slew there should count. limits are (minAz, maxAz, minEl, maxEl); lower
+    elevations are raised to minEl as in the tracking loop. flip_cost is the slew (degrees)
+    a change between normal and flipped pointing counts as, on top of the slew itself.
+    Returns a record array of setpoints. """
+    minAz, maxAz, minEl, maxEl = limits
+    times = np.asarray(times, dtype=float)
+    if len(times) == 0:
+        return np.zeros(0, dtype=MOUNT_DTYPE)
+    azs, els = candidates(az, np.maximum(el, minEl))
+    allowed = (azs >= minAz) & (azs <= maxAz) & (els >= minEl) & (els <= maxEl)
+    flips = flip_cost*(FLIPPED[:, None] != FLIPPED[None, :]) # (from, to)
+    if start is None:
+        cost = np.zeros(4)
+    else:
+        cost = np.hypot(azs[0] - start[0], els[0] - start[1])
+    cost = np.where(allowed[0], cost, np.inf)
+    back = np.zeros((len(times), 4), dtype=int) # Best previous candidate for each candidate
+    columns = np.arange(4)
+    for k in range(1, len(times)):
+        total = cost[:, None] + np.hypot(azs[k][None, :] - azs[k-1][:, None],
+                                         els[k][None, :] - els[k-1][:, None]) + flips
+        back[k] = np.argmin(total, axis=0)
+        cost = np.where(allowed[k], total[back[k], columns], np.inf)
+    if not np.isfinite(cost).any():
+        raise ValueError("no path stays within the mount limits")
+    path = np.empty(len(times), dtype=int)
+    path[-1] = np.argmin(cost)
+    for k in range(len(times)-1, 0, -1):
+        path[k-1] = back[k][path[k]]
+    rows = np.arange(len(times))
+    table = np.zeros(len(times), dtype=MOUNT_DTYPE)
+    table['time'] = times
+    table['azimuth'], table['elevation'] = azs[rows, path], els[rows, path]
+    table['flipped'] = FLIPPED[path]
+    return table
+
+def setpoint(table, t):
+    """ Function to return the row of a setpoint table nearest unix time t, or None if t is
+    outside the table. """
+    if len(table) == 0 or t < table['time'][0] or t > table['time'][-1]:
+        return None
+    k = int(np.searchsorted(table['time'], t))
+    if k > 0 and (k == len(table) or t - table['time'][k-1] < table['time'][k] - t):
+        k -= 1
+    return table[k]
+
+def slew(table):
+    """ Function to return the total slew (degrees) along a setpoint table. """
+    return float(np.hypot(np.diff(table['azimuth']), np.diff(table['elevation'])).sum())
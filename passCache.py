@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Pass Cache
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file keeps predicted passes in an SQLite file so that restarting the GUI or reopening
+# the same TLE shows upcoming passes without searching again. Passes are stored per satellite
+# (NORAD id, TLE epoch and a digest of the TLE lines) and ground station (lat, lon, alt),
+# together with the time window that has been searched. A request outside that window only
+# searches the missing part and adds it to the cache.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+import os, sqlite3, threading, hashlib
+from cpredict import passes
+
+##############################################################################################
+PASS_COLUMNS = ('start', 'end', 'start_az', 'end_az', 'tca', 'max_el', 'duration')
+PASS_DTYPE = np.dtype([(name, 'f8') for name in PASS_COLUMNS]) # Same as cpredict.passes
+
+def default_path():
+    """ Function to find the default cache file in the user's data directory. """
+    datadir = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(datadir, 'argus', 'passes.sqlite')
+
+class PassCache:
+    """ PassCache is a class for storing and looking up predicted passes on disk. """
+    def __init__(self, path=None):
+        """ Initialization function. Uses an in-memory cache if the file can't be made. """
+        if path is None:
+            path = default_path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+        except (OSError, sqlite3.Error):
+            self.db = sqlite3.connect(':memory:', check_same_thread=False)
+        self.lock = threading.Lock() # GUI threads share the connection
+        with self.lock, self.db:
+            self.db.execute("""CREATE TABLE IF NOT EXISTS windows (
+                id INTEGER PRIMARY KEY, norad INTEGER, epoch TEXT, digest TEXT,
+                lat REAL, lon REAL, alt INTEGER, t0 REAL, t1 REAL,
+                UNIQUE (norad, epoch, digest, lat, lon, alt))""")
+            # Primary key index on (window, start) makes lookups O(log n)
+            self.db.execute("""CREATE TABLE IF NOT EXISTS passes (
+                window INTEGER, start REAL, end REAL, start_az REAL, end_az REAL,
+                tca REAL, max_el REAL, duration REAL, PRIMARY KEY (window, start))""")
+
+    def passes(self, tle, qth, t0, t1, min_el=0):
+        """ Function to return passes in progress at or starting between t0 and t1 that reach
+        min_el, as a record array like cpredict.passes. Searches only what isn't cached. """
+        key = (int(tle[1][2:7]), tle[1][18:32].strip(),
+               hashlib.sha1((tle[1].strip()+tle[2].strip()).encode()).hexdigest(),
+               float(qth[0]), float(qth[1]), int(qth[2]))
+        with self.lock, self.db:
+            row = self.db.execute("""SELECT id, t0, t1 FROM windows WHERE norad=? AND epoch=?
+                AND digest=? AND lat=? AND lon=? AND alt=?""", key).fetchone()
+            if row is None:
+                window = self.db.execute("""INSERT INTO windows (norad, epoch, digest, lat, lon,
+                    alt, t0, t1) VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", key + (t0, t1)).lastrowid
+                self.store(window, passes(tle, qth, t0, t1))
+            else:
+                window, c0, c1 = row
+                if t0 < c0: # Extend the searched window backwards
+                    self.store(window, passes(tle, qth, t0, c0))
+                if t1 > c1: # and forwards
+                    self.store(window, passes(tle, qth, c1, t1))
+                self.db.execute("UPDATE windows SET t0=?, t1=? WHERE id=?",
+                                (min(t0, c0), max(t1, c1), window))
+            # The pass in progress at t0 (passes of one satellite don't overlap) ...
+            rows = self.db.execute("""SELECT start, end, start_az, end_az, tca, max_el, duration
+                FROM passes WHERE window=? AND start<? ORDER BY start DESC LIMIT 1""",
+                (window, t0)).fetchall()
+            rows = [r for r in rows if r[1] > t0]
+            # ... and those starting in the window
+            rows += self.db.execute("""SELECT start, end, start_az, end_az, tca, max_el, duration
+                FROM passes WHERE window=? AND start>=? AND start<=? ORDER BY start""",
+                (window, t0, t1)).fetchall()
+        data = np.array(rows, dtype=PASS_DTYPE)
+        return data[data['max_el'] >= min_el]
+
+    def store(self, window, data):
+        """ Function to add passes to the cache, skipping ones it already has. """
+        # Searches from different start times find the same pass to within a millisecond
+        for p in data.tolist():
+            if self.db.execute("SELECT 1 FROM passes WHERE window=? AND start BETWEEN ? AND ?",
+                               (window, p[0]-1, p[0]+1)).fetchone() is None:
+                self.db.execute("INSERT INTO passes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (window,)+p)
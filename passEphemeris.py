@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Pass Ephemeris
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file fits piecewise Chebyshev polynomials to the azimuth, elevation, slant range and
+# range rate of a satellite over a time span (normally one pass), so the tracking loop can
+# evaluate the position with a few multiply-adds instead of an SGP4 propagation. Each segment
+# is checked against the propagator on points between the fitting points and split in half
+# until it is within tolerance, so the error bound holds on that check grid.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+from numpy.polynomial import chebyshev
+from bisect import bisect_right
+
+##############################################################################################
+COLUMNS = ('azimuth', 'elevation', 'slant_range', 'range_rate')
+
+class PassEphemeris:
+    """ PassEphemeris is a class for interpolating a satellite's position over a time span. """
+    def __init__(self, predictor, start, end, tol=(0.01, 0.01, 0.01, 1e-5), segment=60.0,
+                 degree=10, min_segment=0.5):
+        """ Initialization function. Fits segments of at most 'segment' seconds to within
+        'tol' (azimuth, elevation in degrees, range in km, range rate in km/s). Segments are
+        not split below 'min_segment' seconds; the error actually reached is in max_error. """
+        self.predictor = predictor
+        self.start, self.end = float(start), float(end)
+        self.degree = degree
+        self.tol = np.asarray(tol, dtype=float)
+        self.max_error = np.zeros(len(COLUMNS))
+        edges, coefs = [], []
+        todo = list(np.linspace(self.start, self.end,
+                                int(np.ceil((self.end-self.start)/segment))+1))
+        todo = [(a, b) for a, b in zip(todo[:-1], todo[1:])][::-1]
+        while todo: # Fit segments in time order, splitting any that miss the tolerance
+            a, b = todo.pop()
+            c, err = self.fit(a, b)
+            if np.any(err > self.tol) and b-a > 2*min_segment:
+                todo += [((a+b)/2, b), (a, (a+b)/2)]
+                continue
+            self.max_error = np.maximum(self.max_error, err)
+            edges.append(a)
+            coefs.append(c)
+        self.edges = np.array(edges + [self.end])
+        self.coefs = np.array(coefs) # (segments, columns, degree+1)
+        # Plain lists for single times, where numpy's per-call overhead would dominate
+        self.edgeList, self.coefList = self.edges.tolist(), self.coefs.tolist()
+
+    def fit(self, a, b):
+        """ Function to fit one segment, returning coefficients and the error on check points. """
+        n = 4*(self.degree+1) # Fitting points, with a check point between each pair
+        x = np.linspace(-1, 1, 2*n-1)
+        data = self.predictor.observe_many((a+b)/2 + (b-a)/2*x)
+        y = np.array([data[name] for name in COLUMNS])
+        y[0] = np.unwrap(y[0], period=360) # Fit azimuth without the jump at north
+        c = chebyshev.chebfit(x[::2], y[:, ::2].T, self.degree).T
+        err = np.abs(chebyshev.chebval(x[1::2], c.T) - y[:, 1::2]).max(axis=1)
+        return c, err
+
+    def __call__(self, t):
+        """ Function to return azimuth, elevation, slant range and range rate at time(s) t. """
+        if np.ndim(t) == 0:
+            return self.scalar(t, range(len(COLUMNS)))
+        t = np.asarray(t, dtype=float)
+        if np.any(t < self.start) or np.any(t > self.end):
+            raise ValueError("time outside ephemeris [%f, %f]" % (self.start, self.end))
+        i = np.clip(np.searchsorted(self.edges, t, side='right')-1, 0, len(self.coefs)-1)
+        a, b = self.edges[i], self.edges[i+1]
+        x = (2*t - a - b)/(b - a)
+        c = self.coefs[i] # (..., columns, degree+1)
+        # Clenshaw recurrence, vectorized over times and columns
+        x = x[..., None]
+        b1, b2 = np.zeros(c.shape[:-1]), np.zeros(c.shape[:-1])
+        for k in range(self.degree, 0, -1):
+            b1, b2 = c[..., k] + 2*x*b1 - b2, b1
+        y = c[..., 0] + x*b1 - b2
+        y[..., 0] %= 360
+        return tuple(np.moveaxis(y, -1, 0))
+
+    def scalar(self, t, columns):
+        """ Function to evaluate the given columns at a single time t. """
+        if t < self.start or t > self.end:
+            raise ValueError("time outside ephemeris [%f, %f]" % (self.start, self.end))
+        i = min(max(bisect_right(self.edgeList, t)-1, 0), len(self.coefList)-1)
+        a, b = self.edgeList[i], self.edgeList[i+1]
+        x = (2*t - a - b)/(b - a)
+        values = []
+        for j in columns:
+            c = self.coefList[i][j]
+            b1 = b2 = 0.0
+            for k in range(self.degree, 0, -1): # Clenshaw recurrence
+                b1, b2 = c[k] + 2*x*b1 - b2, b1
+            values.append(c[0] + x*b1 - b2)
+        if columns[0] == 0:
+            values[0] %= 360
+        return tuple(values)
+
+    def azel(self, t):
+        """ Function to return azimuth and elevation at time(s) t. """
+        if np.ndim(t) == 0:
+            return self.scalar(t, (0, 1))
+        az, el, _, _ = self(t)
+        return az, el
+
+    def covers(self, t):
+        """ Function to check if time t is within the ephemeris. """
+        return self.start <= t <= self.end
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Pass Scheduler
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file predicts upcoming passes of every satellite in a TLE catalog over one or more
+# ground stations and merges them into one table sorted by start time. The work is split into
+# (satellite, time window) jobs run on a process pool. Each job finds the passes over every
+# station at once with Predictor.station_passes, which propagates the satellite once a step
+# for all of them. Each worker is given the catalog and stations once and keeps its own
+# cpredict Predictor for every satellite it sees, so jobs only send indices and times to the
+# workers and passes back.
+
+# Usage: python3 passScheduler.py catalog.tle [-q ARGUS.qth ...] [-d days] [-e min_el] [-j n]
+#        [-p] [-r slew_rate] [-R] [-s [radius]]
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+import os, sys, time, argparse, multiprocessing
+from cpredict import Predictor, PredictException
+from tleCatalog import open_catalog
+from passTimeline import plan
+from solarEphemeris import SolarEphemeris
+
+##############################################################################################
+PASS_COLUMNS = ('start', 'end', 'start_az', 'end_az', 'tca', 'max_el', 'duration')
+RATE_COLUMNS = ('max_az_rate', 'max_el_rate')
+SCHEDULE_DTYPE = np.dtype([(name, 'f8') for name in PASS_COLUMNS + RATE_COLUMNS] +
+                          [('satellite', 'i4'), ('station', 'i4')])
+
+_tles, _stations, _predictors = None, None, {} # Worker state, set up by _init_worker
+
+def _init_worker(tles, stations):
+    """ Function to give a worker process the catalog and stations. """
+    global _tles, _stations, _predictors
+    _tles, _stations, _predictors = tles, stations, {}
+
+def _predictor(sat, station):
+    """ Function to get the worker's Predictor for a satellite and station. """
+    predictor = _predictors.get((sat, station))
+    if predictor is None:
+        predictor = _predictors[(sat, station)] = Predictor(_tles[sat], _stations[station])
+    return predictor
+
+def _predict(job):
+    """ Function to find the passes of one job in a worker process. """
+    sat, t0, t1, first, last, min_el, rates = job
+    try:
+        data = _predictor(sat, 0).station_passes(_stations, t0, t1, min_el)
+    except PredictException as e: # Bad TLE, never rises, geostationary or decayed
+        return sat, None, str(e).strip()
+    # A pass crossing into the next window belongs to the window it starts in
+    if not first:
+        data = data[data['start'] >= t0]
+    if not last:
+        data = data[data['start'] < t1]
+    if not rates:
+        return sat, (data, None), None
+    maxRates = np.zeros(len(data), dtype=[(name, 'f8') for name in RATE_COLUMNS])
+    for station in np.unique(data['station']).tolist():
+        rows = data['station'] == station
+        maxRates[rows] = _predictor(sat, station).max_rates(data['start'][rows], data['end'][rows])
+    return sat, (data, maxRates), None
+
+def schedule(tles, stations, t0=None, t1=None, min_el=0, processes=None, errors=None, rates=False):
+    """ Function to find every pass of every satellite over every station in progress at or
+    starting between unix times t0 (default now) and t1 (default a day later). stations are
+    (lat(N), long(W), alt(m)). Returns a record array of passes sorted by start, with the
+    index of the satellite and station of each. processes defaults to the number of cores.
+    Satellites that can't have passes are left out, and (satellite, station, message) appended
+    to errors for each station if it is a list. Stations a satellite never rises above are
+    left out without an error, unless it rises above none of them. The max_az_rate and
+    max_el_rate columns (degrees/s) are only found if rates is True, and are NaN otherwise. """
+    if t0 is None:
+        t0 = time.time()
+    if t1 is None:
+        t1 = t0 + 86400
+    if processes is None:
+        processes = os.cpu_count() or 1
+    # Split the time span too when there are too few satellites to keep every worker busy
+    chunks = max(1, min(int(np.ceil(4*processes/max(len(tles), 1))), int((t1-t0)//3600) or 1))
+    edges = np.linspace(t0, t1, chunks+1).tolist()
+    jobs = [(sat, edges[k], edges[k+1], k == 0, k == chunks-1, min_el, rates)
+            for sat in range(len(tles)) for k in range(chunks)]
+    if len(stations) == 0:
+        jobs = []
+    if processes == 1 or len(jobs) == 1:
+        _init_worker(tles, stations)
+        results = list(map(_predict, jobs))
+    else:
+        with multiprocessing.Pool(processes, _init_worker, (tles, stations)) as pool:
+            results = list(pool.imap_unordered(_predict, jobs,
+                                               chunksize=max(1, len(jobs)//(8*processes))))
+    if errors is not None:
+        errors += sorted(set((sat, station, e) for sat, _, e in results if e
+                             for station in range(len(stations))))
+    results = [(sat, data) for sat, data, e in results if data is not None]
+    table = np.zeros(sum(len(data) for _, (data, _) in results), dtype=SCHEDULE_DTYPE)
+    for name in RATE_COLUMNS:
+        table[name] = np.nan
+    k = 0
+    for sat, (data, maxRates) in results:
+        for name in PASS_COLUMNS + ('station',):
+            table[name][k:k+len(data)] = data[name]
+        for name in RATE_COLUMNS if maxRates is not None else ():
+            table[name][k:k+len(data)] = maxRates[name]
+        table['satellite'][k:k+len(data)] = sat
+        k += len(data)
+    return table[np.argsort(table['start'], kind='stable')]
+
+def load_station(qthfile):
+    """ Function to load the name and (lat(N), long(W), alt(m)) of a station from a qth file
+    holding name, latitude, longitude (east) and altitude lines. """
+    with open(qthfile, 'r') as myfile:
+        qth = [line.strip() for line in myfile]
+    return qth[0], (float(qth[1]), -float(qth[2]), int(qth[3]))
+
+def sun_outages(tles, stations, table, radius=5.0):
+    """ Function to find the seconds the Sun is within radius degrees of the satellite during
+    each pass of a schedule. """
+    seconds = np.zeros(len(table))
+    for station in np.unique(table['station']).tolist():
+        rows = np.flatnonzero(table['station'] == station)
+        satellites = set(table['satellite'][rows].tolist())
+        predictors = [Predictor(tle, stations[station]) if sat in satellites else None
+                      for sat, tle in enumerate(tles)]
+        outages = SolarEphemeris(*stations[station]).outages(predictors, table[rows], radius)
+        np.add.at(seconds, rows[outages['pass']], outages['end'] - outages['start'])
+    return seconds
+
+def rate_columns(row, slew_rate):
+    """ Function to format the fastest az/el rates of a pass, marking it with * if the rotor
+    can't keep up. """
+    fast = max(row['max_az_rate'], row['max_el_rate']) > slew_rate
+    return "  %6.2f  %6.2f%s" % (row['max_az_rate'], row['max_el_rate'], " *" if fast else "")
+
+def main(argv=None):
+    """ Function to print the schedule for a catalog from the command line. """
+    parser = argparse.ArgumentParser(
+        description="Predict passes of a TLE catalog over ground stations.")
+    parser.add_argument('catalog', help="TLE file with one or more 3 line TLEs")
+    parser.add_argument('-q', '--qth', action='append',
+                        help="station qth file (repeatable, default ARGUS.qth)")
+    parser.add_argument('-d', '--days', type=float, default=1.0, help="days to predict (default 1)")
+    parser.add_argument('-e', '--min-el', type=float, default=0.0,
+                        help="minimum peak elevation in degrees")
+    parser.add_argument('-j', '--processes', type=int, default=None,
+                        help="worker processes (default all cores)")
+    parser.add_argument('-p', '--plan', action='store_true',
+                        help="only list the passes each station's rotor should track")
+    parser.add_argument('-r', '--slew-rate', type=float, default=3.0,
+                        help="rotor slew rate in degrees/s")
+    parser.add_argument('-R', '--rates', action='store_true',
+                        help="list the fastest az/el rate of each pass, marking passes faster "
+                        "than --slew-rate with *")
+    parser.add_argument('-s', '--sun', type=float, nargs='?', const=5.0, default=None,
+                        metavar='RADIUS', help="list the seconds of each pass the Sun is within "
+                        "RADIUS degrees (default 5) of the satellite")
+    args = parser.parse_args(argv)
+    catalog = open_catalog(args.catalog)
+    for entry in catalog.bad.tolist():
+        print("Skipping %s: bad checksum" % catalog.lines(entry)[0], file=sys.stderr)
+    tles = catalog.tles()
+    names, stations = zip(*[load_station(f) for f in (args.qth or ['ARGUS.qth'])])
+    t0, errors = time.time(), []
+    table = schedule(tles, stations, t0, t0 + args.days*86400, args.min_el, args.processes, errors,
+                     args.rates)
+    for sat, station, message in errors:
+        print("Skipping %s over %s: %s" % (tles[sat][0], names[station], message), file=sys.stderr)
+    if args.plan: # One rotor per station
+        keep = [np.flatnonzero(table['station'] == k) for k in range(len(stations))]
+        keep = [rows[plan(table[rows], az_rate=args.slew_rate, el_rate=args.slew_rate)[0]]
+                for rows in keep]
+        table = table[np.sort(np.concatenate(keep))]
+    if args.sun is not None:
+        sun = sun_outages(tles, stations, table, args.sun)
+    print("%-24s  %-8s  %-24s  %-12s  %6s  %6s  %6s" %
+          ("Start (UTC)", "Duration", "Satellite", "Station", "Max El", "AOS Az", "LOS Az") +
+          ("  %6s  %6s" % ("Az/s", "El/s") if args.rates else "") +
+          ("  %6s" % "Sun s" if args.sun is not None else ""))
+    for k, row in enumerate(table):
+        print("%-24s  %8s  %-24s  %-12s  %6.1f  %6.1f  %6.1f" %
+              (time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(row['start'])),
+               time.strftime('%H:%M:%S', time.gmtime(row['duration'])),
+               tles[row['satellite']][0][:24], names[row['station']][:12],
+               row['max_el'], row['start_az'], row['end_az']) +
+              (rate_columns(row, args.slew_rate) if args.rates else "") +
+              (("  %6.0f" % sun[k] if sun[k] else "  %6s" % "-") if args.sun is not None else ""))
+
+if __name__ == "__main__":
+    main()
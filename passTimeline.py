@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Pass Timeline
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file chooses which passes one rotor should track when passes of different satellites
+# overlap. Each pass has a weight (by default its duration, times the sine of its maximum
+# elevation, times the satellite's priority) and the rotor needs time to slew from the LOS
+# azimuth of one pass to the AOS azimuth of the next. The chosen passes are the set with the
+# largest total weight in which the rotor can reach every pass by its AOS, found with
+# weighted interval scheduling.
+
+# Passes ending long enough before a pass (the slowest possible slew) can always lead into it,
+# so the best of those is a running maximum; only the few ending within one slowest slew are
+# checked one by one. This keeps the search at O(n log n) for weeks of passes.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+from bisect import bisect_right
+
+##############################################################################################
+def slew_time(az0, el0, az1, el1, az_rate=3.0, el_rate=3.0, settle=5.0):
+    """ Function to find the seconds the rotor needs to move between two pointings, with both
+    axes moving at once at the given rates (degrees/s). The rotor does not wrap past north. """
+    return max(abs(az1 - az0)/az_rate, abs(el1 - el0)/el_rate) + settle
+
+def plan(table, weights=None, priority=None, az_rate=3.0, el_rate=3.0, settle=5.0,
+         elevation=1.0):
+    """ Function to choose the passes in a pass table (as from cpredict.passes or
+    passScheduler.schedule) for one rotor to track. weights default to the duration of each
+    pass times sin(max_el)**elevation, so a short overhead pass, with a stronger signal, can
+    outrank a long grazing one (elevation=0 weighs by duration alone). They are multiplied by
+    priority[satellite] if priority is given. Returns the indices of the chosen passes in
+    time order and their total weight. """
+    n = len(table)
+    if weights is None:
+        weights = np.array(table['duration'], dtype=float) * \
+            np.sin(np.radians(np.clip(table['max_el'], 0, 90)))**elevation
+        if priority is not None:
+            weights = weights * np.asarray(priority, dtype=float)[table['satellite']]
+    weights = np.asarray(weights, dtype=float).tolist()
+    start, end = table['start'].tolist(), table['end'].tolist()
+    start_az, end_az = table['start_az'].tolist(), table['end_az'].tolist()
+    longest = slew_time(0, 0, 360, 0, az_rate, el_rate, settle) # Passes start and end at el 0
+    byStart = np.argsort(table['start'], kind='stable').tolist()
+    byEnd = np.argsort(table['end'], kind='stable').tolist()
+    ends = [end[i] for i in byEnd]
+    best, prev = [0.0]*n, [-1]*n # Best total of a timeline ending with each pass, and its previous pass
+    done, doneBest, doneArg = 0, 0.0, -1 # Passes far enough back to lead into any later pass
+    for j in byStart:
+        while done < n and ends[done] <= start[j] - longest:
+            i = byEnd[done]
+            if best[i] > doneBest:
+                doneBest, doneArg = best[i], i
+            done += 1
+        total, arg = doneBest, doneArg
+        for k in range(done, bisect_right(ends, start[j])): # Ending within one slowest slew
+            i = byEnd[k]
+            if best[i] > total and \
+                    end[i] + slew_time(end_az[i], 0, start_az[j], 0, az_rate, el_rate, settle) <= start[j]:
+                total, arg = best[i], i
+        if weights[j] <= 0:
+            continue # Never worth tracking, and best[j] = 0 keeps it out of every timeline
+        best[j], prev[j] = total + weights[j], arg
+    if n == 0 or max(best) <= 0:
+        return np.zeros(0, dtype=int), 0.0
+    j = int(np.argmax(best))
+    chosen = []
+    while j >= 0:
+        chosen.append(j)
+        j = prev[j]
+    return np.array(chosen[::-1], dtype=int), float(max(best))
@@ -23,10 +23,13 @@
 #include <Python.h>
 #include <stdio.h>
 #include <math.h>
+#include <float.h>
 #include <time.h>
 #include <sys/time.h>
 #include <stdlib.h>
 #include <string.h>
+#include <stdint.h>
+#include <limits.h>
 #include <ctype.h>
 #include <unistd.h>
 #include <fcntl.h>
@@ -130,6 +133,13 @@ struct tm debug_frozen_tm = { tm_year: 114, tm_mon: 10, tm_mday: 2 };
 // This struct represents an observation of a particular satellite
 // from a particular reference point (on earth) at a particular time
 // and is used primarily in the PyPredict code.
+/* Optional parts of an observation, see MakeObservation() */
+#define OBS_SUNLIGHT  0x01  /* eclipse_depth, sunlit, visibility */
+#define OBS_STATUS    0x02  /* has_aos, geostationary, decayed */
+#define OBS_FOOTPRINT 0x04  /* footprint */
+#define OBS_RATES     0x08  /* azimuth_rate, elevation_rate */
+#define OBS_ALL       0x0F
+
 typedef struct observation {
 	double epoch;
 	char orbital_model[5];
@@ -152,9 +162,11 @@ typedef struct observation {
 	char has_aos;
 	char decayed;
 	double doppler;
+	double azimuth_rate;
+	double elevation_rate;
 } observation;
 
-struct	{
+typedef struct	{
 	   char line1[70];       // First line of TLE
 	   char line2[70];       // Second line of TLE
 	   char name[25];        // Spacecraft Name
@@ -173,48 +185,16 @@ struct	{
 	   double nddot6;        // Nddot/6
   	   double bstar;         // Bstar Drag Term
 	   long orbitnum;        // Orbit Number
-	}  sat;
+	}  sat_t;
 
-struct	{
+typedef struct	{
        char callsign[17];    // Observation Position Call Sign
 	   double stnlat;        // Observation Position Latitude
 	   double stnlong;       // Observation Position Longitude
 	   int stnalt;           // Observation Position Altitude
-	}  qth;
-
-// TODO: sat_db doesn't seem to be used much.  Verify it functions and annotate.
-struct	{  char name[25];
-	   long catnum;
-	   char squintflag;
-	   double alat;
-	   double alon;
-	   unsigned char transponders;
-	   char transponder_name[10][80];
-	   double uplink_start[10];
-	   double uplink_end[10];
-	   double downlink_start[10];
-	   double downlink_end[10];
-	   unsigned char dayofweek[10];
-	   int phase_start[10];
-	   int phase_end[10];
-	}  sat_db;
-
-/* Global variables for sharing data among functions... */
-
-double	tsince, jul_epoch, jul_utc, eclipse_depth=0,
-	sat_azi, sat_ele, sat_range, sat_range_rate,
-	sat_lat, sat_lon, sat_alt, sat_vel, phase,
-	sun_azi, sun_ele, daynum, fm, fk, age, aostime,
-	lostime, ax, ay, az, rx, ry, rz, squint, alat, alon,
-	sun_ra, sun_dec, sun_lat, sun_lon, sun_range, sun_range_rate,
-	moon_az, moon_el, moon_dx, moon_ra, moon_dec, moon_gha, moon_dv;
-
-char	qthfile[50], tlefile[50], dbfile[50], temp[80], output[25],
-	ephem[5], sat_sun_status, findsun, calc_squint;
-
-int	indx, iaz, iel, ma256, isplat, isplong, Flags=0;
-
-long	rv, irk;
+	}  qth_t;
+
+/* Translation table for computing TLE checksums (filled in at module init) */
 
 unsigned char val[256];
 
@@ -256,34 +236,91 @@ typedef struct	{
 		   double  ds50;
 		}  deep_arg_t;
 
-/* Global structure used by SGP4/SDP4 code. */
+/* Values computed once per element set by the initialization
+   sections of SGP4(), SDP4() and Deep() and reused on every call. */
 
-geodetic_t obs_geodetic;
+typedef struct	{
+		   double  aodp, aycof, c1, c4, c5, cosio, d2, d3, d4, delmo,
+			   omgcof, eta, omgdot, sinio, xnodp, sinmo, t2cof, t3cof,
+			   t4cof, t5cof, x1mth2, x3thm1, x7thm1, xmcof, xmdot,
+			   xnodcf, xnodot, xlcof;
+		}  sgp4_t;
+
+typedef struct	{
+		   double  x3thm1, c1, x1mth2, c4, xnodcf, t2cof, xlcof,
+			   aycof, x7thm1;
+		   deep_arg_t deep_arg;
+		}  sdp4_t;
 
-/* Two-line Orbital Elements for the satellite used by SGP4/SDP4 code. */
+typedef struct	{
+		   double  thgr, xnq, xqncl, omegaq, zmol, zmos, savtsn, ee2, e3,
+			   xi2, xl2, xl3, xl4, xgh2, xgh3, xgh4, xh2, xh3, sse, ssi,
+			   ssg, xi3, se2, si2, sl2, sgh2, sh2, se3, si3, sl3, sgh3,
+			   sh3, sl4, sgh4, ssl, ssh, d3210, d3222, d4410, d4422,
+			   d5220, d5232, d5421, d5433, del1, del2, del3, fasx2,
+			   fasx4, fasx6, xlamo, xfact, xni, atime, stepp, stepn,
+			   step2, preep, pl, sghs, xli, d2201, d2211, sghl, sh1,
+			   pinc, pe, shs, zsingl, zcosgl, zsinhl, zcoshl, zsinil,
+			   zcosil;
+		}  deep_t;
+
+/* Everything needed to predict one satellite from one ground station.
+   PREDICT kept all of this in file-level globals and in static locals
+   of SGP4(), SDP4() and Deep(), so only one prediction could be in
+   flight per process.  Each predictor now carries its own copy, which
+   lets independent predictors run on separate threads with the GIL
+   released. */
 
-tle_t tle;
+typedef struct	{
+		   sat_t sat;
+		   qth_t qth;
+		   tle_t tle;
+		   geodetic_t obs_geodetic;
+		   int flags;
+
+		   /* SGP4/SDP4 state */
+		   sgp4_t sgp4;
+		   sdp4_t sdp4;
+		   deep_t deep;
+		   double phase;
+
+		   /* Results of the last Calc() */
+		   double daynum, tsince, jul_epoch, jul_utc, age, eclipse_depth,
+			   sat_azi, sat_ele, sat_range, sat_range_rate, sat_lat,
+			   sat_lon, sat_alt, sat_vel, sun_azi, sun_ele, fk,
+			   aostime, lostime;
+		   char ephem[5], sat_sun_status;
+		   long rv;
+		   int iel;
+		   vector_t sat_pos, sat_velocity;  /* ECI, km and km/s */
+		   double sat_azi_rate, sat_ele_rate;  /* Results of the last CalcRates() */
+
+		   /* Results of the last FindSun() and FindMoon() */
+		   double sun_ra, sun_dec, sun_lat, sun_lon, sun_range,
+			   sun_range_rate, moon_az, moon_el, moon_dx, moon_ra,
+			   moon_dec, moon_gha, moon_dv;
+		}  predict_t;
 
 /* Functions for testing and setting/clearing flags used in SGP4/SDP4 code */
 
-int isFlagSet(int flag)
+int isFlagSet(predict_t *p, int flag)
 {
-	return (Flags&flag);
+	return (p->flags&flag);
 }
 
-int isFlagClear(int flag)
+int isFlagClear(predict_t *p, int flag)
 {
-	return (~Flags&flag);
+	return (~p->flags&flag);
 }
 
-void SetFlag(int flag)
+void SetFlag(predict_t *p, int flag)
 {
-	Flags|=flag;
+	p->flags|=flag;
 }
 
-void ClearFlag(int flag)
+void ClearFlag(predict_t *p, int flag)
 {
-	Flags&=~flag;
+	p->flags&=~flag;
 }
 
 /* Remaining SGP4/SDP4 code follows... */
@@ -772,7 +809,7 @@ int Sat_Eclipsed(vector_t *pos, vector_t *sol, double *depth)
 	}
 }
 
-void select_ephemeris(tle_t *tle)
+void select_ephemeris(predict_t *p, tle_t *tle)
 {
 	/* Selects the apropriate ephemeris type to be used */
 	/* for predictions according to the data in the TLE */
@@ -808,15 +845,15 @@ void select_ephemeris(tle_t *tle)
 
 	if (twopi/xnodp/xmnpda>=0.15625)
 	{
-		SetFlag(DEEP_SPACE_EPHEM_FLAG);
+		SetFlag(p, DEEP_SPACE_EPHEM_FLAG);
 	}
 	else
 	{
-		ClearFlag(DEEP_SPACE_EPHEM_FLAG);
+		ClearFlag(p, DEEP_SPACE_EPHEM_FLAG);
 	}
 }
 
-void SGP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
+void SGP4(predict_t *p, double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 {
 	/* This function is used to calculate the position and velocity */
 	/* of near-earth (period < 225 minutes) satellites. tsince is   */
@@ -825,9 +862,7 @@ void SGP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 	/* are vector_t structures returning ECI satellite position and */ 
 	/* velocity. Use Convert_Sat_State() to convert to km and km/s. */
 
-	static double aodp, aycof, c1, c4, c5, cosio, d2, d3, d4, delmo,
-	omgcof, eta, omgdot, sinio, xnodp, sinmo, t2cof, t3cof, t4cof,
-	t5cof, x1mth2, x3thm1, x7thm1, xmcof, xmdot, xnodcf, xnodot, xlcof;
+	sgp4_t *st=&p->sgp4;
 
 	double cosuk, sinuk, rfdotk, vx, vy, vz, ux, uy, uz, xmy, xmx, cosnok,
 	sinnok, cosik, sinik, rdotk, xinck, xnodek, uk, rk, cos2u, sin2u,
@@ -843,25 +878,25 @@ void SGP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 
 	/* Initialization */
 
-	if (isFlagClear(SGP4_INITIALIZED_FLAG))
+	if (isFlagClear(p, SGP4_INITIALIZED_FLAG))
 	{
-		SetFlag(SGP4_INITIALIZED_FLAG);
+		SetFlag(p, SGP4_INITIALIZED_FLAG);
 
 		/* Recover original mean motion (xnodp) and   */
 		/* semimajor axis (aodp) from input elements. */
 
 		a1=pow(xke/tle->xno,tothrd);
-		cosio=cos(tle->xincl);
-		theta2=cosio*cosio;
-		x3thm1=3*theta2-1.0;
+		st->cosio=cos(tle->xincl);
+		theta2=st->cosio*st->cosio;
+		st->x3thm1=3*theta2-1.0;
 		eosq=tle->eo*tle->eo;
 		betao2=1.0-eosq;
 		betao=sqrt(betao2);
-		del1=1.5*ck2*x3thm1/(a1*a1*betao*betao2);
+		del1=1.5*ck2*st->x3thm1/(a1*a1*betao*betao2);
 		ao=a1*(1.0-del1*(0.5*tothrd+del1*(1.0+134.0/81.0*del1)));
-		delo=1.5*ck2*x3thm1/(ao*ao*betao*betao2);
-		xnodp=tle->xno/(1.0+delo);
-		aodp=ao/(1.0-delo);
+		delo=1.5*ck2*st->x3thm1/(ao*ao*betao*betao2);
+		st->xnodp=tle->xno/(1.0+delo);
+		st->aodp=ao/(1.0-delo);
 
 		/* For perigee less than 220 kilometers, the "simple"     */
 		/* flag is set and the equations are truncated to linear  */
@@ -869,14 +904,14 @@ void SGP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 		/* anomaly.  Also, the c3 term, the delta omega term, and */
 		/* the delta m term are dropped.                          */
 
-		if ((aodp*(1-tle->eo)/ae)<(220/xkmper+ae))
+		if ((st->aodp*(1-tle->eo)/ae)<(220/xkmper+ae))
 		{
-		    SetFlag(SIMPLE_FLAG);
+		    SetFlag(p, SIMPLE_FLAG);
 		}
 
 		else
 		{
-		    ClearFlag(SIMPLE_FLAG);
+		    ClearFlag(p, SIMPLE_FLAG);
 		}
 
 		/* For perigees below 156 km, the      */
@@ -884,7 +919,7 @@ void SGP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 
 		s4=s;
 		qoms24=qoms2t;
-		perigee=(aodp*(1-tle->eo)-ae)*xkmper;
+		perigee=(st->aodp*(1-tle->eo)-ae)*xkmper;
 
 		if (perigee<156.0)
 		{
@@ -901,93 +936,93 @@ void SGP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 			s4=s4/xkmper+ae;
 		}
 
-		pinvsq=1/(aodp*aodp*betao2*betao2);
-		tsi=1/(aodp-s4);
-		eta=aodp*tle->eo*tsi;
-		etasq=eta*eta;
-		eeta=tle->eo*eta;
+		pinvsq=1/(st->aodp*st->aodp*betao2*betao2);
+		tsi=1/(st->aodp-s4);
+		st->eta=st->aodp*tle->eo*tsi;
+		etasq=st->eta*st->eta;
+		eeta=tle->eo*st->eta;
 		psisq=fabs(1-etasq);
 		coef=qoms24*pow(tsi,4);
 		coef1=coef/pow(psisq,3.5);
-		c2=coef1*xnodp*(aodp*(1+1.5*etasq+eeta*(4+etasq))+0.75*ck2*tsi/psisq*x3thm1*(8+3*etasq*(8+etasq)));
-		c1=tle->bstar*c2;
-		sinio=sin(tle->xincl);
+		c2=coef1*st->xnodp*(st->aodp*(1+1.5*etasq+eeta*(4+etasq))+0.75*ck2*tsi/psisq*st->x3thm1*(8+3*etasq*(8+etasq)));
+		st->c1=tle->bstar*c2;
+		st->sinio=sin(tle->xincl);
 		a3ovk2=-xj3/ck2*pow(ae,3);
-		c3=coef*tsi*a3ovk2*xnodp*ae*sinio/tle->eo;
-		x1mth2=1-theta2;
+		c3=coef*tsi*a3ovk2*st->xnodp*ae*st->sinio/tle->eo;
+		st->x1mth2=1-theta2;
 
-		c4=2*xnodp*coef1*aodp*betao2*(eta*(2+0.5*etasq)+tle->eo*(0.5+2*etasq)-2*ck2*tsi/(aodp*psisq)*(-3*x3thm1*(1-2*eeta+etasq*(1.5-0.5*eeta))+0.75*x1mth2*(2*etasq-eeta*(1+etasq))*cos(2*tle->omegao)));
-		c5=2*coef1*aodp*betao2*(1+2.75*(etasq+eeta)+eeta*etasq);
+		st->c4=2*st->xnodp*coef1*st->aodp*betao2*(st->eta*(2+0.5*etasq)+tle->eo*(0.5+2*etasq)-2*ck2*tsi/(st->aodp*psisq)*(-3*st->x3thm1*(1-2*eeta+etasq*(1.5-0.5*eeta))+0.75*st->x1mth2*(2*etasq-eeta*(1+etasq))*cos(2*tle->omegao)));
+		st->c5=2*coef1*st->aodp*betao2*(1+2.75*(etasq+eeta)+eeta*etasq);
 
 		theta4=theta2*theta2;
-		temp1=3*ck2*pinvsq*xnodp;
+		temp1=3*ck2*pinvsq*st->xnodp;
 		temp2=temp1*ck2*pinvsq;
-		temp3=1.25*ck4*pinvsq*pinvsq*xnodp;
-		xmdot=xnodp+0.5*temp1*betao*x3thm1+0.0625*temp2*betao*(13-78*theta2+137*theta4);
+		temp3=1.25*ck4*pinvsq*pinvsq*st->xnodp;
+		st->xmdot=st->xnodp+0.5*temp1*betao*st->x3thm1+0.0625*temp2*betao*(13-78*theta2+137*theta4);
 		x1m5th=1-5*theta2;
-		omgdot=-0.5*temp1*x1m5th+0.0625*temp2*(7-114*theta2+395*theta4)+temp3*(3-36*theta2+49*theta4);
-		xhdot1=-temp1*cosio;
-		xnodot=xhdot1+(0.5*temp2*(4-19*theta2)+2*temp3*(3-7*theta2))*cosio;
-		omgcof=tle->bstar*c3*cos(tle->omegao);
-		xmcof=-tothrd*coef*tle->bstar*ae/eeta;
-		xnodcf=3.5*betao2*xhdot1*c1;
-		t2cof=1.5*c1;
-		xlcof=0.125*a3ovk2*sinio*(3+5*cosio)/(1+cosio);
-		aycof=0.25*a3ovk2*sinio;
-		delmo=pow(1+eta*cos(tle->xmo),3);
-		sinmo=sin(tle->xmo);
-		x7thm1=7*theta2-1;
-
-		if (isFlagClear(SIMPLE_FLAG))
-		{
-			c1sq=c1*c1;
-			d2=4*aodp*tsi*c1sq;
-			temp=d2*tsi*c1/3;
-			d3=(17*aodp+s4)*temp;
-			d4=0.5*temp*aodp*tsi*(221*aodp+31*s4)*c1;
-			t3cof=d2+2*c1sq;
-			t4cof=0.25*(3*d3+c1*(12*d2+10*c1sq));
-			t5cof=0.2*(3*d4+12*c1*d3+6*d2*d2+15*c1sq*(2*d2+c1sq));
+		st->omgdot=-0.5*temp1*x1m5th+0.0625*temp2*(7-114*theta2+395*theta4)+temp3*(3-36*theta2+49*theta4);
+		xhdot1=-temp1*st->cosio;
+		st->xnodot=xhdot1+(0.5*temp2*(4-19*theta2)+2*temp3*(3-7*theta2))*st->cosio;
+		st->omgcof=tle->bstar*c3*cos(tle->omegao);
+		st->xmcof=-tothrd*coef*tle->bstar*ae/eeta;
+		st->xnodcf=3.5*betao2*xhdot1*st->c1;
+		st->t2cof=1.5*st->c1;
+		st->xlcof=0.125*a3ovk2*st->sinio*(3+5*st->cosio)/(1+st->cosio);
+		st->aycof=0.25*a3ovk2*st->sinio;
+		st->delmo=pow(1+st->eta*cos(tle->xmo),3);
+		st->sinmo=sin(tle->xmo);
+		st->x7thm1=7*theta2-1;
+
+		if (isFlagClear(p, SIMPLE_FLAG))
+		{
+			c1sq=st->c1*st->c1;
+			st->d2=4*st->aodp*tsi*c1sq;
+			temp=st->d2*tsi*st->c1/3;
+			st->d3=(17*st->aodp+s4)*temp;
+			st->d4=0.5*temp*st->aodp*tsi*(221*st->aodp+31*s4)*st->c1;
+			st->t3cof=st->d2+2*c1sq;
+			st->t4cof=0.25*(3*st->d3+st->c1*(12*st->d2+10*c1sq));
+			st->t5cof=0.2*(3*st->d4+12*st->c1*st->d3+6*st->d2*st->d2+15*c1sq*(2*st->d2+c1sq));
 		}
 	}
 
 	/* Update for secular gravity and atmospheric drag. */
-	xmdf=tle->xmo+xmdot*tsince;
-	omgadf=tle->omegao+omgdot*tsince;
-	xnoddf=tle->xnodeo+xnodot*tsince;
+	xmdf=tle->xmo+st->xmdot*tsince;
+	omgadf=tle->omegao+st->omgdot*tsince;
+	xnoddf=tle->xnodeo+st->xnodot*tsince;
 	omega=omgadf;
 	xmp=xmdf;
 	tsq=tsince*tsince;
-	xnode=xnoddf+xnodcf*tsq;
-	tempa=1-c1*tsince;
-	tempe=tle->bstar*c4*tsince;
-	templ=t2cof*tsq;
+	xnode=xnoddf+st->xnodcf*tsq;
+	tempa=1-st->c1*tsince;
+	tempe=tle->bstar*st->c4*tsince;
+	templ=st->t2cof*tsq;
     
-	if (isFlagClear(SIMPLE_FLAG))
+	if (isFlagClear(p, SIMPLE_FLAG))
 	{
-		delomg=omgcof*tsince;
-		delm=xmcof*(pow(1+eta*cos(xmdf),3)-delmo);
+		delomg=st->omgcof*tsince;
+		delm=st->xmcof*(pow(1+st->eta*cos(xmdf),3)-st->delmo);
 		temp=delomg+delm;
 		xmp=xmdf+temp;
 		omega=omgadf-temp;
 		tcube=tsq*tsince;
 		tfour=tsince*tcube;
-		tempa=tempa-d2*tsq-d3*tcube-d4*tfour;
-		tempe=tempe+tle->bstar*c5*(sin(xmp)-sinmo);
-		templ=templ+t3cof*tcube+tfour*(t4cof+tsince*t5cof);
+		tempa=tempa-st->d2*tsq-st->d3*tcube-st->d4*tfour;
+		tempe=tempe+tle->bstar*st->c5*(sin(xmp)-st->sinmo);
+		templ=templ+st->t3cof*tcube+tfour*(st->t4cof+tsince*st->t5cof);
 	}
 
-	a=aodp*pow(tempa,2);
+	a=st->aodp*pow(tempa,2);
 	e=tle->eo-tempe;
-	xl=xmp+omega+xnode+xnodp*templ;
+	xl=xmp+omega+xnode+st->xnodp*templ;
 	beta=sqrt(1-e*e);
 	xn=xke/pow(a,1.5);
 
 	/* Long period periodics */
 	axn=e*cos(omega);
 	temp=1/(a*beta*beta);
-	xll=temp*xlcof*axn;
-	aynl=temp*aycof;
+	xll=temp*st->xlcof*axn;
+	aynl=temp*st->aycof;
 	xlt=xl+xll;
 	ayn=e*sin(omega)+aynl;
 
@@ -1038,12 +1073,12 @@ void SGP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 	temp2=temp1*temp;
 
 	/* Update for short periodics */
-	rk=r*(1-1.5*temp2*betal*x3thm1)+0.5*temp1*x1mth2*cos2u;
-	uk=u-0.25*temp2*x7thm1*sin2u;
-	xnodek=xnode+1.5*temp2*cosio*sin2u;
-	xinck=tle->xincl+1.5*temp2*cosio*sinio*cos2u;
-	rdotk=rdot-xn*temp1*x1mth2*sin2u;
-	rfdotk=rfdot+xn*temp1*(x1mth2*cos2u+1.5*x3thm1);
+	rk=r*(1-1.5*temp2*betal*st->x3thm1)+0.5*temp1*st->x1mth2*cos2u;
+	uk=u-0.25*temp2*st->x7thm1*sin2u;
+	xnodek=xnode+1.5*temp2*st->cosio*sin2u;
+	xinck=tle->xincl+1.5*temp2*st->cosio*st->sinio*cos2u;
+	rdotk=rdot-xn*temp1*st->x1mth2*sin2u;
+	rfdotk=rfdot+xn*temp1*(st->x1mth2*cos2u+1.5*st->x3thm1);
 
 	/* Orientation vectors */
 	sinuk=sin(uk);
@@ -1070,28 +1105,22 @@ void SGP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 	vel->z=rdotk*uz+rfdotk*vz;
 
 	/* Phase in radians */
-	phase=xlt-xnode-omgadf+twopi;
+	p->phase=xlt-xnode-omgadf+twopi;
     
-	if (phase<0.0)
+	if (p->phase<0.0)
 	{
-		phase+=twopi;
+		p->phase+=twopi;
 	}
 
-	phase=FMod2p(phase);
+	p->phase=FMod2p(p->phase);
 }
 
-void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
+void Deep(predict_t *p, int ientry, tle_t * tle, deep_arg_t * deep_arg)
 {
 	/* This function is used by SDP4 to add lunar and solar */
 	/* perturbation effects to deep-space orbit objects.    */
 
-	static double thgr, xnq, xqncl, omegaq, zmol, zmos, savtsn, ee2, e3,
-	xi2, xl2, xl3, xl4, xgh2, xgh3, xgh4, xh2, xh3, sse, ssi, ssg, xi3,
-	se2, si2, sl2, sgh2, sh2, se3, si3, sl3, sgh3, sh3, sl4, sgh4, ssl,
-	ssh, d3210, d3222, d4410, d4422, d5220, d5232, d5421, d5433, del1,
-	del2, del3, fasx2, fasx4, fasx6, xlamo, xfact, xni, atime, stepp,
-	stepn, step2, preep, pl, sghs, xli, d2201, d2211, sghl, sh1, pinc,
-	pe, shs, zsingl, zcosgl, zsinhl, zcoshl, zsinil, zcosil;
+	deep_t *st=&p->deep;
 
 	double a1, a2, a3, a4, a5, a6, a7, a8, a9, a10, ainv2, alfdp, aqnv,
 	sgh, sini2, sinis, sinok, sh, si, sil, day, betdp, dalf, bfact, c,
@@ -1108,45 +1137,45 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 	switch (ientry)
 	{
 		case dpinit:  /* Entrance for deep space initialization */
-		thgr=ThetaG(tle->epoch,deep_arg);
+		st->thgr=ThetaG(tle->epoch,deep_arg);
 		eq=tle->eo;
-		xnq=deep_arg->xnodp;
+		st->xnq=deep_arg->xnodp;
 		aqnv=1/deep_arg->aodp;
-		xqncl=tle->xincl;
+		st->xqncl=tle->xincl;
 		xmao=tle->xmo;
 		xpidot=deep_arg->omgdot+deep_arg->xnodot;
 		sinq=sin(tle->xnodeo);
 		cosq=cos(tle->xnodeo);
-		omegaq=tle->omegao;
+		st->omegaq=tle->omegao;
 
 		/* Initialize lunar solar terms */
 		day=deep_arg->ds50+18261.5;  /* Days since 1900 Jan 0.5 */
 	  
-		if (day!=preep)
+		if (day!=st->preep)
 		{
-			preep=day;
+			st->preep=day;
 			xnodce=4.5236020-9.2422029E-4*day;
 			stem=sin(xnodce);
 			ctem=cos(xnodce);
-			zcosil=0.91375164-0.03568096*ctem;
-			zsinil=sqrt(1-zcosil*zcosil);
-			zsinhl=0.089683511*stem/zsinil;
-			zcoshl=sqrt(1-zsinhl*zsinhl);
+			st->zcosil=0.91375164-0.03568096*ctem;
+			st->zsinil=sqrt(1-st->zcosil*st->zcosil);
+			st->zsinhl=0.089683511*stem/st->zsinil;
+			st->zcoshl=sqrt(1-st->zsinhl*st->zsinhl);
 			c=4.7199672+0.22997150*day;
 			gam=5.8351514+0.0019443680*day;
-			zmol=FMod2p(c-gam);
-			zx=0.39785416*stem/zsinil;
-			zy=zcoshl*ctem+0.91744867*zsinhl*stem;
+			st->zmol=FMod2p(c-gam);
+			zx=0.39785416*stem/st->zsinil;
+			zy=st->zcoshl*ctem+0.91744867*st->zsinhl*stem;
 			zx=AcTan(zx,zy);
 			zx=gam+zx-xnodce;
-			zcosgl=cos(zx);
-			zsingl=sin(zx);
-			zmos=6.2565837+0.017201977*day;
-			zmos=FMod2p(zmos);
+			st->zcosgl=cos(zx);
+			st->zsingl=sin(zx);
+			st->zmos=6.2565837+0.017201977*day;
+			st->zmos=FMod2p(st->zmos);
 		    }
 
 		  /* Do solar terms */
-		  savtsn=1E20;
+		  st->savtsn=1E20;
 		  zcosg=zcosgs;
 		  zsing=zsings;
 		  zcosi=zcosis;
@@ -1156,8 +1185,8 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 		  cc=c1ss;
 		  zn=zns;
 		  ze=zes;
-		  zmo=zmos;
-		  xnoi=1/xnq;
+		  zmo=st->zmos;
+		  xnoi=1/st->xnq;
 
 		  /* Loop breaks when Solar terms are done a second */
 		  /* time, after Lunar terms are initialized        */
@@ -1211,73 +1240,73 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 			sgh=s4*zn*(z31+z33-6);
 			sh=-zn*s2*(z21+z23);
 		
-			if (xqncl<5.2359877E-2)
+			if (st->xqncl<5.2359877E-2)
 			{
 				sh=0;
 			}
 		    
-			ee2=2*s1*s6;
-			e3=2*s1*s7;
-			xi2=2*s2*z12;
-			xi3=2*s2*(z13-z11);
-			xl2=-2*s3*z2;
-			xl3=-2*s3*(z3-z1);
-			xl4=-2*s3*(-21-9*deep_arg->eosq)*ze;
-			xgh2=2*s4*z32;
-			xgh3=2*s4*(z33-z31);
-			xgh4=-18*s4*ze;
-			xh2=-2*s2*z22;
-			xh3=-2*s2*(z23-z21);
-
-			if (isFlagSet(LUNAR_TERMS_DONE_FLAG))
+			st->ee2=2*s1*s6;
+			st->e3=2*s1*s7;
+			st->xi2=2*s2*z12;
+			st->xi3=2*s2*(z13-z11);
+			st->xl2=-2*s3*z2;
+			st->xl3=-2*s3*(z3-z1);
+			st->xl4=-2*s3*(-21-9*deep_arg->eosq)*ze;
+			st->xgh2=2*s4*z32;
+			st->xgh3=2*s4*(z33-z31);
+			st->xgh4=-18*s4*ze;
+			st->xh2=-2*s2*z22;
+			st->xh3=-2*s2*(z23-z21);
+
+			if (isFlagSet(p, LUNAR_TERMS_DONE_FLAG))
 			{
 				break;
 			}
 
 			/* Do lunar terms */
-			sse=se;
-			ssi=si;
-			ssl=sl;
-			ssh=sh/deep_arg->sinio;
-			ssg=sgh-deep_arg->cosio*ssh;
-			se2=ee2;
-			si2=xi2;
-			sl2=xl2;
-			sgh2=xgh2;
-			sh2=xh2;
-			se3=e3;
-			si3=xi3;
-			sl3=xl3;
-			sgh3=xgh3;
-			sh3=xh3;
-			sl4=xl4;
-			sgh4=xgh4;
-			zcosg=zcosgl;
-			zsing=zsingl;
-			zcosi=zcosil;
-			zsini=zsinil;
-			zcosh=zcoshl*cosq+zsinhl*sinq;
-			zsinh=sinq*zcoshl-cosq*zsinhl;
+			st->sse=se;
+			st->ssi=si;
+			st->ssl=sl;
+			st->ssh=sh/deep_arg->sinio;
+			st->ssg=sgh-deep_arg->cosio*st->ssh;
+			st->se2=st->ee2;
+			st->si2=st->xi2;
+			st->sl2=st->xl2;
+			st->sgh2=st->xgh2;
+			st->sh2=st->xh2;
+			st->se3=st->e3;
+			st->si3=st->xi3;
+			st->sl3=st->xl3;
+			st->sgh3=st->xgh3;
+			st->sh3=st->xh3;
+			st->sl4=st->xl4;
+			st->sgh4=st->xgh4;
+			zcosg=st->zcosgl;
+			zsing=st->zsingl;
+			zcosi=st->zcosil;
+			zsini=st->zsinil;
+			zcosh=st->zcoshl*cosq+st->zsinhl*sinq;
+			zsinh=sinq*st->zcoshl-cosq*st->zsinhl;
 			zn=znl;
 			cc=c1l;
 			ze=zel;
-			zmo=zmol;
-			SetFlag(LUNAR_TERMS_DONE_FLAG);
+			zmo=st->zmol;
+			SetFlag(p, LUNAR_TERMS_DONE_FLAG);
 		}
 
-		sse=sse+se;
-		ssi=ssi+si;
-		ssl=ssl+sl;
-		ssg=ssg+sgh-deep_arg->cosio/deep_arg->sinio*sh;
-		ssh=ssh+sh/deep_arg->sinio;
+		st->sse=st->sse+se;
+		st->ssi=st->ssi+si;
+		st->ssl=st->ssl+sl;
+		st->ssg=st->ssg+sgh-deep_arg->cosio/deep_arg->sinio*sh;
+		st->ssh=st->ssh+sh/deep_arg->sinio;
 
 		/* Geopotential resonance initialization for 12 hour orbits */
-		ClearFlag(RESONANCE_FLAG);
-		ClearFlag(SYNCHRONOUS_FLAG);
+		ClearFlag(p, RESONANCE_FLAG);
+		ClearFlag(p, SYNCHRONOUS_FLAG);
 
-		if (!((xnq<0.0052359877) && (xnq>0.0034906585)))
+		if (!((st->xnq<0.0052359877) && (st->xnq>0.0034906585)))
 		{
-			if ((xnq<0.00826) || (xnq>0.00924))
+			if ((st->xnq<0.00826) || (st->xnq>0.00924))
 			{
 			    return;
 			}
@@ -1287,7 +1316,7 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 			    return;
 			}
 	
-			SetFlag(RESONANCE_FLAG);
+			SetFlag(p, RESONANCE_FLAG);
 			eoc=eq*deep_arg->eosq;
 			g201=-0.306-(eq-0.64)*0.440;
 		
@@ -1345,36 +1374,36 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 			f523=deep_arg->sinio*(4.92187512*sini2*(-2-4*deep_arg->cosio+10*deep_arg->theta2)+6.56250012*(1+2*deep_arg->cosio-3*deep_arg->theta2));
 			f542=29.53125*deep_arg->sinio*(2-8*deep_arg->cosio+deep_arg->theta2*(-12+8*deep_arg->cosio+10*deep_arg->theta2));
 			f543=29.53125*deep_arg->sinio*(-2-8*deep_arg->cosio+deep_arg->theta2*(12+8*deep_arg->cosio-10*deep_arg->theta2));
-			xno2=xnq*xnq;
+			xno2=st->xnq*st->xnq;
 			ainv2=aqnv*aqnv;
 			temp1=3*xno2*ainv2;
 			temp=temp1*root22;
-			d2201=temp*f220*g201;
-			d2211=temp*f221*g211;
+			st->d2201=temp*f220*g201;
+			st->d2211=temp*f221*g211;
 			temp1=temp1*aqnv;
 			temp=temp1*root32;
-			d3210=temp*f321*g310;
-			d3222=temp*f322*g322;
+			st->d3210=temp*f321*g310;
+			st->d3222=temp*f322*g322;
 			temp1=temp1*aqnv;
 			temp=2*temp1*root44;
-			d4410=temp*f441*g410;
-			d4422=temp*f442*g422;
+			st->d4410=temp*f441*g410;
+			st->d4422=temp*f442*g422;
 			temp1=temp1*aqnv;
 			temp=temp1*root52;
-			d5220=temp*f522*g520;
-			d5232=temp*f523*g532;
+			st->d5220=temp*f522*g520;
+			st->d5232=temp*f523*g532;
 			temp=2*temp1*root54;
-			d5421=temp*f542*g521;
-			d5433=temp*f543*g533;
-			xlamo=xmao+tle->xnodeo+tle->xnodeo-thgr-thgr;
+			st->d5421=temp*f542*g521;
+			st->d5433=temp*f543*g533;
+			st->xlamo=xmao+tle->xnodeo+tle->xnodeo-st->thgr-st->thgr;
 			bfact=deep_arg->xmdot+deep_arg->xnodot+deep_arg->xnodot-thdt-thdt;
-			bfact=bfact+ssl+ssh+ssh;
+			bfact=bfact+st->ssl+st->ssh+st->ssh;
 		}
 	
 		else
 		{
-			SetFlag(RESONANCE_FLAG);
-			SetFlag(SYNCHRONOUS_FLAG);
+			SetFlag(p, RESONANCE_FLAG);
+			SetFlag(p, SYNCHRONOUS_FLAG);
 	
 			/* Synchronous resonance terms initialization */
 			g200=1+deep_arg->eosq*(-2.5+0.8125*deep_arg->eosq);
@@ -1384,36 +1413,36 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 			f311=0.9375*deep_arg->sinio*deep_arg->sinio*(1+3*deep_arg->cosio)-0.75*(1+deep_arg->cosio);
 			f330=1+deep_arg->cosio;
 			f330=1.875*f330*f330*f330;
-			del1=3*xnq*xnq*aqnv*aqnv;
-			del2=2*del1*f220*g200*q22;
-			del3=3*del1*f330*g300*q33*aqnv;
-			del1=del1*f311*g310*q31*aqnv;
-			fasx2=0.13130908;
-			fasx4=2.8843198;
-			fasx6=0.37448087;
-			xlamo=xmao+tle->xnodeo+tle->omegao-thgr;
+			st->del1=3*st->xnq*st->xnq*aqnv*aqnv;
+			st->del2=2*st->del1*f220*g200*q22;
+			st->del3=3*st->del1*f330*g300*q33*aqnv;
+			st->del1=st->del1*f311*g310*q31*aqnv;
+			st->fasx2=0.13130908;
+			st->fasx4=2.8843198;
+			st->fasx6=0.37448087;
+			st->xlamo=xmao+tle->xnodeo+tle->omegao-st->thgr;
 			bfact=deep_arg->xmdot+xpidot-thdt;
-			bfact=bfact+ssl+ssg+ssh;
+			bfact=bfact+st->ssl+st->ssg+st->ssh;
 		}
 
-		xfact=bfact-xnq;
+		st->xfact=bfact-st->xnq;
 
 		/* Initialize integrator */
-		xli=xlamo;
-		xni=xnq;
-		atime=0;
-		stepp=720;
-		stepn=-720;
-		step2=259200;
+		st->xli=st->xlamo;
+		st->xni=st->xnq;
+		st->atime=0;
+		st->stepp=720;
+		st->stepn=-720;
+		st->step2=259200;
 
 		return;
 
 		case dpsec:  /* Entrance for deep space secular effects */
-		deep_arg->xll=deep_arg->xll+ssl*deep_arg->t;
-		deep_arg->omgadf=deep_arg->omgadf+ssg*deep_arg->t;
-		deep_arg->xnode=deep_arg->xnode+ssh*deep_arg->t;
-		deep_arg->em=tle->eo+sse*deep_arg->t;
-		deep_arg->xinc=tle->xincl+ssi*deep_arg->t;
+		deep_arg->xll=deep_arg->xll+st->ssl*deep_arg->t;
+		deep_arg->omgadf=deep_arg->omgadf+st->ssg*deep_arg->t;
+		deep_arg->xnode=deep_arg->xnode+st->ssh*deep_arg->t;
+		deep_arg->em=tle->eo+st->sse*deep_arg->t;
+		deep_arg->xinc=tle->xincl+st->ssi*deep_arg->t;
 	  
 		if (deep_arg->xinc<0)
 		{
@@ -1422,107 +1451,107 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 			deep_arg->omgadf=deep_arg->omgadf-pi;
 		}
 	
-		if (isFlagClear(RESONANCE_FLAG))
+		if (isFlagClear(p, RESONANCE_FLAG))
 		{
 		      return;
 		}
 
 		do
 		{
-			if ((atime==0) || ((deep_arg->t>=0) && (atime<0)) || ((deep_arg->t<0) && (atime>=0)))
+			if ((st->atime==0) || ((deep_arg->t>=0) && (st->atime<0)) || ((deep_arg->t<0) && (st->atime>=0)))
 			{
 				/* Epoch restart */
 
 				if (deep_arg->t>=0)
 				{
-					delt=stepp;
+					delt=st->stepp;
 				}
 				else
 				{
-					delt=stepn;
+					delt=st->stepn;
 				}
 
-				atime=0;
-				xni=xnq;
-				xli=xlamo;
+				st->atime=0;
+				st->xni=st->xnq;
+				st->xli=st->xlamo;
 			}
 
 			else
 			{
-				if (fabs(deep_arg->t)>=fabs(atime))
+				if (fabs(deep_arg->t)>=fabs(st->atime))
 				{
 					if (deep_arg->t>0)
 					{
-						delt=stepp;
+						delt=st->stepp;
 					}
 					else
 					{
-						delt=stepn;
+						delt=st->stepn;
 					}
 				}
 			}
 	    
 			do
 			{
-				if (fabs(deep_arg->t-atime)>=stepp)
+				if (fabs(deep_arg->t-st->atime)>=st->stepp)
 				{
-					SetFlag(DO_LOOP_FLAG);
-					ClearFlag(EPOCH_RESTART_FLAG);
+					SetFlag(p, DO_LOOP_FLAG);
+					ClearFlag(p, EPOCH_RESTART_FLAG);
 				}
 		
 				else
 				{
-					ft=deep_arg->t-atime;
-					ClearFlag(DO_LOOP_FLAG);
+					ft=deep_arg->t-st->atime;
+					ClearFlag(p, DO_LOOP_FLAG);
 				}
 
-				if (fabs(deep_arg->t)<fabs(atime))
+				if (fabs(deep_arg->t)<fabs(st->atime))
 				{
 					if (deep_arg->t>=0)
 					{
-						delt=stepn;
+						delt=st->stepn;
 					}
 					else
 					{
-						delt=stepp;
+						delt=st->stepp;
 					}
 
-					SetFlag(DO_LOOP_FLAG | EPOCH_RESTART_FLAG);
+					SetFlag(p, DO_LOOP_FLAG | EPOCH_RESTART_FLAG);
 				}
 
 				/* Dot terms calculated */
-				if (isFlagSet(SYNCHRONOUS_FLAG))
+				if (isFlagSet(p, SYNCHRONOUS_FLAG))
 				{
-					xndot=del1*sin(xli-fasx2)+del2*sin(2*(xli-fasx4))+del3*sin(3*(xli-fasx6));
-					xnddt=del1*cos(xli-fasx2)+2*del2*cos(2*(xli-fasx4))+3*del3*cos(3*(xli-fasx6));
+					xndot=st->del1*sin(st->xli-st->fasx2)+st->del2*sin(2*(st->xli-st->fasx4))+st->del3*sin(3*(st->xli-st->fasx6));
+					xnddt=st->del1*cos(st->xli-st->fasx2)+2*st->del2*cos(2*(st->xli-st->fasx4))+3*st->del3*cos(3*(st->xli-st->fasx6));
 				}
 		
 				else
 				{
-					xomi=omegaq+deep_arg->omgdot*atime;
+					xomi=st->omegaq+deep_arg->omgdot*st->atime;
 					x2omi=xomi+xomi;
-					x2li=xli+xli;
-					xndot=d2201*sin(x2omi+xli-g22)+d2211*sin(xli-g22)+d3210*sin(xomi+xli-g32)+d3222*sin(-xomi+xli-g32)+d4410*sin(x2omi+x2li-g44)+d4422*sin(x2li-g44)+d5220*sin(xomi+xli-g52)+d5232*sin(-xomi+xli-g52)+d5421*sin(xomi+x2li-g54)+d5433*sin(-xomi+x2li-g54);
-					xnddt=d2201*cos(x2omi+xli-g22)+d2211*cos(xli-g22)+d3210*cos(xomi+xli-g32)+d3222*cos(-xomi+xli-g32)+d5220*cos(xomi+xli-g52)+d5232*cos(-xomi+xli-g52)+2*(d4410*cos(x2omi+x2li-g44)+d4422*cos(x2li-g44)+d5421*cos(xomi+x2li-g54)+d5433*cos(-xomi+x2li-g54));
+					x2li=st->xli+st->xli;
+					xndot=st->d2201*sin(x2omi+st->xli-g22)+st->d2211*sin(st->xli-g22)+st->d3210*sin(xomi+st->xli-g32)+st->d3222*sin(-xomi+st->xli-g32)+st->d4410*sin(x2omi+x2li-g44)+st->d4422*sin(x2li-g44)+st->d5220*sin(xomi+st->xli-g52)+st->d5232*sin(-xomi+st->xli-g52)+st->d5421*sin(xomi+x2li-g54)+st->d5433*sin(-xomi+x2li-g54);
+					xnddt=st->d2201*cos(x2omi+st->xli-g22)+st->d2211*cos(st->xli-g22)+st->d3210*cos(xomi+st->xli-g32)+st->d3222*cos(-xomi+st->xli-g32)+st->d5220*cos(xomi+st->xli-g52)+st->d5232*cos(-xomi+st->xli-g52)+2*(st->d4410*cos(x2omi+x2li-g44)+st->d4422*cos(x2li-g44)+st->d5421*cos(xomi+x2li-g54)+st->d5433*cos(-xomi+x2li-g54));
 				}
 
-				xldot=xni+xfact;
+				xldot=st->xni+st->xfact;
 				xnddt=xnddt*xldot;
 
-				if (isFlagSet(DO_LOOP_FLAG))
+				if (isFlagSet(p, DO_LOOP_FLAG))
 				{
-					xli=xli+xldot*delt+xndot*step2;
-					xni=xni+xndot*delt+xnddt*step2;
-					atime=atime+delt;
+					st->xli=st->xli+xldot*delt+xndot*st->step2;
+					st->xni=st->xni+xndot*delt+xnddt*st->step2;
+					st->atime=st->atime+delt;
 				}
-			} while (isFlagSet(DO_LOOP_FLAG) && isFlagClear(EPOCH_RESTART_FLAG));
-		} while (isFlagSet(DO_LOOP_FLAG) && isFlagSet(EPOCH_RESTART_FLAG));
+			} while (isFlagSet(p, DO_LOOP_FLAG) && isFlagClear(p, EPOCH_RESTART_FLAG));
+		} while (isFlagSet(p, DO_LOOP_FLAG) && isFlagSet(p, EPOCH_RESTART_FLAG));
 
-		deep_arg->xn=xni+xndot*ft+xnddt*ft*ft*0.5;
-		xl=xli+xldot*ft+xndot*ft*ft*0.5;
-		temp=-deep_arg->xnode+thgr+deep_arg->t*thdt;
+		deep_arg->xn=st->xni+xndot*ft+xnddt*ft*ft*0.5;
+		xl=st->xli+xldot*ft+xndot*ft*ft*0.5;
+		temp=-deep_arg->xnode+st->thgr+deep_arg->t*thdt;
 
-		if (isFlagClear(SYNCHRONOUS_FLAG))
+		if (isFlagClear(p, SYNCHRONOUS_FLAG))
 		{
 			deep_arg->xll=xl+temp+temp;
 		}
@@ -1537,47 +1566,47 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 		sinis=sin(deep_arg->xinc);
 		cosis=cos(deep_arg->xinc);
 
-		if (fabs(savtsn-deep_arg->t)>=30)
+		if (fabs(st->savtsn-deep_arg->t)>=30)
 		{
-			savtsn=deep_arg->t;
-			zm=zmos+zns*deep_arg->t;
+			st->savtsn=deep_arg->t;
+			zm=st->zmos+zns*deep_arg->t;
 			zf=zm+2*zes*sin(zm);
 			sinzf=sin(zf);
 			f2=0.5*sinzf*sinzf-0.25;
 			f3=-0.5*sinzf*cos(zf);
-			ses=se2*f2+se3*f3;
-			sis=si2*f2+si3*f3;
-			sls=sl2*f2+sl3*f3+sl4*sinzf;
-			sghs=sgh2*f2+sgh3*f3+sgh4*sinzf;
-			shs=sh2*f2+sh3*f3;
-			zm=zmol+znl*deep_arg->t;
+			ses=st->se2*f2+st->se3*f3;
+			sis=st->si2*f2+st->si3*f3;
+			sls=st->sl2*f2+st->sl3*f3+st->sl4*sinzf;
+			st->sghs=st->sgh2*f2+st->sgh3*f3+st->sgh4*sinzf;
+			st->shs=st->sh2*f2+st->sh3*f3;
+			zm=st->zmol+znl*deep_arg->t;
 			zf=zm+2*zel*sin(zm);
 			sinzf=sin(zf);
 			f2=0.5*sinzf*sinzf-0.25;
 			f3=-0.5*sinzf*cos(zf);
-			sel=ee2*f2+e3*f3;
-			sil=xi2*f2+xi3*f3;
-			sll=xl2*f2+xl3*f3+xl4*sinzf;
-			sghl=xgh2*f2+xgh3*f3+xgh4*sinzf;
-			sh1=xh2*f2+xh3*f3;
-			pe=ses+sel;
-			pinc=sis+sil;
-			pl=sls+sll;
+			sel=st->ee2*f2+st->e3*f3;
+			sil=st->xi2*f2+st->xi3*f3;
+			sll=st->xl2*f2+st->xl3*f3+st->xl4*sinzf;
+			st->sghl=st->xgh2*f2+st->xgh3*f3+st->xgh4*sinzf;
+			st->sh1=st->xh2*f2+st->xh3*f3;
+			st->pe=ses+sel;
+			st->pinc=sis+sil;
+			st->pl=sls+sll;
 		}
 
-		pgh=sghs+sghl;
-		ph=shs+sh1;
-		deep_arg->xinc=deep_arg->xinc+pinc;
-		deep_arg->em=deep_arg->em+pe;
+		pgh=st->sghs+st->sghl;
+		ph=st->shs+st->sh1;
+		deep_arg->xinc=deep_arg->xinc+st->pinc;
+		deep_arg->em=deep_arg->em+st->pe;
 
-		if (xqncl>=0.2)
+		if (st->xqncl>=0.2)
 		{
 			/* Apply periodics directly */
 			ph=ph/deep_arg->sinio;
 			pgh=pgh-deep_arg->cosio*ph;
 			deep_arg->omgadf=deep_arg->omgadf+pgh;
 			deep_arg->xnode=deep_arg->xnode+ph;
-			deep_arg->xll=deep_arg->xll+pl;
+			deep_arg->xll=deep_arg->xll+st->pl;
 		}
 	
 		else
@@ -1587,13 +1616,13 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 			cosok=cos(deep_arg->xnode);
 			alfdp=sinis*sinok;
 			betdp=sinis*cosok;
-			dalf=ph*cosok+pinc*cosis*sinok;
-			dbet=-ph*sinok+pinc*cosis*cosok;
+			dalf=ph*cosok+st->pinc*cosis*sinok;
+			dbet=-ph*sinok+st->pinc*cosis*cosok;
 			alfdp=alfdp+dalf;
 			betdp=betdp+dbet;
 			deep_arg->xnode=FMod2p(deep_arg->xnode);
 			xls=deep_arg->xll+deep_arg->omgadf+cosis*deep_arg->xnode;
-			dls=pl+pgh-pinc*deep_arg->xnode*sinis;
+			dls=st->pl+pgh-st->pinc*deep_arg->xnode*sinis;
 			xls=xls+dls;
 			xnoh=deep_arg->xnode;
 			deep_arg->xnode=AcTan(alfdp,betdp);
@@ -1613,14 +1642,14 @@ void Deep(int ientry, tle_t * tle, deep_arg_t * deep_arg)
 				}
 			}
 
-			deep_arg->xll=deep_arg->xll+pl;
+			deep_arg->xll=deep_arg->xll+st->pl;
 			deep_arg->omgadf=xls-deep_arg->xll-cos(deep_arg->xinc)*deep_arg->xnode;
 		}
 		return;
 	}
 }
 
-void SDP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
+void SDP4(predict_t *p, double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 {
 	/* This function is used to calculate the position and velocity */
 	/* of deep-space (period > 225 minutes) satellites. tsince is   */
@@ -1631,9 +1660,6 @@ void SDP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 
 	int i;
 
-	static double x3thm1, c1, x1mth2, c4, xnodcf, t2cof, xlcof,
-	aycof, x7thm1;
-
 	double a, axn, ayn, aynl, beta, betal, capu, cos2u, cosepw, cosik,
 	cosnok, cosu, cosuk, ecose, elsq, epw, esine, pl, theta4, rdot,
 	rdotk, rfdot, rfdotk, rk, sin2u, sinepw, sinik, sinnok, sinu,
@@ -1641,38 +1667,38 @@ void SDP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 	xlt, xmam, xmdf, xmx, xmy, xnoddf, xnodek, xll, a1, a3ovk2, ao, c2,
 	coef, coef1, x1m5th, xhdot1, del1, r, delo, eeta, eta, etasq,
 	perigee, psisq, tsi, qoms24, s4, pinvsq, temp, tempa, temp1,
-	temp2, temp3, temp4, temp5, temp6, bx, by, bz, cx, cy, cz;
+	temp2, temp3, temp4, temp5, temp6;
 
-	static deep_arg_t deep_arg;
+	sdp4_t *st=&p->sdp4;
 
 	/* Initialization */
 
-	if (isFlagClear(SDP4_INITIALIZED_FLAG))
+	if (isFlagClear(p, SDP4_INITIALIZED_FLAG))
 	{
-		SetFlag(SDP4_INITIALIZED_FLAG);
+		SetFlag(p, SDP4_INITIALIZED_FLAG);
 
 		/* Recover original mean motion (xnodp) and   */
 		/* semimajor axis (aodp) from input elements. */
 	  
 		a1=pow(xke/tle->xno,tothrd);
-		deep_arg.cosio=cos(tle->xincl);
-		deep_arg.theta2=deep_arg.cosio*deep_arg.cosio;
-		x3thm1=3*deep_arg.theta2-1;
-		deep_arg.eosq=tle->eo*tle->eo;
-		deep_arg.betao2=1-deep_arg.eosq;
-		deep_arg.betao=sqrt(deep_arg.betao2);
-		del1=1.5*ck2*x3thm1/(a1*a1*deep_arg.betao*deep_arg.betao2);
+		st->deep_arg.cosio=cos(tle->xincl);
+		st->deep_arg.theta2=st->deep_arg.cosio*st->deep_arg.cosio;
+		st->x3thm1=3*st->deep_arg.theta2-1;
+		st->deep_arg.eosq=tle->eo*tle->eo;
+		st->deep_arg.betao2=1-st->deep_arg.eosq;
+		st->deep_arg.betao=sqrt(st->deep_arg.betao2);
+		del1=1.5*ck2*st->x3thm1/(a1*a1*st->deep_arg.betao*st->deep_arg.betao2);
 		ao=a1*(1-del1*(0.5*tothrd+del1*(1+134/81*del1)));
-		delo=1.5*ck2*x3thm1/(ao*ao*deep_arg.betao*deep_arg.betao2);
-		deep_arg.xnodp=tle->xno/(1+delo);
-		deep_arg.aodp=ao/(1-delo);
+		delo=1.5*ck2*st->x3thm1/(ao*ao*st->deep_arg.betao*st->deep_arg.betao2);
+		st->deep_arg.xnodp=tle->xno/(1+delo);
+		st->deep_arg.aodp=ao/(1-delo);
 
 		/* For perigee below 156 km, the values */
 		/* of s and qoms2t are altered.         */
 	  
 		s4=s;
 		qoms24=qoms2t;
-		perigee=(deep_arg.aodp*(1-tle->eo)-ae)*xkmper;
+		perigee=(st->deep_arg.aodp*(1-tle->eo)-ae)*xkmper;
 	  
 		if (perigee<156.0)
 		{
@@ -1689,84 +1715,84 @@ void SDP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 			s4=s4/xkmper+ae;
 		}
 
-		pinvsq=1/(deep_arg.aodp*deep_arg.aodp*deep_arg.betao2*deep_arg.betao2);
-		deep_arg.sing=sin(tle->omegao);
-		deep_arg.cosg=cos(tle->omegao);
-		tsi=1/(deep_arg.aodp-s4);
-		eta=deep_arg.aodp*tle->eo*tsi;
+		pinvsq=1/(st->deep_arg.aodp*st->deep_arg.aodp*st->deep_arg.betao2*st->deep_arg.betao2);
+		st->deep_arg.sing=sin(tle->omegao);
+		st->deep_arg.cosg=cos(tle->omegao);
+		tsi=1/(st->deep_arg.aodp-s4);
+		eta=st->deep_arg.aodp*tle->eo*tsi;
 		etasq=eta*eta;
 		eeta=tle->eo*eta;
 		psisq=fabs(1-etasq);
 		coef=qoms24*pow(tsi,4);
 		coef1=coef/pow(psisq,3.5);
-		c2=coef1*deep_arg.xnodp*(deep_arg.aodp*(1+1.5*etasq+eeta*(4+etasq))+0.75*ck2*tsi/psisq*x3thm1*(8+3*etasq*(8+etasq)));
-		c1=tle->bstar*c2;
-		deep_arg.sinio=sin(tle->xincl);
+		c2=coef1*st->deep_arg.xnodp*(st->deep_arg.aodp*(1+1.5*etasq+eeta*(4+etasq))+0.75*ck2*tsi/psisq*st->x3thm1*(8+3*etasq*(8+etasq)));
+		st->c1=tle->bstar*c2;
+		st->deep_arg.sinio=sin(tle->xincl);
 		a3ovk2=-xj3/ck2*pow(ae,3);
-		x1mth2=1-deep_arg.theta2;
-		c4=2*deep_arg.xnodp*coef1*deep_arg.aodp*deep_arg.betao2*(eta*(2+0.5*etasq)+tle->eo*(0.5+2*etasq)-2*ck2*tsi/(deep_arg.aodp*psisq)*(-3*x3thm1*(1-2*eeta+etasq*(1.5-0.5*eeta))+0.75*x1mth2*(2*etasq-eeta*(1+etasq))*cos(2*tle->omegao)));
-		theta4=deep_arg.theta2*deep_arg.theta2;
-		temp1=3*ck2*pinvsq*deep_arg.xnodp;
+		st->x1mth2=1-st->deep_arg.theta2;
+		st->c4=2*st->deep_arg.xnodp*coef1*st->deep_arg.aodp*st->deep_arg.betao2*(eta*(2+0.5*etasq)+tle->eo*(0.5+2*etasq)-2*ck2*tsi/(st->deep_arg.aodp*psisq)*(-3*st->x3thm1*(1-2*eeta+etasq*(1.5-0.5*eeta))+0.75*st->x1mth2*(2*etasq-eeta*(1+etasq))*cos(2*tle->omegao)));
+		theta4=st->deep_arg.theta2*st->deep_arg.theta2;
+		temp1=3*ck2*pinvsq*st->deep_arg.xnodp;
 		temp2=temp1*ck2*pinvsq;
-		temp3=1.25*ck4*pinvsq*pinvsq*deep_arg.xnodp;
-		deep_arg.xmdot=deep_arg.xnodp+0.5*temp1*deep_arg.betao*x3thm1+0.0625*temp2*deep_arg.betao*(13-78*deep_arg.theta2+137*theta4);
-		x1m5th=1-5*deep_arg.theta2;
-		deep_arg.omgdot=-0.5*temp1*x1m5th+0.0625*temp2*(7-114*deep_arg.theta2+395*theta4)+temp3*(3-36*deep_arg.theta2+49*theta4);
-		xhdot1=-temp1*deep_arg.cosio;
-		deep_arg.xnodot=xhdot1+(0.5*temp2*(4-19*deep_arg.theta2)+2*temp3*(3-7*deep_arg.theta2))*deep_arg.cosio;
-		xnodcf=3.5*deep_arg.betao2*xhdot1*c1;
-		t2cof=1.5*c1;
-		xlcof=0.125*a3ovk2*deep_arg.sinio*(3+5*deep_arg.cosio)/(1+deep_arg.cosio);
-		aycof=0.25*a3ovk2*deep_arg.sinio;
-		x7thm1=7*deep_arg.theta2-1;
-
-		/* initialize Deep() */
-
-		Deep(dpinit,tle,&deep_arg);
+		temp3=1.25*ck4*pinvsq*pinvsq*st->deep_arg.xnodp;
+		st->deep_arg.xmdot=st->deep_arg.xnodp+0.5*temp1*st->deep_arg.betao*st->x3thm1+0.0625*temp2*st->deep_arg.betao*(13-78*st->deep_arg.theta2+137*theta4);
+		x1m5th=1-5*st->deep_arg.theta2;
+		st->deep_arg.omgdot=-0.5*temp1*x1m5th+0.0625*temp2*(7-114*st->deep_arg.theta2+395*theta4)+temp3*(3-36*st->deep_arg.theta2+49*theta4);
+		xhdot1=-temp1*st->deep_arg.cosio;
+		st->deep_arg.xnodot=xhdot1+(0.5*temp2*(4-19*st->deep_arg.theta2)+2*temp3*(3-7*st->deep_arg.theta2))*st->deep_arg.cosio;
+		st->xnodcf=3.5*st->deep_arg.betao2*xhdot1*st->c1;
+		st->t2cof=1.5*st->c1;
+		st->xlcof=0.125*a3ovk2*st->deep_arg.sinio*(3+5*st->deep_arg.cosio)/(1+st->deep_arg.cosio);
+		st->aycof=0.25*a3ovk2*st->deep_arg.sinio;
+		st->x7thm1=7*st->deep_arg.theta2-1;
+
+		/* initialize Deep(p, ) */
+
+		Deep(p, dpinit,tle,&st->deep_arg);
 	}
 
 	/* Update for secular gravity and atmospheric drag */
-	xmdf=tle->xmo+deep_arg.xmdot*tsince;
-	deep_arg.omgadf=tle->omegao+deep_arg.omgdot*tsince;
-	xnoddf=tle->xnodeo+deep_arg.xnodot*tsince;
+	xmdf=tle->xmo+st->deep_arg.xmdot*tsince;
+	st->deep_arg.omgadf=tle->omegao+st->deep_arg.omgdot*tsince;
+	xnoddf=tle->xnodeo+st->deep_arg.xnodot*tsince;
 	tsq=tsince*tsince;
-	deep_arg.xnode=xnoddf+xnodcf*tsq;
-	tempa=1-c1*tsince;
-	tempe=tle->bstar*c4*tsince;
-	templ=t2cof*tsq;
-	deep_arg.xn=deep_arg.xnodp;
+	st->deep_arg.xnode=xnoddf+st->xnodcf*tsq;
+	tempa=1-st->c1*tsince;
+	tempe=tle->bstar*st->c4*tsince;
+	templ=st->t2cof*tsq;
+	st->deep_arg.xn=st->deep_arg.xnodp;
 
 	/* Update for deep-space secular effects */
-	deep_arg.xll=xmdf;
-	deep_arg.t=tsince;
+	st->deep_arg.xll=xmdf;
+	st->deep_arg.t=tsince;
 
-	Deep(dpsec, tle, &deep_arg);
+	Deep(p, dpsec, tle, &st->deep_arg);
 
-	xmdf=deep_arg.xll;
-	a=pow(xke/deep_arg.xn,tothrd)*tempa*tempa;
-	deep_arg.em=deep_arg.em-tempe;
-	xmam=xmdf+deep_arg.xnodp*templ;
+	xmdf=st->deep_arg.xll;
+	a=pow(xke/st->deep_arg.xn,tothrd)*tempa*tempa;
+	st->deep_arg.em=st->deep_arg.em-tempe;
+	xmam=xmdf+st->deep_arg.xnodp*templ;
 
 	/* Update for deep-space periodic effects */
-	deep_arg.xll=xmam;
+	st->deep_arg.xll=xmam;
 
-	Deep(dpper,tle,&deep_arg);
+	Deep(p, dpper,tle,&st->deep_arg);
 
-	xmam=deep_arg.xll;
-	xl=xmam+deep_arg.omgadf+deep_arg.xnode;
-	beta=sqrt(1-deep_arg.em*deep_arg.em);
-	deep_arg.xn=xke/pow(a,1.5);
+	xmam=st->deep_arg.xll;
+	xl=xmam+st->deep_arg.omgadf+st->deep_arg.xnode;
+	beta=sqrt(1-st->deep_arg.em*st->deep_arg.em);
+	st->deep_arg.xn=xke/pow(a,1.5);
 
 	/* Long period periodics */
-	axn=deep_arg.em*cos(deep_arg.omgadf);
+	axn=st->deep_arg.em*cos(st->deep_arg.omgadf);
 	temp=1/(a*beta*beta);
-	xll=temp*xlcof*axn;
-	aynl=temp*aycof;
+	xll=temp*st->xlcof*axn;
+	aynl=temp*st->aycof;
 	xlt=xl+xll;
-	ayn=deep_arg.em*sin(deep_arg.omgadf)+aynl;
+	ayn=st->deep_arg.em*sin(st->deep_arg.omgadf)+aynl;
 
 	/* Solve Kepler's Equation */
-	capu=FMod2p(xlt-deep_arg.xnode);
+	capu=FMod2p(xlt-st->deep_arg.xnode);
 	temp2=capu;
 	i=0;
 
@@ -1812,12 +1838,12 @@ void SDP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 	temp2=temp1*temp;
 
 	/* Update for short periodics */
-	rk=r*(1-1.5*temp2*betal*x3thm1)+0.5*temp1*x1mth2*cos2u;
-	uk=u-0.25*temp2*x7thm1*sin2u;
-	xnodek=deep_arg.xnode+1.5*temp2*deep_arg.cosio*sin2u;
-	xinck=deep_arg.xinc+1.5*temp2*deep_arg.cosio*deep_arg.sinio*cos2u;
-	rdotk=rdot-deep_arg.xn*temp1*x1mth2*sin2u;
-	rfdotk=rfdot+deep_arg.xn*temp1*(x1mth2*cos2u+1.5*x3thm1);
+	rk=r*(1-1.5*temp2*betal*st->x3thm1)+0.5*temp1*st->x1mth2*cos2u;
+	uk=u-0.25*temp2*st->x7thm1*sin2u;
+	xnodek=st->deep_arg.xnode+1.5*temp2*st->deep_arg.cosio*sin2u;
+	xinck=st->deep_arg.xinc+1.5*temp2*st->deep_arg.cosio*st->deep_arg.sinio*cos2u;
+	rdotk=rdot-st->deep_arg.xn*temp1*st->x1mth2*sin2u;
+	rfdotk=rfdot+st->deep_arg.xn*temp1*(st->x1mth2*cos2u+1.5*st->x3thm1);
 
 	/* Orientation vectors */
 	sinuk=sin(uk);
@@ -1843,30 +1869,15 @@ void SDP4(double tsince, tle_t * tle, vector_t * pos, vector_t * vel)
 	vel->y=rdotk*uy+rfdotk*vy;
 	vel->z=rdotk*uz+rfdotk*vz;
 
-	/* Calculations for squint angle begin here... */
-
-	if (calc_squint)
-	{
-		bx=cos(alat)*cos(alon+deep_arg.omgadf);
-		by=cos(alat)*sin(alon+deep_arg.omgadf);
-		bz=sin(alat);
-		cx=bx;
-		cy=by*cos(xinck)-bz*sin(xinck);
-		cz=by*sin(xinck)+bz*cos(xinck);
-		ax=cx*cos(xnodek)-cy*sin(xnodek);
-		ay=cx*sin(xnodek)+cy*cos(xnodek);
-		az=cz;
-	}
-	
 	/* Phase in radians */
-	phase=xlt-deep_arg.xnode-deep_arg.omgadf+twopi;
+	p->phase=xlt-st->deep_arg.xnode-st->deep_arg.omgadf+twopi;
     
-	if (phase<0.0)
+	if (p->phase<0.0)
 	{
-		phase+=twopi;
+		p->phase+=twopi;
 	}
 
-	phase=FMod2p(phase);
+	p->phase=FMod2p(p->phase);
 }
 
 void Calculate_User_PosVel(double time, geodetic_t *geodetic, vector_t *obs_pos, vector_t *obs_vel)
@@ -1957,12 +1968,6 @@ void Calculate_Obs(double time, vector_t *pos, vector_t *vel, geodetic_t *geodet
 	range.y=pos->y-obs_pos.y;
 	range.z=pos->z-obs_pos.z;
 
-	/* Save these values globally for calculating squint angles later... */
-
-	rx=range.x;
-	ry=range.y;
-	rz=range.z;
-
 	rgvel.x=vel->x-obs_vel.x;
 	rgvel.y=vel->y-obs_vel.y;
 	rgvel.z=vel->z-obs_vel.z;
@@ -2009,16 +2014,48 @@ void Calculate_Obs(double time, vector_t *pos, vector_t *vel, geodetic_t *geodet
 	obs_set->y=el;
 
 	/**** End bypass ****/
+}
 
-	if (obs_set->y>=0.0)
-	{
-		SetFlag(VISIBLE_FLAG);
-	}
-	else
-	{
-		obs_set->y=el;  /* Reset to true elevation */
-		ClearFlag(VISIBLE_FLAG);
-	}
+void Calculate_Obs_Rates(double time, vector_t *pos, vector_t *vel, geodetic_t *geodetic, vector_t *rates)
+{
+	/* Azimuth and elevation rates (radians/second) of the object with ECI */
+	/* position {pos} and velocity {vel} as seen from {geodetic}, found    */
+	/* from the topocentric velocity rather than by differencing, in       */
+	/* {rates} x and y.  Refraction is ignored as in Calculate_Obs.        */
+
+	double sin_lat, cos_lat, sin_theta, cos_theta, top_s, top_e, top_z, dot_s, dot_e, dot_z,
+		horiz2, range2;
+
+	vector_t obs_pos, obs_vel, range, rgvel;
+
+	Calculate_User_PosVel(time, geodetic, &obs_pos, &obs_vel);
+
+	range.x=pos->x-obs_pos.x;
+	range.y=pos->y-obs_pos.y;
+	range.z=pos->z-obs_pos.z;
+
+	/* Rate of change of the range vector in the frame rotating with the earth */
+	rgvel.x=vel->x-obs_vel.x+mfactor*range.y;
+	rgvel.y=vel->y-obs_vel.y-mfactor*range.x;
+	rgvel.z=vel->z-obs_vel.z;
+
+	sin_lat=sin(geodetic->lat);
+	cos_lat=cos(geodetic->lat);
+	sin_theta=sin(geodetic->theta);
+	cos_theta=cos(geodetic->theta);
+	top_s=sin_lat*cos_theta*range.x+sin_lat*sin_theta*range.y-cos_lat*range.z;
+	top_e=-sin_theta*range.x+cos_theta*range.y;
+	top_z=cos_lat*cos_theta*range.x+cos_lat*sin_theta*range.y+sin_lat*range.z;
+	dot_s=sin_lat*cos_theta*rgvel.x+sin_lat*sin_theta*rgvel.y-cos_lat*rgvel.z;
+	dot_e=-sin_theta*rgvel.x+cos_theta*rgvel.y;
+	dot_z=cos_lat*cos_theta*rgvel.x+cos_lat*sin_theta*rgvel.y+sin_lat*rgvel.z;
+
+	horiz2=top_s*top_s+top_e*top_e;
+	range2=horiz2+top_z*top_z;
+
+	/* Azimuth is atan2(top_e,-top_s), elevation atan2(top_z,sqrt(horiz2)) */
+	rates->x=(top_e*dot_s-top_s*dot_e)/horiz2;
+	rates->y=(horiz2*dot_z-top_z*(top_s*dot_s+top_e*dot_e))/(sqrt(horiz2)*range2);
 }
 
 void Calculate_RADec(double time, vector_t *pos, vector_t *vel, geodetic_t *geodetic, vector_t *obs_set)
@@ -2098,11 +2135,13 @@ double PrimeAngle(double x)
 	return x;
 }
 
-char *SubString(char *string, char start, char end)
+char *SubString(char *string, char start, char end, char *temp)
 {
 	/* This function returns a substring based on the starting
 	   and ending positions provided.  It is used heavily in
-	   the AutoUpdate function when parsing 2-line element data. */
+	   the AutoUpdate function when parsing 2-line element data.
+	   The result is written to (and returned in) "temp", which
+	   must hold at least end-start+2 characters. */
 
 	unsigned x, y;
 
@@ -2143,26 +2182,6 @@ void CopyString(char *source, char *destination, char start, char end)
 	}
 }
 
-char *Abbreviate(char *string, int n)
-{
-	/* This function returns an abbreviated substring of the original,
-	   including a '~' character if a non-blank character is chopped
-	   out of the generated substring.  n is the length of the desired
-	   substring.  It is used for abbreviating satellite names. */
-
-	strncpy(temp,string,79);
-
-	if (temp[n]!=0 && temp[n]!=32)
-	{
-		temp[n-2]='~';
-		temp[n-1]=temp[strlen(temp)-1];
-	}
-
-	temp[n]=0;
-
-	return temp;
-}
-
 char KepCheck(char *line1, char *line2)
 {
 	/* This function scans line 1 and line 2 of a NASA 2-Line element
@@ -2200,153 +2219,32 @@ char KepCheck(char *line1, char *line2)
 	return (x ? 0 : 1);
 }
 
-void InternalUpdate(int x)
+void InternalUpdate(predict_t *p)
 {
 	/* Updates data in TLE structure based on
 	   line1 and line2 stored in structure. */
 
 	double tempnum;
-
-	strncpy(sat.designator,SubString(sat.line1,9,16),8);
-	sat.designator[9]=0;
-	sat.catnum=atol(SubString(sat.line1,2,6));
-	sat.year=atoi(SubString(sat.line1,18,19));
-	sat.refepoch=atof(SubString(sat.line1,20,31));
-	tempnum=1.0e-5*atof(SubString(sat.line1,44,49));
-	sat.nddot6=tempnum/pow(10.0,(sat.line1[51]-'0'));
-	tempnum=1.0e-5*atof(SubString(sat.line1,53,58));
-	sat.bstar=tempnum/pow(10.0,(sat.line1[60]-'0'));
-	sat.setnum=atol(SubString(sat.line1,64,67));
-	sat.incl=atof(SubString(sat.line2,8,15));
-	sat.raan=atof(SubString(sat.line2,17,24));
-	sat.eccn=1.0e-07*atof(SubString(sat.line2,26,32));
-	sat.argper=atof(SubString(sat.line2,34,41));
-	sat.meanan=atof(SubString(sat.line2,43,50));
-	sat.meanmo=atof(SubString(sat.line2,52,62));
-	sat.drag=atof(SubString(sat.line1,33,42));
-	sat.orbitnum=atof(SubString(sat.line2,63,67));
-}
-
-char *noradEvalue(double value)
-{
-	/* Converts numeric values to E notation used in NORAD TLEs */
-
-	char string[15];
-
-	sprintf(string,"%11.4e",value*10.0);
-
-	output[0]=string[0];
-	output[1]=string[1];
-	output[2]=string[3];
-	output[3]=string[4];
-	output[4]=string[5];
-	output[5]=string[6];
-	output[6]='-';
-	output[7]=string[10];
-	output[8]=0;
-
-	return output;
-}
-
-void Data2TLE(int x)
-{
-	/* This function converts orbital data held in the numeric
-	   portion of the sat tle structure to ASCII TLE format,
-	   and places the result in ASCII portion of the structure. */
- 
-	int i;
-	char string[15], line1[70], line2[70];
-	unsigned sum;
-
-	/* Fill lines with blanks */
-
-	for (i=0; i<70; line1[i]=32, line2[i]=32, i++);
-
-	line1[69]=0;
-	line2[69]=0;
-
-	/* Insert static characters */
-
-	line1[0]='1';
-	line1[7]='U'; /* Unclassified */
-	line2[0]='2';
-
-	line1[62]='0'; /* For publically released TLEs */
-
-	/* Insert orbital data */
-
-	sprintf(string,"%05ld",sat.catnum);
-	CopyString(string,line1,2,6);
-	CopyString(string,line2,2,6);
-
-	CopyString(sat.designator,line1,9,16);
-
-	sprintf(string,"%02d",sat.year);
-	CopyString(string,line1,18,19);
-
-	sprintf(string,"%12.8f",sat.refepoch);
-	CopyString(string,line1,20,32);
-
-	sprintf(string,"%.9f",fabs(sat.drag));
-
-	CopyString(string,line1,33,42);
-
-	if (sat.drag<0.0)
-	{
-		line1[33]='-';
-	}
-	else
-	{
-		line1[33]=32;
-	}
-
-	CopyString(noradEvalue(sat.nddot6),line1,44,51);
-	CopyString(noradEvalue(sat.bstar),line1,53,60);
-
-	sprintf(string,"%4lu",sat.setnum);
-	CopyString(string,line1,64,67);
-
-	sprintf(string,"%9.4f",sat.incl);
-	CopyString(string,line2,7,15);
-				
-	sprintf(string,"%9.4f",sat.raan);
-	CopyString(string,line2,16,24);
-
-	sprintf(string,"%13.12f",sat.eccn);
-	
-	/* Erase eccentricity's decimal point */
-
-	for (i=2; i<=9; string[i-2]=string[i], i++);
-
-	CopyString(string,line2,26,32);
-
-	sprintf(string,"%9.4f",sat.argper);
-	CopyString(string,line2,33,41);
-
-	sprintf(string,"%9.5f",sat.meanan);
-	CopyString(string,line2,43,50);
-
-	sprintf(string,"%12.9f",sat.meanmo);
-	CopyString(string,line2,52,62);
-
-	sprintf(string,"%5lu",sat.orbitnum);
-	CopyString(string,line2,63,67);
-
-	/* Compute and insert checksum for line 1 and line 2 */
-
-	for (i=0, sum=0; i<=67; sum+=val[(int)line1[i]], i++);
-
-	line1[68]=(sum%10)+'0';
-
-	for (i=0, sum=0; i<=67; sum+=val[(int)line2[i]], i++);
-
-	line2[68]=(sum%10)+'0';
-
-	line1[69]=0;
-	line2[69]=0;
-
-	strcpy(sat.line1,line1);
-	strcpy(sat.line2,line2);
+	char temp[80];
+
+	strncpy(p->sat.designator,SubString(p->sat.line1,9,16,temp),8);
+	p->sat.designator[9]=0;
+	p->sat.catnum=atol(SubString(p->sat.line1,2,6,temp));
+	p->sat.year=atoi(SubString(p->sat.line1,18,19,temp));
+	p->sat.refepoch=atof(SubString(p->sat.line1,20,31,temp));
+	tempnum=1.0e-5*atof(SubString(p->sat.line1,44,49,temp));
+	p->sat.nddot6=tempnum/pow(10.0,(p->sat.line1[51]-'0'));
+	tempnum=1.0e-5*atof(SubString(p->sat.line1,53,58,temp));
+	p->sat.bstar=tempnum/pow(10.0,(p->sat.line1[60]-'0'));
+	p->sat.setnum=atol(SubString(p->sat.line1,64,67,temp));
+	p->sat.incl=atof(SubString(p->sat.line2,8,15,temp));
+	p->sat.raan=atof(SubString(p->sat.line2,17,24,temp));
+	p->sat.eccn=1.0e-07*atof(SubString(p->sat.line2,26,32,temp));
+	p->sat.argper=atof(SubString(p->sat.line2,34,41,temp));
+	p->sat.meanan=atof(SubString(p->sat.line2,43,50,temp));
+	p->sat.meanmo=atof(SubString(p->sat.line2,52,62,temp));
+	p->sat.drag=atof(SubString(p->sat.line1,33,42,temp));
+	p->sat.orbitnum=atof(SubString(p->sat.line2,63,67,temp));
 }
 
 double ReadBearing(char *input)
@@ -2421,150 +2319,46 @@ double ReadBearing(char *input)
 	return bearing;
 }
 
-char ReadTLE(char *line0, char *line1, char *line2)
+char ReadTLE(predict_t *p, const char *line0, const char *line1, const char *line2)
 {
 	int la, lb, lc;
 	char error_flags,a,b,c,d;
 
-	la = strnlen(line0,sizeof(sat.name));
-	lb = strnlen(line1,sizeof(sat.line1));
-	lc = strnlen(line2,sizeof(sat.line2));
-	a = ((la == 0) || (la >= sizeof(sat.name)));
-	b = ((lb == 0) || (lb >= sizeof(sat.line1)));
-	c = ((lc == 0) || (lc >= sizeof(sat.line2)));
-	d = !KepCheck(line1, line2);
+	la = strnlen(line0,sizeof(p->sat.name));
+	lb = strnlen(line1,sizeof(p->sat.line1));
+	lc = strnlen(line2,sizeof(p->sat.line2));
+	a = ((la == 0) || (la >= sizeof(p->sat.name)));
+	b = ((lb == 0) || (lb >= sizeof(p->sat.line1)));
+	c = ((lc == 0) || (lc >= sizeof(p->sat.line2)));
+	d = !KepCheck((char *)line1, (char *)line2);
 	error_flags = (a << 3) | (b << 2) | (c << 1) | (d << 0);
 
 	if (error_flags == 0)
 	{
-		strncpy(sat.name,line0,sizeof(sat.name)-1);
-		strncpy(sat.line1,line1,sizeof(sat.line1)-1);
-		strncpy(sat.line2,line2,sizeof(sat.line2)-1);
-		InternalUpdate(0);
+		strncpy(p->sat.name,line0,sizeof(p->sat.name)-1);
+		strncpy(p->sat.line1,line1,sizeof(p->sat.line1)-1);
+		strncpy(p->sat.line2,line2,sizeof(p->sat.line2)-1);
+		InternalUpdate(p);
 	}
 
 	return error_flags;
 }
 
-char ReadQTH(double lat, double lon, long alt)
+char ReadQTH(predict_t *p, double lat, double lon, long alt)
 {
 	//TODO: add sanity checks
-	qth.stnlat = lat;
-	qth.stnlong = lon;
-	qth.stnalt = alt;
+	p->qth.stnlat = lat;
+	p->qth.stnlong = lon;
+	p->qth.stnalt = alt;
 
-	obs_geodetic.lat=qth.stnlat*deg2rad;
-	obs_geodetic.lon=-qth.stnlong*deg2rad;
-	obs_geodetic.alt=((double)qth.stnalt)/1000.0;
-	obs_geodetic.theta=0.0;
+	p->obs_geodetic.lat=p->qth.stnlat*deg2rad;
+	p->obs_geodetic.lon=-p->qth.stnlong*deg2rad;
+	p->obs_geodetic.alt=((double)p->qth.stnalt)/1000.0;
+	p->obs_geodetic.theta=0.0;
 
 	return 0;
 }
 
-
-char ReadQTHFile()
-{
-	FILE *fd;
-
-	fd=fopen(qthfile,"r");
-	if (fd!=NULL)
-	{
-		fgets(qth.callsign,16,fd);
-		qth.callsign[strlen(qth.callsign)-1]=0;
-		fscanf(fd,"%lf", &qth.stnlat);
-		fscanf(fd,"%lf", &qth.stnlong);
-		fscanf(fd,"%d", &qth.stnalt);
-		fclose(fd);
-
-		obs_geodetic.lat=qth.stnlat*deg2rad;
-		obs_geodetic.lon=-qth.stnlong*deg2rad;
-		obs_geodetic.alt=((double)qth.stnalt)/1000.0;
-		obs_geodetic.theta=0.0;
-		return 0;
-	}
-	return -1;
-}
-
-char CopyFile(char *source, char *destination)
-{
-	/* This function copies file "source" to file "destination"
-	   in 64k chunks.  The permissions on the destination file
-	   are set to rw-r--r--  (0644).  A 0 is returned if no
-	   errors are encountered.  A 1 indicates a problem writing
-	   to the destination file.  A 2 indicates a problem reading
-	   the source file.  */
-
-	int x, sd, dd;
-	char error=0, buffer[65536];
-
-	sd=open(source,O_RDONLY);
-
-	if (sd!=-1)
-	{
-		dd=open(destination,O_WRONLY | O_CREAT| O_TRUNC, 0644);
-
-		if (dd!=-1)
-		{
-			x=read(sd,&buffer,65536);
-
-			while (x)
-			{
-				write(dd,&buffer,x);
-				x=read(sd,&buffer,65536);
-			}
-
-			close(dd);
-		}
-		else
-		{
-			error=1;
-		}
-
-		close(sd);
-	}
-	else
-	{
-		error+=2;
-	}
-
-	return error;
-}
-
-void SaveQTH()
-{
-	/* This function saves QTH data to the QTH data file. */
-
-	FILE *fd;	
-
-	fd=fopen(qthfile,"w");
-
-	fprintf(fd,"%s\n",qth.callsign);
-	fprintf(fd," %g\n",qth.stnlat);
-	fprintf(fd," %g\n",qth.stnlong);
-	fprintf(fd," %d\n",qth.stnalt);
-
-	fclose(fd);
-}
-
-void SaveTLE()
-{
-	FILE *fd;
-
- 	/* Save orbital data to tlefile */
-
-	fd=fopen(tlefile,"w");
-
-	Data2TLE(0);
-
-	/* Write name, line1, line2 to predict.tle */
-
-	fprintf(fd,"%s\n", sat.name);  
-	fprintf(fd,"%s\n", sat.line1);
-	fprintf(fd,"%s\n", sat.line2);
-
-	fclose(fd);
-}
-
 long DayNum(int m, int d, int y)
 {
 	/* This function calculates the day number from m/d/y. */
@@ -2614,21 +2408,22 @@ double CurrentDaynum()
 	return ((seconds/86400.0)-3651.0);
 }
 
-char *Daynum2String(daynum)
-double daynum;
+char *Daynum2String(double daynum, char *output)
 {
 	/* This function takes the given epoch as a fractional number of
-	   days since 31Dec79 00:00:00 UTC and returns the corresponding
-	   date as a string of the form "Tue 12Oct99 17:22:37". */
+	   days since 31Dec79 00:00:00 UTC and writes the corresponding
+	   date to "output" (at least 21 characters) as a string of the
+	   form "Tue 12Oct99 17:22:37". */
 
 	char timestr[26];
+	struct tm tm;
 	time_t t;
 	int x;
 
 	/* Convert daynum to Unix time (seconds since 01-Jan-70) */
 	t=(time_t)(86400.0*(daynum+3651.0));
 
-	sprintf(timestr,"%s",asctime(gmtime(&t)));
+	asctime_r(gmtime_r(&t,&tm),timestr);
 
 	if (timestr[8]==' ')
 	{
@@ -2652,7 +2447,7 @@ double daynum;
 	return output;
 }
 
-void FindMoon(double daynum)
+void FindMoon(predict_t *pr, double daynum)
 {
 	/* This function determines the position of the moon, including
 	   the azimuth and elevation headings, relative to the latitude
@@ -2781,7 +2576,7 @@ void FindMoon(double daynum)
 
 	b=bt*deg2rad;
 	lm=l*deg2rad;
-	moon_dx=3.0/(pi*p);
+	pr->moon_dx=3.0/(pi*p);
 
 	/* Semi-diameter calculation */
 	/* sem=10800.0*asin(0.272488*p*deg2rad)/pi; */
@@ -2802,8 +2597,8 @@ void FindMoon(double daynum)
 	/* ra = right ascension */
 	/* dec = declination */
 
-	n=qth.stnlat*deg2rad;    /* North latitude of tracking station */
-	e=-qth.stnlong*deg2rad;  /* East longitude of tracking station */
+	n=pr->qth.stnlat*deg2rad;    /* North latitude of tracking station */
+	e=-pr->qth.stnlong*deg2rad;  /* East longitude of tracking station */
 
 	/* Find siderial time in radians */
 
@@ -2815,14 +2610,14 @@ void FindMoon(double daynum)
 		teg-=360.0;
 	}
 
-	th=FixAngle((teg-qth.stnlong)*deg2rad);
+	th=FixAngle((teg-pr->qth.stnlong)*deg2rad);
 	h=th-ra;
 
 	az=atan2(sin(h),cos(h)*sin(n)-tan(dec)*cos(n))+pi;
 	el=asin(sin(n)*sin(dec)+cos(n)*cos(dec)*cos(h));
 
-	moon_az=az/deg2rad;
-	moon_el=el/deg2rad;
+	pr->moon_az=az/deg2rad;
+	pr->moon_el=el/deg2rad;
 
 	/* Radial velocity approximation.  This code was derived
 	   from "Amateur Radio Software", by John Morris, GM4ANB,
@@ -2831,25 +2626,25 @@ void FindMoon(double daynum)
 	mm=FixAngle(1.319238+daynum*0.228027135);  /* mean moon position */
 	t2=0.10976;
 	t1=mm+t2*sin(mm);
-	dv=0.01255*moon_dx*moon_dx*sin(t1)*(1.0+t2*cos(mm));
+	dv=0.01255*pr->moon_dx*pr->moon_dx*sin(t1)*(1.0+t2*cos(mm));
 	dv=dv*4449.0;
 	t1=6378.0;
 	t2=384401.0;
 	t3=t1*t2*(cos(dec)*cos(n)*sin(h));
 	t3=t3/sqrt(t2*t2-t2*t1*sin(el));
-	moon_dv=dv+t3*0.0753125;
+	pr->moon_dv=dv+t3*0.0753125;
 
-	moon_dec=dec/deg2rad;
-	moon_ra=ra/deg2rad;
-	moon_gha=teg-moon_ra;
+	pr->moon_dec=dec/deg2rad;
+	pr->moon_ra=ra/deg2rad;
+	pr->moon_gha=teg-pr->moon_ra;
 
-	if (moon_gha<0.0)
+	if (pr->moon_gha<0.0)
 	{
-		moon_gha+=360.0;
+		pr->moon_gha+=360.0;
 	}
 }
 
-void FindSun(double daynum)
+void FindSun(predict_t *p, double daynum)
 {
 	/* This function finds the position of the Sun */
 
@@ -2868,61 +2663,50 @@ void FindSun(double daynum)
 	/* Solar lat, long, alt vector */
 	geodetic_t solar_latlonalt;
 
-	jul_utc=daynum+2444238.5;
+	double jul_utc=daynum+2444238.5;
 
 	Calculate_Solar_Position(jul_utc, &solar_vector);
-	Calculate_Obs(jul_utc, &solar_vector, &zero_vector, &obs_geodetic, &solar_set);
-	sun_azi=Degrees(solar_set.x); 
-	sun_ele=Degrees(solar_set.y);
-	sun_range=1.0+((solar_set.z-AU)/AU);
-	sun_range_rate=1000.0*solar_set.w;
+	Calculate_Obs(jul_utc, &solar_vector, &zero_vector, &p->obs_geodetic, &solar_set);
+	p->sun_azi=Degrees(solar_set.x); 
+	p->sun_ele=Degrees(solar_set.y);
+	p->sun_range=1.0+((solar_set.z-AU)/AU);
+	p->sun_range_rate=1000.0*solar_set.w;
 
 	Calculate_LatLonAlt(jul_utc, &solar_vector, &solar_latlonalt);
 
-	sun_lat=Degrees(solar_latlonalt.lat);
-	sun_lon=360.0-Degrees(solar_latlonalt.lon);
+	p->sun_lat=Degrees(solar_latlonalt.lat);
+	p->sun_lon=360.0-Degrees(solar_latlonalt.lon);
 
-	Calculate_RADec(jul_utc, &solar_vector, &zero_vector, &obs_geodetic, &solar_rad);
+	Calculate_RADec(jul_utc, &solar_vector, &zero_vector, &p->obs_geodetic, &solar_rad);
 
-	sun_ra=Degrees(solar_rad.x);
-	sun_dec=Degrees(solar_rad.y);
+	p->sun_ra=Degrees(solar_rad.x);
+	p->sun_dec=Degrees(solar_rad.y);
 }
 
-void PreCalc(int x)
+void PreCalc(predict_t *p)
 {
 	/* This function copies TLE data from PREDICT's sat structure
 	   to the SGP4/SDP4's single dimensioned tle structure, and
 	   prepares the tracking code for the update. */
 
-	strcpy(tle.sat_name,sat.name);
-	strcpy(tle.idesg,sat.designator);
-	tle.catnr=sat.catnum;
-	tle.epoch=(1000.0*(double)sat.year)+sat.refepoch;
-	tle.xndt2o=sat.drag;
-	tle.xndd6o=sat.nddot6;
-	tle.bstar=sat.bstar;
-	tle.xincl=sat.incl;
-	tle.xnodeo=sat.raan;
-	tle.eo=sat.eccn;
-	tle.omegao=sat.argper;
-	tle.xmo=sat.meanan;
-	tle.xno=sat.meanmo;
-	tle.revnum=sat.orbitnum;
-
-	if (sat_db.squintflag)
-	{
-		calc_squint=1;
-		alat=deg2rad*sat_db.alat;
-		alon=deg2rad*sat_db.alon;
-	}
-	else
-	{
-		calc_squint=0;
-	}
- 
+	strcpy(p->tle.sat_name,p->sat.name);
+	strcpy(p->tle.idesg,p->sat.designator);
+	p->tle.catnr=p->sat.catnum;
+	p->tle.epoch=(1000.0*(double)p->sat.year)+p->sat.refepoch;
+	p->tle.xndt2o=p->sat.drag;
+	p->tle.xndd6o=p->sat.nddot6;
+	p->tle.bstar=p->sat.bstar;
+	p->tle.xincl=p->sat.incl;
+	p->tle.xnodeo=p->sat.raan;
+	p->tle.eo=p->sat.eccn;
+	p->tle.omegao=p->sat.argper;
+	p->tle.xmo=p->sat.meanan;
+	p->tle.xno=p->sat.meanmo;
+	p->tle.revnum=p->sat.orbitnum;
+
 	/* Clear all flags */
 
-	ClearFlag(ALL_FLAGS);
+	ClearFlag(p, ALL_FLAGS);
 
 	/* Select ephemeris type.  This function will set or clear the
 	   DEEP_SPACE_EPHEM_FLAG depending on the TLE parameters of the
@@ -2930,12 +2714,31 @@ void PreCalc(int x)
 	   ephemeris functions SGP4 or SDP4, so this function must
 	   be called each time a new tle set is used. */
 
-	select_ephemeris(&tle);
+	select_ephemeris(p, &p->tle);
+}
+
+void CalcLook(predict_t *p)
+{
+	/* Satellite azimuth, elevation, range and range rate from the
+	   ground station for the satellite position found by the last
+	   CalcPosition().  Run again after ReadQTH() to look from
+	   another station without propagating again. */
+
+	vector_t obs_set;
+
+	Calculate_Obs(p->jul_utc, &p->sat_pos, &p->sat_velocity, &p->obs_geodetic, &obs_set);
+	p->sat_azi=Degrees(obs_set.x);
+	p->sat_ele=Degrees(obs_set.y);
+	p->sat_range=obs_set.z;
+	p->sat_range_rate=obs_set.w;
+	p->iel=(int)rint(p->sat_ele);
 }
 
-void Calc()
+void CalcPosition(predict_t *p)
 {
-	/* This is the stuff we need to do repetitively while tracking. */
+	/* This is the stuff we need to do repetitively while tracking:
+	   the satellite's position as seen from the ground station.
+	   CalcSun() adds the solar and eclipse data on top of this. */
 
 	/* Zero vector for initializations */
 	vector_t zero_vector={0,0,0,0};
@@ -2944,47 +2747,38 @@ void Calc()
 	vector_t vel=zero_vector;
 	vector_t pos=zero_vector;
 
-	/* Satellite Az, El, Range, Range rate */
-	vector_t obs_set;
-
-	/* Solar ECI position vector  */
-	vector_t solar_vector=zero_vector;
-
-	/* Solar observed azi and ele vector  */
-	vector_t solar_set;
-
 	/* Satellite's predicted geodetic position */
 	geodetic_t sat_geodetic;
 
-	jul_utc=daynum+2444238.5;
+	p->jul_utc=p->daynum+2444238.5;
 
 	/* Convert satellite's epoch time to Julian  */
 	/* and calculate time since epoch in minutes */
 
-	jul_epoch=Julian_Date_of_Epoch(tle.epoch);
-	tsince=(jul_utc-jul_epoch)*xmnpda;
-	age=jul_utc-jul_epoch;
+	p->jul_epoch=Julian_Date_of_Epoch(p->tle.epoch);
+	p->tsince=(p->jul_utc-p->jul_epoch)*xmnpda;
+	p->age=p->jul_utc-p->jul_epoch;
 
 	/* Copy the ephemeris type in use to ephem string. */
 
-		if (isFlagSet(DEEP_SPACE_EPHEM_FLAG))
+		if (isFlagSet(p, DEEP_SPACE_EPHEM_FLAG))
 		{
-			strcpy(ephem,"SDP4");
+			strcpy(p->ephem,"SDP4");
 		}
 		else
 		{
-			strcpy(ephem,"SGP4");
+			strcpy(p->ephem,"SGP4");
 		}
 
 	/* Call NORAD routines according to deep-space flag. */
 
-	if (isFlagSet(DEEP_SPACE_EPHEM_FLAG))
+	if (isFlagSet(p, DEEP_SPACE_EPHEM_FLAG))
 	{
-		SDP4(tsince, &tle, &pos, &vel);
+		SDP4(p, p->tsince, &p->tle, &pos, &vel);
 	}
 	else
 	{
-		SGP4(tsince, &tle, &pos, &vel);
+		SGP4(p, p->tsince, &p->tle, &pos, &vel);
 	}
 
 	/* Scale position and velocity vectors to km and km/sec */
@@ -2994,113 +2788,115 @@ void Calc()
 	/* Calculate velocity of satellite */
 
 	Magnitude(&vel);
-	sat_vel=vel.w;
+	p->sat_vel=vel.w;
 
 	/** All angles in rads. Distance in km. Velocity in km/s **/
 	/* Calculate satellite Azi, Ele, Range and Range-rate */
 
-	Calculate_Obs(jul_utc, &pos, &vel, &obs_geodetic, &obs_set);
+	p->sat_pos=pos;
+	p->sat_velocity=vel;
+	CalcLook(p);
 
 	/* Calculate satellite Lat North, Lon East and Alt. */
 
-	Calculate_LatLonAlt(jul_utc, &pos, &sat_geodetic);
+	Calculate_LatLonAlt(p->jul_utc, &pos, &sat_geodetic);
 
-	/* Calculate squint angle */
+	/* Convert satellite data */
+	p->sat_lat=Degrees(sat_geodetic.lat);
+	p->sat_lon=Degrees(sat_geodetic.lon);
+	p->sat_alt=sat_geodetic.alt;
 
-	if (calc_squint)
-	{
-		squint=(acos(-(ax*rx+ay*ry+az*rz)/obs_set.z))/deg2rad;
-	}
+	p->rv=(long)floor((p->tle.xno*xmnpda/twopi+p->age*p->tle.bstar*ae)*p->age+p->tle.xmo/twopi)+p->tle.revnum;
+}
+
+void CalcRates(predict_t *p)
+{
+	/* Azimuth and elevation rates (degrees/second) for the
+	   satellite position found by the last CalcPosition(). */
+
+	vector_t rates;
+
+	Calculate_Obs_Rates(p->jul_utc, &p->sat_pos, &p->sat_velocity, &p->obs_geodetic, &rates);
+	p->sat_azi_rate=Degrees(rates.x);
+	p->sat_ele_rate=Degrees(rates.y);
+}
+
+void CalcSun(predict_t *p)
+{
+	/* Solar position and satellite eclipse depth for the
+	   satellite position found by the last CalcPosition(). */
+
+	/* Zero vector for initializations */
+	vector_t zero_vector={0,0,0,0};
+
+	/* Solar ECI position vector  */
+	vector_t solar_vector=zero_vector;
+
+	/* Solar observed azi and ele vector  */
+	vector_t solar_set;
 
 	/* Calculate solar position and satellite eclipse depth. */
 	/* Also set or clear the satellite eclipsed flag accordingly. */
 
-	Calculate_Solar_Position(jul_utc, &solar_vector);
-	Calculate_Obs(jul_utc, &solar_vector, &zero_vector, &obs_geodetic, &solar_set);
+	Calculate_Solar_Position(p->jul_utc, &solar_vector);
+	Calculate_Obs(p->jul_utc, &solar_vector, &zero_vector, &p->obs_geodetic, &solar_set);
 
-	if (Sat_Eclipsed(&pos, &solar_vector, &eclipse_depth))
+	if (Sat_Eclipsed(&p->sat_pos, &solar_vector, &p->eclipse_depth))
 	{
-		SetFlag(SAT_ECLIPSED_FLAG);
+		SetFlag(p, SAT_ECLIPSED_FLAG);
 	}
 	else
 	{
-		ClearFlag(SAT_ECLIPSED_FLAG);
+		ClearFlag(p, SAT_ECLIPSED_FLAG);
 	}
 
-	if (isFlagSet(SAT_ECLIPSED_FLAG))
+	if (isFlagSet(p, SAT_ECLIPSED_FLAG))
 	{
-		sat_sun_status=0;  /* Eclipse */
+		p->sat_sun_status=0;  /* Eclipse */
 	}
 	else
 	{
-		sat_sun_status=1; /* In sunlight */
+		p->sat_sun_status=1; /* In sunlight */
 	}
 
-	/* Convert satellite and solar data */
-	sat_azi=Degrees(obs_set.x);
-	sat_ele=Degrees(obs_set.y);
-	sat_range=obs_set.z;
-	sat_range_rate=obs_set.w;
-	sat_lat=Degrees(sat_geodetic.lat);
-	sat_lon=Degrees(sat_geodetic.lon);
-	sat_alt=sat_geodetic.alt;
-
-	fk=12756.33*acos(xkmper/(xkmper+sat_alt));
-	fm=fk/1.609344;
-
-	rv=(long)floor((tle.xno*xmnpda/twopi+age*tle.bstar*ae)*age+tle.xmo/twopi)+tle.revnum;
-
-	sun_azi=Degrees(solar_set.x); 
-	sun_ele=Degrees(solar_set.y);
+	/* Convert solar data */
+	p->sun_azi=Degrees(solar_set.x); 
+	p->sun_ele=Degrees(solar_set.y);
+}
 
-	irk=(long)rint(sat_range);
-	isplat=(int)rint(sat_lat);
-	isplong=(int)rint(360.0-sat_lon);
-	iaz=(int)rint(sat_azi);
-	iel=(int)rint(sat_ele);
-	ma256=(int)rint(256.0*(phase/twopi));
+void Calc(predict_t *p)
+{
+	/* Everything PREDICT shows for the satellite at p->daynum. */
 
-	if (sat_sun_status)
-	{
-		if (sun_ele<=-12.0 && rint(sat_ele)>=0.0)
-		{
-			findsun='+';
-		}
-		else
-		{
-			findsun='*';
-		}
-	}
-	else
-	{
-		findsun=' ';
-	}
+	CalcPosition(p);
+	CalcSun(p);
+	p->fk=12756.33*acos(xkmper/(xkmper+p->sat_alt));
 }
 
-char AosHappens(int x)
+char AosHappens(predict_t *p)
 {
-	/* This function returns a 1 if the satellite pointed to by
-	   "x" can ever rise above the horizon of the ground station. */
+	/* This function returns a 1 if the satellite
+	   can ever rise above the horizon of the ground station. */
 
 	double lin, sma, apogee;
 
-	if (sat.meanmo==0.0)
+	if (p->sat.meanmo==0.0)
 	{
 		return 0;
 	}
 	else
 	{
-		lin=sat.incl;
+		lin=p->sat.incl;
 
 		if (lin>=90.0)
 		{
 			lin=180.0-lin;
 		}
 
-		sma=331.25*exp(log(1440.0/sat.meanmo)*(2.0/3.0));
-		apogee=sma*(1.0+sat.eccn)-xkmper;
+		sma=331.25*exp(log(1440.0/p->sat.meanmo)*(2.0/3.0));
+		apogee=sma*(1.0+p->sat.eccn)-xkmper;
 
-		if ((acos(xkmper/(apogee+xkmper))+(lin*deg2rad)) > fabs(qth.stnlat*deg2rad))
+		if ((acos(xkmper/(apogee+xkmper))+(lin*deg2rad)) > fabs(p->qth.stnlat*deg2rad))
 		{
 			return 1;
 		}
@@ -3111,12 +2907,11 @@ char AosHappens(int x)
 	}
 }
 
-char Decayed(int x, double time)
+char Decayed(predict_t *p, double time)
 {
 	/* This function returns a 1 if it appears that the
-	   satellite pointed to by 'x' has decayed at the
-	   time of 'time'.  If 'time' is 0.0, then the
-	   current date/time is used. */
+	   satellite has decayed at the time of 'time'.
+	   If 'time' is 0.0, then the current date/time is used. */
 
 	double satepoch;
 
@@ -3125,9 +2920,9 @@ char Decayed(int x, double time)
 		time=CurrentDaynum();
 	}
 
-	satepoch=DayNum(1,0,sat.year)+sat.refepoch;
+	satepoch=DayNum(1,0,p->sat.year)+p->sat.refepoch;
 
-	if (satepoch+((16.666666-sat.meanmo)/(10.0*fabs(sat.drag))) < time)
+	if (satepoch+((16.666666-p->sat.meanmo)/(10.0*fabs(p->sat.drag))) < time)
 	{
 		return 1;
 	}
@@ -3137,12 +2932,12 @@ char Decayed(int x, double time)
 	}
 }
 
-char Geostationary(int x)
+char Geostationary(predict_t *p)
 {
-	/* This function returns a 1 if the satellite pointed
-	   to by "x" appears to be in a geostationary orbit */
+	/* This function returns a 1 if the satellite
+	   appears to be in a geostationary orbit */
 
-	if (fabs(sat.meanmo-1.0027)<0.0002) 
+	if (fabs(p->sat.meanmo-1.0027)<0.0002) 
 	{
 		return 1;
 	}
@@ -3152,95 +2947,95 @@ char Geostationary(int x)
 	}
 }
 
-double FindAOS()
+double FindAOS(predict_t *p)
 {
 	/* This function finds and returns the time of AOS (aostime). */
 
-	aostime=0.0;
+	p->aostime=0.0;
 
-	if (AosHappens(indx) && Geostationary(indx)==0 && Decayed(indx,daynum)==0)
+	if (AosHappens(p) && Geostationary(p)==0 && Decayed(p,p->daynum)==0)
 	{
-		Calc();
+		CalcPosition(p);
 
 		/* Get the satellite in range */
 
-		while (sat_ele<-1.0)
+		while (p->sat_ele<-1.0)
 		{
-			daynum-=0.00035*(sat_ele*((sat_alt/8400.0)+0.46)-2.0);
-			Calc();
+			p->daynum-=0.00035*(p->sat_ele*((p->sat_alt/8400.0)+0.46)-2.0);
+			CalcPosition(p);
 		}
 
 		/* Find AOS */
 
-		while (aostime==0.0)
+		while (p->aostime==0.0)
 		{
-			if (fabs(sat_ele)<0.03)
+			if (fabs(p->sat_ele)<0.03)
 			{
-				aostime=daynum;
+				p->aostime=p->daynum;
 			}
 			else
 			{
-				daynum-=sat_ele*sqrt(sat_alt)/530000.0;
-				Calc();
+				p->daynum-=p->sat_ele*sqrt(p->sat_alt)/530000.0;
+				CalcPosition(p);
 			}
 		}
 	}
 
-	return aostime;
+	return p->aostime;
 }
 
-double FindLOS()
+double FindLOS(predict_t *p)
 {
-	lostime=0.0;
+	p->lostime=0.0;
 
-	if (Geostationary(indx)==0 && AosHappens(indx)==1 && Decayed(indx,daynum)==0)
+	if (Geostationary(p)==0 && AosHappens(p)==1 && Decayed(p,p->daynum)==0)
 	{
-		Calc();
+		CalcPosition(p);
 
 		do
 		{
-			daynum+=sat_ele*sqrt(sat_alt)/502500.0;
-			Calc();
+			p->daynum+=p->sat_ele*sqrt(p->sat_alt)/502500.0;
+			CalcPosition(p);
 
-			if (fabs(sat_ele) < 0.03)
+			if (fabs(p->sat_ele) < 0.03)
 			{
-				lostime=daynum;
+				p->lostime=p->daynum;
 			}
 
-		} while (lostime==0.0);
+		} while (p->lostime==0.0);
 	}
 
-	return lostime;
+	return p->lostime;
 }
 
-double FindLOS2()
+double FindLOS2(predict_t *p)
 {
 	/* This function steps through the pass to find LOS.
 	   FindLOS() is called to "fine tune" and return the result. */
 
 	do
 	{
-		daynum+=cos((sat_ele-1.0)*deg2rad)*sqrt(sat_alt)/25000.0;
-		Calc();
+		p->daynum+=cos((p->sat_ele-1.0)*deg2rad)*sqrt(p->sat_alt)/25000.0;
+		CalcPosition(p);
 
-	} while (sat_ele>=0.0);
+	} while (p->sat_ele>=0.0);
 
-	return(FindLOS());
+	return(FindLOS(p));
 }
 
-double NextAOS()
+double NextAOS(predict_t *p)
 {
 	/* This function finds and returns the time of the next
 	   AOS for a satellite that is currently in range. */
 
-	aostime=0.0;
+	p->aostime=0.0;
 
-	if (AosHappens(indx) && Geostationary(indx)==0 && Decayed(indx,daynum)==0)
+	if (AosHappens(p) && Geostationary(p)==0 && Decayed(p,p->daynum)==0)
 	{
-		daynum=FindLOS2()+0.014;  /* Move to LOS + 20 minutes */
+		p->daynum=FindLOS2(p)+0.014;  /* Move to LOS + 20 minutes */
 	}
 
-	return (FindAOS());
+	return (FindAOS(p));
 }
 
 // This function was extracted from SingleTrack and shows a number of derived parameters related
@@ -3250,105 +3045,1094 @@ double NextAOS()
 //       is convoluted and it's never come up in our usage.  FYI, the 'Edit Transponder Database'
 //       menu option is still marked "coming soon" :).  We'll add it back if there's demand.
 //
-int MakeObservation(double obs_time, struct observation * obs) {
-    char geostationary=0, aoshappens=0, decayed=0, visibility=0, sunlit;
-    double doppler100=0.0, delay;
+// Only touches the predictor passed in, so it may be called without holding the GIL.
+// PreCalc() must have been run once for the current element set; SGP4/SDP4 then reuse
+// their initialization from call to call.
+//
+// The satellite position fields are always filled in.  'extras' (OBS_* flags) picks which
+// of the more expensive fields are worked out as well; the rest are left zeroed.
+//
+int MakeObservation(predict_t *p, double obs_time, struct observation * obs, int extras) {
+    char geostationary=0, aoshappens=0, decayed=0, visibility=0, sunlit=0;
+    double doppler100=0.0;
+
+    memset(obs, 0, sizeof(*obs));
 
-    PreCalc(0);
-    indx=0;
+    // Deep() holds its lunar-solar periodics for 30 minutes.  Drop them so an observation
+    // doesn't depend on which times this predictor was asked for before.
+    p->deep.savtsn=1E20;
 
-    if (sat_db.transponders>0)
+    // Its resonance terms are integrated in half day steps on from the last time asked for.
+    // Stepping back gives slightly different rounding, so start again from epoch instead.
+    if (fabs((obs_time+2444238.5-Julian_Date_of_Epoch(p->tle.epoch))*xmnpda)<fabs(p->deep.atime))
     {
-        PyErr_SetString(PredictException, "pypredict does not support transponder definition.");
-        return -1;
+        p->deep.atime=0;
     }
 
-    daynum=obs_time;
-    aoshappens=AosHappens(indx);
-    geostationary=Geostationary(indx);
-    decayed=Decayed(indx,0.0);
+    p->daynum=obs_time;
+    if (extras & OBS_STATUS)
+    {
+        aoshappens=AosHappens(p);
+        geostationary=Geostationary(p);
+        decayed=Decayed(p,0.0);
+    }
 
     //Calcs
-    Calc();
-    fk=12756.33*acos(xkmper/(xkmper+sat_alt));
+    CalcPosition(p);
+    if (extras & OBS_FOOTPRINT)
+    {
+        p->fk=12756.33*acos(xkmper/(xkmper+p->sat_alt));
+    }
+
+    if (extras & OBS_RATES)
+    {
+        CalcRates(p);
+    }
 
-    if (sat_sun_status)
+    if (extras & OBS_SUNLIGHT)
     {
-        if (sun_ele<=-12.0 && sat_ele>=0.0) {
-            visibility='V';
+        CalcSun(p);
+        if (p->sat_sun_status)
+        {
+            if (p->sun_ele<=-12.0 && p->sat_ele>=0.0) {
+                visibility='V';
+            } else {
+                visibility='D';
+            }
         } else {
-            visibility='D';
+            visibility='N';
         }
-    } else {
-        visibility='N';
+        // gathering power seems much more useful than naked-eye visibility
+        sunlit = p->sat_sun_status;
+    }
+
+    doppler100=-100.0e06*((p->sat_range_rate*1000.0)/299792458.0);
+
+    // No moon data is returned, so FindMoon() isn't run here.
+
+    obs->norad_id = p->sat.catnum;
+    strncpy(obs->name, p->sat.name, sizeof(obs->name));
+    obs->epoch = (p->daynum+3651.0)*(86400.0); //See daynum=((start/86400.0)-3651.0);
+    obs->latitude = p->sat_lat;
+    obs->longitude = p->sat_lon;
+    obs->azimuth = p->sat_azi;
+    obs->elevation = p->sat_ele;
+    obs->orbital_velocity = 3600.0*p->sat_vel;
+    if (extras & OBS_FOOTPRINT)
+    {
+        obs->footprint = p->fk;
+    }
+    obs->altitude = p->sat_alt;
+    obs->slant_range = p->sat_range;
+    if (extras & OBS_SUNLIGHT)
+    {
+        obs->eclipse_depth = p->eclipse_depth/deg2rad;
     }
-    // gathering power seems much more useful than naked-eye visibility
-    sunlit = sat_sun_status;
-
-    doppler100=-100.0e06*((sat_range_rate*1000.0)/299792458.0);
-    delay=1000.0*((1000.0*sat_range)/299792458.0);
-
-    //TODO: Seems like FindSun(daynum) should go in here
-    FindMoon(daynum);
-
-    //printw(5+tshift,1,"Satellite     Direction     Velocity     Footprint    Altitude     Slant Range");
-    //printw(6+tshift,1,"---------     ---------     --------     ---------    --------     -----------");
-    //printw(7+tshift,1,"        .            Az           mi            mi          mi              mi");
-    //printw(8+tshift,1,"        .            El           km            km          km              km");
-    //printw(16+bshift,1,"Eclipse Depth   Orbital Phase   Orbital Model   Squint Angle      AutoTracking");
-    //printw(17+bshift,1,"-------------   -------------   -------------   ------------      ------------");
-
-    obs->norad_id = sat.catnum;
-    strncpy(&(obs->name), &(sat.name), sizeof(obs->name));
-    obs->epoch = (daynum+3651.0)*(86400.0); //See daynum=((start/86400.0)-3651.0);
-    obs->latitude = sat_lat;
-    obs->longitude = sat_lon;
-    obs->azimuth = sat_azi;
-    obs->elevation = sat_ele;
-    obs->orbital_velocity = 3600.0*sat_vel;
-    obs->footprint = fk;
-    obs->altitude = sat_alt;
-    obs->slant_range = sat_range;
-    obs->eclipse_depth = eclipse_depth/deg2rad;
-    obs->orbital_phase = 256.0*(phase/twopi);
-    strncpy(&(obs->orbital_model), &(ephem), sizeof(obs->orbital_model));
+    obs->orbital_phase = 256.0*(p->phase/twopi);
+    strncpy(obs->orbital_model, p->ephem, sizeof(obs->orbital_model));
     obs->visibility = visibility;
     obs->sunlit = sunlit;
-    obs->orbit = rv;
+    obs->orbit = p->rv;
     obs->geostationary = geostationary;
     obs->has_aos = aoshappens;
     obs->decayed = decayed;
     obs->doppler = doppler100;
+    if (extras & OBS_RATES)
+    {
+        obs->azimuth_rate = p->sat_azi_rate;
+        obs->elevation_rate = p->sat_ele_rate;
+    }
     return 0;
 }
 
-void PrintObservation(struct observation * obs) {
-    printf("NORAD_ID        %d\n", obs->norad_id);
-    printf("Name            %s\n", obs->name);
-    printf("Date(epoch)     %f\n", obs->epoch);
-    printf("Latitude(N)     %f\n", obs->latitude);
-    printf("Longitude(E)    %f\n", obs->longitude);
-    printf("Azimuth         %f\n", obs->azimuth);
-    printf("Elevation       %f\n", obs->elevation);
-    printf("Velocity        %f\n", obs->orbital_velocity);
-    printf("Footprint       %f\n", obs->footprint);
-    printf("Altitude(km)    %f\n", obs->altitude);
-    printf("Slant_Range(km) %f\n", obs->slant_range);
-    printf("Eclipse_Depth   %f\n", obs->eclipse_depth);
-    printf("Orbital_Phase   %f\n", obs->orbital_phase);
-    printf("Orbital_Model   %s\n", obs->orbital_model);
-    printf("Visibility      %c\n", obs->visibility);
-    printf("Sunlight        %d\n", obs->sunlit);
-    printf("Orbit_Number    %ld\n",obs->orbit);
-    printf("Geostationary   %d\n", obs->geostationary);
-    printf("AOS_Happens     %d\n", obs->has_aos);
-    printf("Decayed         %d\n", obs->decayed);
-    printf("Doppler         %f\n", obs->doppler);
+int AppendObservation(observation ** transit, size_t * count, size_t * capacity, observation * obs) {
+	observation * grown;
+
+	if (*count == *capacity)
+	{
+		*capacity = (*capacity == 0) ? 64 : 2 * (*capacity);
+		grown = realloc(*transit, (*capacity) * sizeof(observation));
+		if (grown == NULL)
+		{
+			return -1;
+		}
+		*transit = grown;
+	}
+	(*transit)[(*count)++] = *obs;
+	return 0;
 }
 
-PyObject * PythonifyObservation(observation * obs) {
-	//TODO: Add reference count?
-	return Py_BuildValue("{s:l,s:s,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:s,s:c,s:i,s:l,s:i,s:i,s:i,s:d}",
+// Walks the pass starting at (or after) p->daynum, appending observations to a growing
+// array.  Returns 0 on success, otherwise writes a description of the failure into
+// errbuff (at least 100 characters) and returns -1.  Does not touch any Python state.
+//
+int MakeTransit(predict_t *p, observation ** transit, size_t * count, char * errbuff) {
+	double now;
+	int lastel=0;
+	size_t capacity=0;
+	char datebuff[25];
+	observation obs = { 0 };
+
+	*transit=NULL;
+	*count=0;
+
+	now=CurrentDaynum();
+
+	//TODO: Seems like this should be based on the freshness of the TLE, not wall clock.
+	if ((p->daynum<now-365.0) || (p->daynum>now+365.0))
+	{
+		sprintf(errbuff, "time %s too far from present\n", Daynum2String(p->daynum, datebuff));
+		return -1;
+	}
+
+	MakeObservation(p, p->daynum, &obs, OBS_ALL);
+
+	if (!AosHappens(p))
+	{
+		sprintf(errbuff, "%lu does not rise above horizon. No AOS.\n", p->sat.catnum);
+		return -1;
+	}
+
+	if (Geostationary(p)!=0)
+	{
+		sprintf(errbuff, "%lu is geostationary.  Does not transit.\n", p->sat.catnum);
+		return -1;
+	}
+
+	if (Decayed(p,p->daynum)!=0)
+	{
+		sprintf(errbuff, "%lu has decayed. Cannot calculate transit.\n", p->sat.catnum);
+		return -1;
+	}
+
+	/* Make Predictions */
+	p->daynum=FindAOS(p);
+
+	/* Construct the pass */
+	while (p->iel>=0)
+	{
+		MakeObservation(p, p->daynum, &obs, OBS_ALL);
+
+		if (AppendObservation(transit, count, &capacity, &obs) != 0)
+		{
+			goto out_of_memory;
+		}
+		lastel=p->iel;
+		p->daynum+=cos((p->sat_ele-1.0)*deg2rad)*sqrt(p->sat_alt)/25000.0;
+		CalcPosition(p);
+	}
+
+	if (lastel!=0)
+	{
+		p->daynum=FindLOS(p);
+		//TODO: FindLOS can fail.  Detect and log warning that transit end is approximate.	
+		if (p->daynum > 0) {
+			MakeObservation(p, p->daynum, &obs, OBS_ALL);
+
+			if (AppendObservation(transit, count, &capacity, &obs) != 0)
+			{
+				goto out_of_memory;
+			}
+		}
+	}
+
+	return 0;
+
+out_of_memory:
+	free(*transit);
+	*transit=NULL;
+	*count=0;
+	sprintf(errbuff, "out of memory\n");
+	return -1;
+}
+
+/* .... Pass search .... */
+
+// Summary of one pass.  Times are daynums, angles are degrees.
+typedef struct {
+	double aos, los, tca, max_el, aos_az, los_az;
+} pass_summary;
+
+#define PASS_TOLERANCE (1.0e-3/86400.0)  /* 1 ms, in days */
+
+// Satellite elevation at 'daynum' (position only).  The SDP4 periodics are dropped as in
+// MakeObservation() so a search sees the same values as an observation would.
+static double ElevationAt(predict_t *p, double daynum)
+{
+	p->deep.savtsn=1E20;
+	p->daynum=daynum;
+	CalcPosition(p);
+	return p->sat_ele;
+}
+
+static double RangeRateAt(predict_t *p, double daynum)
+{
+	ElevationAt(p, daynum);
+	return p->sat_range_rate;
+}
+
+// Brent's method for a root of fn in [a,b], where fa=fn(a) and fb=fn(b) bracket zero.
+static double BrentRoot(predict_t *p, double (*fn)(predict_t *, double),
+	double a, double b, double fa, double fb, double tol)
+{
+	double c=a, fc=fa, d=b-a, e=d, m, tol1, ratio, pp, q, r;
+	int iter;
+
+	for (iter=0; iter<100; iter++)
+	{
+		if ((fb>0.0 && fc>0.0) || (fb<0.0 && fc<0.0))
+		{
+			c=a;
+			fc=fa;
+			d=e=b-a;
+		}
+		if (fabs(fc)<fabs(fb))
+		{
+			a=b; b=c; c=a;
+			fa=fb; fb=fc; fc=fa;
+		}
+
+		tol1=2.0*DBL_EPSILON*fabs(b)+0.5*tol;
+		m=0.5*(c-b);
+		if (fabs(m)<=tol1 || fb==0.0)
+		{
+			break;
+		}
+
+		if (fabs(e)>=tol1 && fabs(fa)>fabs(fb))
+		{
+			/* Try inverse quadratic interpolation (secant if only two points) */
+			ratio=fb/fa;
+			if (a==c)
+			{
+				pp=2.0*m*ratio;
+				q=1.0-ratio;
+			}
+			else
+			{
+				q=fa/fc;
+				r=fb/fc;
+				pp=ratio*(2.0*m*q*(q-r)-(b-a)*(r-1.0));
+				q=(q-1.0)*(r-1.0)*(ratio-1.0);
+			}
+			if (pp>0.0)
+			{
+				q=-q;
+			}
+			else
+			{
+				pp=-pp;
+			}
+			if (2.0*pp<fmin(3.0*m*q-fabs(tol1*q), fabs(e*q)))
+			{
+				e=d;
+				d=pp/q;
+			}
+			else
+			{
+				d=m;
+				e=m;
+			}
+		}
+		else
+		{
+			/* Bisect */
+			d=m;
+			e=m;
+		}
+
+		a=b;
+		fa=fb;
+		b+=(fabs(d)>tol1) ? d : ((m>0.0) ? tol1 : -tol1);
+		fb=fn(p,b);
+	}
+
+	return b;
+}
+
+// Brent's method for the maximum of fn in [a,b] (golden section search with parabolic
+// steps), returning where it is and its value in fmax.
+static double BrentMax(predict_t *p, double (*fn)(predict_t *, double),
+	double a, double b, double tol, double *fmax)
+{
+	const double cgold=0.3819660112501051;
+	double x, w, v, fx, fw, fv, u, fu, d=0.0, e=0.0, m, tol1, tol2, r, q, pp;
+	int iter;
+
+	/* Minimizes -fn */
+	x=w=v=a+cgold*(b-a);
+	fx=fw=fv=-fn(p,x);
+
+	for (iter=0; iter<100; iter++)
+	{
+		m=0.5*(a+b);
+		tol1=2.0*DBL_EPSILON*fabs(x)+tol/3.0;
+		tol2=2.0*tol1;
+		if (fabs(x-m)<=tol2-0.5*(b-a))
+		{
+			break;
+		}
+
+		if (fabs(e)>tol1)
+		{
+			/* Try a parabola through x, w and v */
+			r=(x-w)*(fx-fv);
+			q=(x-v)*(fx-fw);
+			pp=(x-v)*q-(x-w)*r;
+			q=2.0*(q-r);
+			if (q>0.0)
+			{
+				pp=-pp;
+			}
+			else
+			{
+				q=-q;
+			}
+			r=e;
+			e=d;
+			if (fabs(pp)>=fabs(0.5*q*r) || pp<=q*(a-x) || pp>=q*(b-x))
+			{
+				e=(x>=m) ? a-x : b-x;
+				d=cgold*e;
+			}
+			else
+			{
+				d=pp/q;
+				u=x+d;
+				if (u-a<tol2 || b-u<tol2)
+				{
+					d=(m>x) ? tol1 : -tol1;
+				}
+			}
+		}
+		else
+		{
+			/* Golden section step */
+			e=(x>=m) ? a-x : b-x;
+			d=cgold*e;
+		}
+
+		u=(fabs(d)>=tol1) ? x+d : x+((d>0.0) ? tol1 : -tol1);
+		fu=-fn(p,u);
+		if (fu<=fx)
+		{
+			if (u>=x)
+			{
+				a=x;
+			}
+			else
+			{
+				b=x;
+			}
+			v=w; fv=fw;
+			w=x; fw=fx;
+			x=u; fx=fu;
+		}
+		else
+		{
+			if (u<x)
+			{
+				a=u;
+			}
+			else
+			{
+				b=u;
+			}
+			if (fu<=fw || w==x)
+			{
+				v=w; fv=fw;
+				w=u; fw=fu;
+			}
+			else if (fu<=fv || v==x || v==w)
+			{
+				v=u; fv=fu;
+			}
+		}
+	}
+
+	*fmax=-fx;
+	return x;
+}
+
+// Finds the time of highest elevation between 'start' and 'end' (daynums), which should span
+// no more than one pass.  The interval is stepped through as in FindLOS2 to bracket the peak
+// between the samples either side of the highest one, and the peak is then refined with
+// BrentMax() to within 'tol' days.  The elevation there is returned in max_el.
+double FindPeak(predict_t *p, double start, double end, double tol, double *max_el)
+{
+	double t=start, t_prev, el, t_best=start, el_best, a=start, b=start, peak, el_peak;
+	char bracketing=1;
+
+	el=el_best=ElevationAt(p, start);
+	while (t<end)
+	{
+		t_prev=t;
+		t=fmin(t+cos((el-1.0)*deg2rad)*sqrt(p->sat_alt)/25000.0, end);
+		el=ElevationAt(p, t);
+		if (el>el_best)
+		{
+			el_best=el;
+			t_best=t;
+			a=t_prev;
+			bracketing=1;
+		}
+		else if (bracketing)
+		{
+			/* First sample after the highest so far closes the bracket */
+			b=t;
+			bracketing=0;
+		}
+	}
+	if (bracketing)
+	{
+		b=end;
+	}
+
+	if (b>a)
+	{
+		peak=BrentMax(p, ElevationAt, a, b, tol, &el_peak);
+		if (el_peak>el_best)
+		{
+			el_best=el_peak;
+			t_best=peak;
+		}
+	}
+
+	*max_el=el_best;
+	return t_best;
+}
+
+// Magnitudes of the azimuth and elevation rates at 'daynum', for BrentMax()
+static double AzRateAt(predict_t *p, double daynum)
+{
+	ElevationAt(p, daynum);
+	CalcRates(p);
+	return fabs(p->sat_azi_rate);
+}
+
+static double ElRateAt(predict_t *p, double daynum)
+{
+	ElevationAt(p, daynum);
+	CalcRates(p);
+	return fabs(p->sat_ele_rate);
+}
+
+// Finds the fastest azimuth and elevation rates (degrees/second) the rotor would need between
+// 'start' and 'end' (daynums), normally one pass.  The interval is sampled every 10 seconds (at
+// least 20 samples) and the largest of each rate is refined with BrentMax() between the samples
+// either side of it, so a sharp peak such as the azimuth rate of a nearly overhead pass is
+// found without sampling the whole pass finely.
+void MaxRates(predict_t *p, double start, double end, double *max_az_rate, double *max_el_rate)
+{
+	double step=fmin(10.0/86400.0, (end-start)/20.0), t, az_rate, el_rate, az_best=-1.0,
+		el_best=-1.0, t_az=start, t_el=start, peak;
+	int i, n;
+
+	n=(step>0.0) ? (int)ceil((end-start)/step) : 0;
+	for (i=0; i<=n; i++)
+	{
+		t=fmin(start+i*step, end);
+		az_rate=AzRateAt(p, t);
+		el_rate=fabs(p->sat_ele_rate);
+		if (az_rate>az_best)
+		{
+			az_best=az_rate;
+			t_az=t;
+		}
+		if (el_rate>el_best)
+		{
+			el_best=el_rate;
+			t_el=t;
+		}
+	}
+
+	if (n>0)
+	{
+		BrentMax(p, AzRateAt, fmax(t_az-step, start), fmin(t_az+step, end), PASS_TOLERANCE, &peak);
+		az_best=fmax(az_best, peak);
+		BrentMax(p, ElRateAt, fmax(t_el-step, start), fmin(t_el+step, end), PASS_TOLERANCE, &peak);
+		el_best=fmax(el_best, peak);
+	}
+
+	*max_az_rate=az_best;
+	*max_el_rate=el_best;
+}
+
+// Eclipse depth (radians) at 'daynum', as found by CalcSun(): positive while the satellite is
+// eclipsed and negative in sunlight, changing smoothly in between, so BrentRoot() and
+// BrentMax() can be used on it.
+static double EclipseDepthAt(predict_t *p, double daynum)
+{
+	vector_t solar_vector={0,0,0,0};
+	double depth;
+
+	ElevationAt(p, daynum);
+	Calculate_Solar_Position(p->jul_utc, &solar_vector);
+	Sat_Eclipsed(&p->sat_pos, &solar_vector, &depth);
+	return depth;
+}
+
+// One eclipse.  Times are daynums.
+typedef struct {
+	double enter, exit;
+} eclipse_interval;
+
+static int AddEclipse(eclipse_interval **eclipses, size_t *count, size_t *capacity,
+	double enter, double exit)
+{
+	eclipse_interval *grown;
+
+	if (*count==*capacity)
+	{
+		*capacity=*capacity ? 2*(*capacity) : 16;
+		grown=realloc(*eclipses, (*capacity)*sizeof(eclipse_interval));
+		if (grown==NULL)
+		{
+			return -1;
+		}
+		*eclipses=grown;
+	}
+	(*eclipses)[*count].enter=enter;
+	(*eclipses)[*count].exit=exit;
+	(*count)++;
+	return 0;
+}
+
+// Finds every eclipse of the satellite between 'start' and 'end' (daynums).  The eclipse
+// depth is sampled 60 times an orbit (at least every 5 minutes) and each change of sign is
+// refined with BrentRoot() to within PASS_TOLERANCE.  A short eclipse could fall between two
+// samples, so wherever the samples have a local maximum in sunlight the peak is found with
+// BrentMax() and checked too.  Eclipses in progress at 'start' or 'end' are cut off there.
+// Returns 0 with a malloc'd array in *eclipses (which the caller frees), or -1 with a
+// description of the failure in errbuff.  Does not touch any Python state.
+//
+int FindEclipses(predict_t *p, double start, double end, eclipse_interval **eclipses,
+	size_t *count, char *errbuff) {
+	double step=300.0/86400.0, t=start, d, t_prev=start, d_prev=0.0, t_prev2, d_prev2,
+		enter=start, peak, d_peak;
+	size_t capacity=0;
+	char in_eclipse, sampled=0;
+	int status=0;
+
+	*eclipses=NULL;
+	*count=0;
+	if (p->sat.meanmo>0.0)
+	{
+		step=fmin(step, 1.0/(60.0*p->sat.meanmo));
+	}
+
+	d=EclipseDepthAt(p, start);
+	in_eclipse=(d>=0.0);
+	while (t<end && status==0)
+	{
+		t_prev2=t_prev;
+		d_prev2=d_prev;
+		t_prev=t;
+		d_prev=d;
+		t=fmin(t+step, end);
+		d=EclipseDepthAt(p, t);
+
+		if (d_prev<0.0 && d>=0.0)
+		{
+			enter=BrentRoot(p, EclipseDepthAt, t_prev, t, d_prev, d, PASS_TOLERANCE);
+			in_eclipse=1;
+		}
+		else if (d_prev>=0.0 && d<0.0)
+		{
+			status=AddEclipse(eclipses, count, &capacity, enter,
+				BrentRoot(p, EclipseDepthAt, t_prev, t, d_prev, d, PASS_TOLERANCE));
+			in_eclipse=0;
+		}
+		else if (sampled && d<0.0 && d_prev2<d_prev && d_prev>d)
+		{
+			/* Sunlight at three samples, closest to eclipse at the middle one */
+			peak=BrentMax(p, EclipseDepthAt, t_prev2, t, PASS_TOLERANCE, &d_peak);
+			if (d_peak>=0.0)
+			{
+				status=AddEclipse(eclipses, count, &capacity,
+					BrentRoot(p, EclipseDepthAt, t_prev2, peak, d_prev2, d_peak, PASS_TOLERANCE),
+					BrentRoot(p, EclipseDepthAt, peak, t, d_peak, d, PASS_TOLERANCE));
+			}
+		}
+		sampled=1;
+	}
+	if (in_eclipse && status==0)
+	{
+		status=AddEclipse(eclipses, count, &capacity, enter, end);
+	}
+
+	if (status<0)
+	{
+		free(*eclipses);
+		*eclipses=NULL;
+		*count=0;
+		sprintf(errbuff, "out of memory\n");
+		return -1;
+	}
+	return 0;
+}
+
+// Finds the pass in progress at 'start', or else the next one to begin before 'end'.  The
+// elevation zero crossings are bracketed with PREDICT's stepping (as in FindAOS/FindLOS2)
+// and refined with Brent's method; TCA is where the range rate changes sign.  max_el comes
+// from FindPeak(), since for high orbits closest approach is not the highest point.  Returns 0
+// with 'pass' filled in, 1 if no pass begins before 'end', or -1 with a description of the
+// failure in errbuff (at least 100 characters).  Does not touch any Python state.
+//
+int FindPass(predict_t *p, double start, double end, pass_summary *pass, char *errbuff) {
+	double t=start, el, t_up, el_up, t_prev, el_prev=0.0, rr, rr_prev, tca_a=0.0, tca_b=0.0,
+		rr_a=0.0, rr_b=0.0, step;
+	char found_tca=0;
+
+	p->daynum=start;
+	if (!AosHappens(p))
+	{
+		sprintf(errbuff, "%lu does not rise above horizon. No AOS.\n", p->sat.catnum);
+		return -1;
+	}
+
+	if (Geostationary(p)!=0)
+	{
+		sprintf(errbuff, "%lu is geostationary.  Does not transit.\n", p->sat.catnum);
+		return -1;
+	}
+
+	if (Decayed(p,start)!=0)
+	{
+		sprintf(errbuff, "%lu has decayed. Cannot calculate transit.\n", p->sat.catnum);
+		return -1;
+	}
+
+	/* Bracket AOS between a point below the horizon and one (t_up) at or above it */
+	el=ElevationAt(p, start);
+	if (el>=0.0)
+	{
+		/* Already in a pass: step back, doubling the step, until below the horizon */
+		t_up=start;
+		el_up=el;
+		step=1.0/1440.0;
+		do
+		{
+			t_prev=t_up;
+			el_prev=el_up;
+			t=t_prev-step;
+			el=ElevationAt(p, t);
+			if (el>=0.0)
+			{
+				t_up=t;
+				el_up=el;
+			}
+			step*=2.0;
+		} while (el>=0.0 && start-t<2.0);
+
+		if (el>=0.0)
+		{
+			sprintf(errbuff, "%lu does not set. Cannot calculate transit.\n", p->sat.catnum);
+			return -1;
+		}
+	}
+	else
+	{
+		/* Step forward (as in FindAOS) until at or above the horizon */
+		t_up=start;
+		el_up=el;
+		do
+		{
+			if (t_up>end)
+			{
+				return 1;
+			}
+			t=t_up;
+			el=el_up;
+			t_up-=0.00035*(el*((p->sat_alt/8400.0)+0.46)-2.0);
+			el_up=ElevationAt(p, t_up);
+		} while (el_up<0.0);
+	}
+	pass->aos=BrentRoot(p, ElevationAt, t, t_up, el, el_up, PASS_TOLERANCE);
+	if (pass->aos>end)
+	{
+		return 1;
+	}
+	ElevationAt(p, pass->aos);
+	pass->aos_az=p->sat_azi;
+
+	/* Step through the pass (as in FindLOS2) to bracket LOS and the range rate sign change */
+	rr_prev=RangeRateAt(p, pass->aos);
+	t_prev=pass->aos;
+	t=t_up;
+	el=el_up;
+	do
+	{
+		rr=RangeRateAt(p, t);
+		if (!found_tca && rr_prev<=0.0 && rr>0.0)
+		{
+			tca_a=t_prev;
+			tca_b=t;
+			rr_a=rr_prev;
+			rr_b=rr;
+			found_tca=1;
+		}
+		if (el<0.0)
+		{
+			break;
+		}
+
+		t_prev=t;
+		el_prev=el;
+		rr_prev=rr;
+		t+=cos((el-1.0)*deg2rad)*sqrt(p->sat_alt)/25000.0;
+		el=ElevationAt(p, t);
+	} while (t-pass->aos<2.0);
+
+	if (el>=0.0)
+	{
+		sprintf(errbuff, "%lu does not set. Cannot calculate transit.\n", p->sat.catnum);
+		return -1;
+	}
+	pass->los=BrentRoot(p, ElevationAt, t_prev, t, el_prev, el, PASS_TOLERANCE);
+	ElevationAt(p, pass->los);
+	pass->los_az=p->sat_azi;
+
+	if (found_tca)
+	{
+		pass->tca=BrentRoot(p, RangeRateAt, tca_a, tca_b, rr_a, rr_b, PASS_TOLERANCE);
+	}
+	else
+	{
+		/* Receding for the whole pass, or approaching for all of it */
+		pass->tca=(RangeRateAt(p, pass->aos)>0.0) ? pass->aos : pass->los;
+	}
+	FindPeak(p, pass->aos, pass->los, PASS_TOLERANCE, &pass->max_el);
+
+	return 0;
+}
+
+// Finds every pass in progress at or beginning between 'start' and 'end' (daynums) that
+// reaches 'min_el' degrees, continuing the search from each LOS with the same predictor.
+// Returns 0 with a malloc'd array in *passes (which the caller frees), or -1 with a
+// description of the failure in errbuff.  Does not touch any Python state.
+//
+int FindPasses(predict_t *p, double start, double end, double min_el,
+	pass_summary **passes, size_t *count, char *errbuff) {
+	size_t capacity=0;
+	pass_summary pass, *grown;
+	int status;
+
+	*passes=NULL;
+	*count=0;
+
+	while ((status=FindPass(p, start, end, &pass, errbuff)) == 0)
+	{
+		if (pass.max_el>=min_el)
+		{
+			if (*count==capacity)
+			{
+				capacity=capacity ? 2*capacity : 16;
+				grown=realloc(*passes, capacity*sizeof(pass_summary));
+				if (grown==NULL)
+				{
+					free(*passes);
+					*passes=NULL;
+					*count=0;
+					sprintf(errbuff, "out of memory\n");
+					return -1;
+				}
+				*passes=grown;
+			}
+			(*passes)[(*count)++]=pass;
+		}
+		start=pass.los+1.0/86400.0;  /* One second past LOS */
+	}
+
+	if (status<0)
+	{
+		free(*passes);
+		*passes=NULL;
+		*count=0;
+		return -1;
+	}
+	return 0;
+}
+
+/* .... Several ground stations .... */
+
+// A pass over one of several stations.
+typedef struct {
+	pass_summary pass;
+	int station;
+} station_pass;
+
+// Search state of one station in FindStationPasses()
+typedef struct {
+	double el, rr, t_prev, el_prev, rr_prev, skip, tca_a, tca_b, rr_a, rr_b;
+	pass_summary pass;
+	char active, seen, up, found_tca, done;
+} station_search;
+
+static int AddStationPass(station_pass **passes, size_t *count, size_t *capacity,
+	pass_summary *pass, int station)
+{
+	station_pass *grown;
+
+	if (*count==*capacity)
+	{
+		*capacity=*capacity ? 2*(*capacity) : 16;
+		grown=realloc(*passes, (*capacity)*sizeof(station_pass));
+		if (grown==NULL)
+		{
+			return -1;
+		}
+		*passes=grown;
+	}
+	(*passes)[*count].pass=*pass;
+	(*passes)[*count].station=station;
+	(*count)++;
+	return 0;
+}
+
+static int CompareStationPasses(const void *a, const void *b)
+{
+	const station_pass *x=a, *y=b;
+
+	if (x->pass.aos!=y->pass.aos)
+	{
+		return (x->pass.aos<y->pass.aos) ? -1 : 1;
+	}
+	return x->station-y->station;
+}
+
+// Finds every pass over any of 'n' stations in progress at 'start' or beginning before 'end'
+// that reaches 'min_el' degrees, sorted by AOS.  Time is stepped through once for all the
+// stations, propagating the satellite once a step and only working out the look angles for
+// each station.  The step is the smallest PREDICT would take for any of them (as in
+// FindPass()), and each horizon crossing, range rate sign change and peak is refined for its
+// own station as in FindPass(), so the passes agree with it to within PASS_TOLERANCE.
+// Stations the satellite never rises above get no passes.  Returns 0 with a malloc'd array
+// in *passes (which the caller frees), or -1 with a description of the failure in errbuff.
+// Leaves the predictor at the last station.  Does not touch any Python state.
+//
+int FindStationPasses(predict_t *p, const qth_t *stations, int n, double start, double end,
+	double min_el, station_pass **passes, size_t *count, char *errbuff) {
+	station_search *search, *st;
+	pass_summary pass;
+	size_t capacity=0;
+	double t=start, step, alt;
+	int k, active=0, status=0, pending;
+
+	*passes=NULL;
+	*count=0;
+
+	p->daynum=start;
+	if (Geostationary(p)!=0)
+	{
+		sprintf(errbuff, "%lu is geostationary.  Does not transit.\n", p->sat.catnum);
+		return -1;
+	}
+	if (Decayed(p,start)!=0)
+	{
+		sprintf(errbuff, "%lu has decayed. Cannot calculate transit.\n", p->sat.catnum);
+		return -1;
+	}
+
+	search=calloc(n>0 ? n : 1, sizeof(station_search));
+	if (search==NULL)
+	{
+		sprintf(errbuff, "out of memory\n");
+		return -1;
+	}
+
+	/* Stations already in a pass at 'start' find it as FindPass() does, and join in after its LOS */
+	for (k=0; k<n && status==0; k++)
+	{
+		st=&search[k];
+		ReadQTH(p, stations[k].stnlat, stations[k].stnlong, stations[k].stnalt);
+		if (!AosHappens(p))
+		{
+			continue;
+		}
+		st->active=1;
+		active++;
+		st->skip=start;
+		if (ElevationAt(p, start)>=0.0)
+		{
+			status=FindPass(p, start, end, &pass, errbuff);
+			if (status>0)
+			{
+				status=0;  /* Can't happen for a pass in progress */
+			}
+			else if (status==0)
+			{
+				if (pass.max_el>=min_el &&
+					AddStationPass(passes, count, &capacity, &pass, k)!=0)
+				{
+					status=-2;
+				}
+				st->skip=pass.los+1.0/86400.0;  /* One second past LOS */
+			}
+		}
+	}
+	if (status==0 && active==0)
+	{
+		sprintf(errbuff, "%lu does not rise above horizon. No AOS.\n", p->sat.catnum);
+		status=-1;
+	}
+
+	pending=active;
+	while (status==0 && pending>0)
+	{
+		/* Propagate once, then look from every station */
+		p->deep.savtsn=1E20;
+		p->daynum=t;
+		CalcPosition(p);
+		alt=p->sat_alt;
+		for (k=0; k<n; k++)
+		{
+			if (search[k].active && !search[k].done && t>=search[k].skip)
+			{
+				ReadQTH(p, stations[k].stnlat, stations[k].stnlong, stations[k].stnalt);
+				CalcLook(p);
+				search[k].el=p->sat_ele;
+				search[k].rr=p->sat_range_rate;
+			}
+		}
+		step=0.5;
+
+		for (k=0; k<n && status==0; k++)
+		{
+			st=&search[k];
+			if (!st->active || st->done)
+			{
+				continue;
+			}
+			if (t<st->skip)
+			{
+				step=fmin(step, st->skip-t);
+				continue;
+			}
+			if (st->seen && !st->up && st->el_prev<0.0 && st->el>=0.0)
+			{
+				/* Rising: AOS, then the range rate there for the TCA bracket */
+				ReadQTH(p, stations[k].stnlat, stations[k].stnlong, stations[k].stnalt);
+				st->pass.aos=BrentRoot(p, ElevationAt, st->t_prev, t, st->el_prev, st->el, PASS_TOLERANCE);
+				if (st->pass.aos>end)
+				{
+					st->done=1;
+					pending--;
+					continue;
+				}
+				ElevationAt(p, st->pass.aos);
+				st->pass.aos_az=p->sat_azi;
+				st->t_prev=st->pass.aos;
+				st->rr_prev=RangeRateAt(p, st->pass.aos);
+				st->up=1;
+				st->found_tca=0;
+			}
+			if (st->up)
+			{
+				if (!st->found_tca && st->rr_prev<=0.0 && st->rr>0.0)
+				{
+					st->tca_a=st->t_prev;
+					st->tca_b=t;
+					st->rr_a=st->rr_prev;
+					st->rr_b=st->rr;
+					st->found_tca=1;
+				}
+				if (st->el<0.0)
+				{
+					/* Setting: LOS, TCA and peak for this station */
+					ReadQTH(p, stations[k].stnlat, stations[k].stnlong, stations[k].stnalt);
+					st->pass.los=BrentRoot(p, ElevationAt, st->t_prev, t, st->el_prev, st->el, PASS_TOLERANCE);
+					ElevationAt(p, st->pass.los);
+					st->pass.los_az=p->sat_azi;
+					if (st->found_tca)
+					{
+						st->pass.tca=BrentRoot(p, RangeRateAt, st->tca_a, st->tca_b, st->rr_a, st->rr_b, PASS_TOLERANCE);
+					}
+					else
+					{
+						st->pass.tca=(RangeRateAt(p, st->pass.aos)>0.0) ? st->pass.aos : st->pass.los;
+					}
+					FindPeak(p, st->pass.aos, st->pass.los, PASS_TOLERANCE, &st->pass.max_el);
+					if (st->pass.max_el>=min_el &&
+						AddStationPass(passes, count, &capacity, &st->pass, k)!=0)
+					{
+						status=-2;
+					}
+					st->up=0;
+				}
+				else if (t-st->pass.aos>=2.0)
+				{
+					sprintf(errbuff, "%lu does not set. Cannot calculate transit.\n", p->sat.catnum);
+					status=-1;
+				}
+			}
+			else if (t>end)
+			{
+				st->done=1;
+				pending--;
+				continue;
+			}
+			st->seen=1;
+			st->t_prev=t;
+			st->el_prev=st->el;
+			st->rr_prev=st->rr;
+
+			/* The step FindPass() would take for this station */
+			if (st->up)
+			{
+				step=fmin(step, cos((st->el-1.0)*deg2rad)*sqrt(alt)/25000.0);
+			}
+			else
+			{
+				step=fmin(step, -0.00035*(st->el*((alt/8400.0)+0.46)-2.0));
+			}
+		}
+		t+=fmax(step, PASS_TOLERANCE);
+	}
+	free(search);
+
+	if (status==-2)
+	{
+		sprintf(errbuff, "out of memory\n");
+	}
+	if (status!=0)
+	{
+		free(*passes);
+		*passes=NULL;
+		*count=0;
+		return -1;
+	}
+	qsort(*passes, *count, sizeof(station_pass), CompareStationPasses);
+	return 0;
+}
+
+void PrintObservation(struct observation * obs) {
+    printf("NORAD_ID        %ld\n", obs->norad_id);
+    printf("Name            %s\n", obs->name);
+    printf("Date(epoch)     %f\n", obs->epoch);
+    printf("Latitude(N)     %f\n", obs->latitude);
+    printf("Longitude(E)    %f\n", obs->longitude);
+    printf("Azimuth         %f\n", obs->azimuth);
+    printf("Elevation       %f\n", obs->elevation);
+    printf("Velocity        %f\n", obs->orbital_velocity);
+    printf("Footprint       %f\n", obs->footprint);
+    printf("Altitude(km)    %f\n", obs->altitude);
+    printf("Slant_Range(km) %f\n", obs->slant_range);
+    printf("Eclipse_Depth   %f\n", obs->eclipse_depth);
+    printf("Orbital_Phase   %f\n", obs->orbital_phase);
+    printf("Orbital_Model   %s\n", obs->orbital_model);
+    printf("Visibility      %c\n", obs->visibility);
+    printf("Sunlight        %d\n", obs->sunlit);
+    printf("Orbit_Number    %ld\n",obs->orbit);
+    printf("Geostationary   %d\n", obs->geostationary);
+    printf("AOS_Happens     %d\n", obs->has_aos);
+    printf("Decayed         %d\n", obs->decayed);
+    printf("Doppler         %f\n", obs->doppler);
+}
+
+PyObject * PythonifyObservation(observation * obs) {
+	//TODO: Add reference count?
+	return Py_BuildValue("{s:l,s:s,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:d,s:s,s:c,s:i,s:l,s:i,s:i,s:i,s:d,s:d,s:d}",
 		"norad_id", obs->norad_id,
 		"name", obs->name,
 		"epoch", obs->epoch,
@@ -3369,215 +4153,1729 @@ PyObject * PythonifyObservation(observation * obs) {
 		"geostationary", obs->geostationary,
 		"has_aos", obs->has_aos,
 		"decayed", obs->decayed,
-		"doppler", obs->doppler
+		"doppler", obs->doppler,
+		"azimuth_rate", obs->azimuth_rate,
+		"elevation_rate", obs->elevation_rate
 	);
 }
 
-char load(PyObject *args)
-{
-	//TODO: Not threadsafe, detect and raise warning?
-	int x;
-	char *env=NULL;
+// Observation fields by name, in the order PythonifyObservation builds them, with the
+// MakeObservation() extras each one needs.
+static const struct {
+	const char *name;
+	int extras;
+} observation_fields[] = {
+	{"norad_id", 0}, {"name", 0}, {"epoch", 0}, {"latitude", 0}, {"longitude", 0},
+	{"azimuth", 0}, {"elevation", 0}, {"orbital_velocity", 0}, {"footprint", OBS_FOOTPRINT},
+	{"altitude", 0}, {"slant_range", 0}, {"eclipse_depth", OBS_SUNLIGHT}, {"orbital_phase", 0},
+	{"orbital_model", 0}, {"visibility", OBS_SUNLIGHT}, {"sunlit", OBS_SUNLIGHT}, {"orbit", 0},
+	{"geostationary", OBS_STATUS}, {"has_aos", OBS_STATUS}, {"decayed", OBS_STATUS},
+	{"doppler", 0}, {"azimuth_rate", OBS_RATES}, {"elevation_rate", OBS_RATES}, {NULL, 0}
+};
+
+// Index into observation_fields for a field name, or -1 with a KeyError set.
+static int ObservationFieldIndex(PyObject *name)
+{
+	const char *field;
+	int i;
+
+	field = PyUnicode_AsUTF8(name);
+	if (field == NULL)
+	{
+		return -1;
+	}
+	for (i=0; observation_fields[i].name != NULL; i++)
+	{
+		if (strcmp(field, observation_fields[i].name) == 0)
+		{
+			return i;
+		}
+	}
+	PyErr_Format(PyExc_KeyError, "unknown observation field '%s'", field);
+	return -1;
+}
+
+// A single observation field as a Python value, typed as in PythonifyObservation.
+static PyObject *PythonifyObservationField(observation * obs, int index)
+{
+	switch (index)
+	{
+		case 0:  return PyLong_FromLong(obs->norad_id);
+		case 1:  return PyUnicode_FromString(obs->name);
+		case 2:  return PyFloat_FromDouble(obs->epoch);
+		case 3:  return PyFloat_FromDouble(obs->latitude);
+		case 4:  return PyFloat_FromDouble(obs->longitude);
+		case 5:  return PyFloat_FromDouble(obs->azimuth);
+		case 6:  return PyFloat_FromDouble(obs->elevation);
+		case 7:  return PyFloat_FromDouble(obs->orbital_velocity);
+		case 8:  return PyFloat_FromDouble(obs->footprint);
+		case 9:  return PyFloat_FromDouble(obs->altitude);
+		case 10: return PyFloat_FromDouble(obs->slant_range);
+		case 11: return PyFloat_FromDouble(obs->eclipse_depth);
+		case 12: return PyFloat_FromDouble(obs->orbital_phase);
+		case 13: return PyUnicode_FromString(obs->orbital_model);
+		case 14: return PyBytes_FromStringAndSize(&obs->visibility, 1);
+		case 15: return PyLong_FromLong(obs->sunlit);
+		case 16: return PyLong_FromLong(obs->orbit);
+		case 17: return PyLong_FromLong(obs->geostationary);
+		case 18: return PyLong_FromLong(obs->has_aos);
+		case 19: return PyLong_FromLong(obs->decayed);
+		case 20: return PyFloat_FromDouble(obs->doppler);
+		case 21: return PyFloat_FromDouble(obs->azimuth_rate);
+		default: return PyFloat_FromDouble(obs->elevation_rate);
+	}
+}
+
+PyObject * PythonifyTransit(observation * transit, size_t count) {
+	size_t i;
+	PyObject * py_obs;
+	PyObject * py_transit = PyList_New(count);
+
+	if (py_transit == NULL)
+	{
+		return NULL;
+	}
+
+	for (i=0; i<count; i++)
+	{
+		py_obs = PythonifyObservation(&transit[i]);
+		if (py_obs == NULL)
+		{
+			Py_DECREF(py_transit);
+			return NULL;
+		}
+		PyList_SET_ITEM(py_transit, i, py_obs);
+	}
+
+	return py_transit;
+}
+
+/* .... Observation arrays .... */
+
+// Columns of the structured arrays returned by observe_many, in order.  Every column is a
+// float64, so a row can be filled as a plain double[].
+static const char *observation_columns[] = {
+	"epoch", "azimuth", "elevation", "slant_range", "range_rate",
+	"doppler", "latitude", "longitude", "altitude", "azimuth_rate", "elevation_rate", NULL
+};
+#define OBSERVATION_COLUMNS 11
+
+// Columns of the pass arrays returned by passes()
+static const char *pass_columns[] = {
+	"start", "end", "start_az", "end_az", "tca", "max_el", "duration", NULL
+};
+#define PASS_COLUMNS 7
+
+// Columns of the arrays returned by Predictor.max_rates()
+static const char *rate_columns[] = {"max_az_rate", "max_el_rate", NULL};
+#define RATE_COLUMNS 2
+
+// Columns of the arrays returned by Predictor.eclipses()
+static const char *eclipse_columns[] = {"start", "end", "duration", NULL};
+#define ECLIPSE_COLUMNS 3
+
+// numpy is only needed for the array functions, so it is imported on first use rather than
+// being a build dependency.
+static PyObject *numpy_module = NULL;
+static PyObject *observation_dtype = NULL;
+static PyObject *pass_dtype = NULL;
+static PyObject *rate_dtype = NULL;
+static PyObject *eclipse_dtype = NULL;
+static PyObject *station_pass_dtype = NULL;
+
+// Builds (once) a structured dtype of float64 columns, caching it in *dtype.
+static PyObject *RecordDtype(PyObject **dtype, const char **columns)
+{
+	PyObject *fields;
+	int i, n;
+
+	if (*dtype != NULL)
+	{
+		return *dtype;
+	}
+
+	if (numpy_module == NULL && (numpy_module = PyImport_ImportModule("numpy")) == NULL)
+	{
+		return NULL;
+	}
+
+	for (n=0; columns[n] != NULL; n++);
+	fields = PyList_New(n);
+	if (fields == NULL)
+	{
+		return NULL;
+	}
+	for (i=0; i<n; i++)
+	{
+		PyList_SET_ITEM(fields, i, Py_BuildValue("(ss)", columns[i], "f8"));
+	}
+
+	*dtype = PyObject_CallMethod(numpy_module, "dtype", "O", fields);
+	Py_DECREF(fields);
+	return *dtype;
+}
+
+static PyObject *ObservationDtype(void)
+{
+	return RecordDtype(&observation_dtype, observation_columns);
+}
+
+// Fills one row of an observation array, in the order of observation_columns.
+void FillObservationRow(predict_t *p, double daynum, double *row)
+{
+	struct observation obs;
+
+	MakeObservation(p, daynum, &obs, OBS_RATES);
+	row[0]=obs.epoch;
+	row[1]=obs.azimuth;
+	row[2]=obs.elevation;
+	row[3]=obs.slant_range;
+	row[4]=p->sat_range_rate;
+	row[5]=obs.doppler;
+	row[6]=obs.latitude;
+	row[7]=obs.longitude;
+	row[8]=obs.altitude;
+	row[9]=obs.azimuth_rate;
+	row[10]=obs.elevation_rate;
+}
+
+// Fills the observation rows of one time seen from each of 'n' stations, 'stride' doubles
+// apart.  The satellite is propagated once and only the look angles are worked out again for
+// each station, which gives the same rows as observing from each station on its own.  Leaves
+// the predictor at the last station.
+void FillStationRows(predict_t *p, double daynum, const qth_t *stations, int n, double *row,
+	size_t stride) {
+	double *first=row;
+	int k;
+
+	for (k=0; k<n; k++, row+=stride)
+	{
+		ReadQTH(p, stations[k].stnlat, stations[k].stnlong, stations[k].stnalt);
+		if (k==0)
+		{
+			FillObservationRow(p, daynum, row);
+			continue;
+		}
+		CalcLook(p);
+		CalcRates(p);
+		row[0]=first[0];
+		row[1]=p->sat_azi;
+		row[2]=p->sat_ele;
+		row[3]=p->sat_range;
+		row[4]=p->sat_range_rate;
+		row[5]=-100.0e06*((p->sat_range_rate*1000.0)/299792458.0);
+		row[6]=first[6];
+		row[7]=first[7];
+		row[8]=first[8];
+		row[9]=p->sat_azi_rate;
+		row[10]=p->sat_ele_rate;
+	}
+}
+
+// Converts 'times' (anything numpy can make a 1-d float64 array of) to a contiguous array and
+// exposes its data through 'buf'.  Returns the array, which must be released with
+// ReleaseArray(), or NULL with an exception set.
+static PyObject *TimesArray(PyObject *times, Py_buffer *buf)
+{
+	PyObject *t_array;
+
+	if (ObservationDtype() == NULL)
+	{
+		return NULL;
+	}
+
+	t_array = PyObject_CallMethod(numpy_module, "ascontiguousarray", "Os", times, "f8");
+	if (t_array == NULL)
+	{
+		return NULL;
+	}
+	if (PyObject_GetBuffer(t_array, buf, PyBUF_C_CONTIGUOUS) != 0)
+	{
+		Py_DECREF(t_array);
+		return NULL;
+	}
+	if (buf->ndim != 1)
+	{
+		PyBuffer_Release(buf);
+		Py_DECREF(t_array);
+		PyErr_SetString(PyExc_ValueError, "times must be one dimensional");
+		return NULL;
+	}
+	return t_array;
+}
+
+// Allocates an uninitialized (rows x cols) array of 'dtype', or a 1-d one of 'cols' rows
+// when rows is negative, and exposes its data through 'buf' for writing.
+static PyObject *RecordArray(PyObject *dtype, Py_ssize_t rows, Py_ssize_t cols, Py_buffer *buf)
+{
+	PyObject *result;
+
+	if (dtype == NULL)
+	{
+		return NULL;
+	}
+
+	if (rows < 0)
+	{
+		result = PyObject_CallMethod(numpy_module, "empty", "nO", cols, dtype);
+	}
+	else
+	{
+		result = PyObject_CallMethod(numpy_module, "empty", "(nn)O", rows, cols, dtype);
+	}
+	if (result != NULL && PyObject_GetBuffer(result, buf, PyBUF_C_CONTIGUOUS | PyBUF_WRITABLE) != 0)
+	{
+		Py_CLEAR(result);
+	}
+	return result;
+}
+
+static PyObject *ObservationArray(Py_ssize_t rows, Py_ssize_t cols, Py_buffer *buf)
+{
+	return RecordArray(ObservationDtype(), rows, cols, buf);
+}
+
+static void ReleaseArray(PyObject *array, Py_buffer *buf)
+{
+	PyBuffer_Release(buf);
+	Py_DECREF(array);
+}
+
+// Observes the satellite at each unix time in 'times' and returns a structured array with
+// one row per time.  The caller must hold the GIL; it is released for the propagation loop.
+static PyObject *ObserveMany(predict_t *p, PyObject *times)
+{
+	PyObject *t_array, *result;
+	Py_buffer t_buf, r_buf;
+	Py_ssize_t i, n;
+	double *t, *row;
+
+	if ((t_array = TimesArray(times, &t_buf)) == NULL)
+	{
+		return NULL;
+	}
+	n = t_buf.shape[0];
+
+	if ((result = ObservationArray(-1, n, &r_buf)) == NULL)
+	{
+		ReleaseArray(t_array, &t_buf);
+		return NULL;
+	}
+
+	t = (double *)t_buf.buf;
+	row = (double *)r_buf.buf;
+	Py_BEGIN_ALLOW_THREADS
+	for (i=0; i<n; i++)
+	{
+		FillObservationRow(p, (t[i]/86400.0)-3651.0, &row[i*OBSERVATION_COLUMNS]);
+	}
+	Py_END_ALLOW_THREADS
+
+	PyBuffer_Release(&r_buf);
+	ReleaseArray(t_array, &t_buf);
+	return result;
+}
+
+// Loads a TLE and ground station into a cleared predictor and runs the one-time SGP4/SDP4
+// set up.  Returns non-zero if the TLE can't be processed.
+int InitPredictor(predict_t *p, const char *tle0, const char *tle1, const char *tle2,
+	double lat, double lon, int alt)
+{
+	memset(p, 0, sizeof(predict_t));
+	if (ReadTLE(p,tle0,tle1,tle2) != 0)
+	{
+		return -1;
+	}
+	ReadQTH(p, lat, lon, alt);
+	PreCalc(p);
+	return 0;
+}
+
+char load(predict_t *p, PyObject *args)
+{
+	char *env=NULL;
+
+	double epoch;
+	const char *tle0, *tle1, *tle2;
+
+	memset(p, 0, sizeof(predict_t));
+
+	if (!PyArg_ParseTuple(args, "(sss)|d(ddi)",
+		&tle0, &tle1, &tle2, &epoch, &p->qth.stnlat, &p->qth.stnlong, &p->qth.stnalt))
+	{
+		// PyArg_ParseTuple will set appropriate exception string
+		return -1;
+	};
+
+	if (ReadTLE(p,tle0,tle1,tle2) != 0)
+	{
+		PyErr_SetString(PredictException, "Unable to process TLE");
+		return -1;
+	}
+	PreCalc(p);
+
+	// If time isn't set, use current time.
+	if (PyObject_Length(args) < 2)
+	{
+		p->daynum=CurrentDaynum();
+	}
+	else
+	{
+		p->daynum=((epoch/86400.0)-3651.0);
+	}
+
+	// If we haven't already set groundstation location, use predict's default.
+	if (PyObject_Length(args) < 3)
+	{
+		FILE *fd;
+		char qthfile[256];
+		env=getenv("HOME");
+		snprintf(qthfile,sizeof(qthfile),"%s/.predict/predict.qth",env);
+		fd=fopen(qthfile,"r");
+		if (fd!=NULL)
+		{
+			fgets(p->qth.callsign,16,fd);
+			p->qth.callsign[strlen(p->qth.callsign)-1]=0;
+			fscanf(fd,"%lf", &p->qth.stnlat);
+			fscanf(fd,"%lf", &p->qth.stnlong);
+			fscanf(fd,"%d", &p->qth.stnalt);
+			fclose(fd);
+		} else {
+			PyErr_SetString(PredictException, "QTH file could not be loaded.");
+			return -1;
+		}
+	}
+	ReadQTH(p, p->qth.stnlat, p->qth.stnlong, p->qth.stnalt);
+
+	return 0;
+}
+
+static PyObject* quick_find(PyObject* self, PyObject *args)
+{
+	predict_t p;
+	struct observation obs = { 0 };
+
+	if (load(&p, args) != 0)
+	{
+		// load will set appropriate exceptions if it fails.
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	MakeObservation(&p, p.daynum, &obs, OBS_ALL);
+	Py_END_ALLOW_THREADS
+
+	return PythonifyObservation(&obs);
+}
+
+static char quick_find_docs[] =
+    "quick_find((tle_line0, tle_line1, tle_line2), time, (gs_lat, gs_lon, gs_alt))\n";
+
+static PyObject* quick_predict(PyObject* self, PyObject *args)
+{
+	int status;
+	char errbuff[100];
+	predict_t p;
+	observation * transit;
+	size_t count;
+	PyObject * py_transit;
+
+	if (load(&p, args) != 0)
+	{
+		// load will set the appropriate exception string if it fails.
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	status = MakeTransit(&p, &transit, &count, errbuff);
+	Py_END_ALLOW_THREADS
+
+	if (status != 0)
+	{
+		PyErr_SetString(PredictException, errbuff);
+		return NULL;
+	}
+
+	py_transit = PythonifyTransit(transit, count);
+	free(transit);
+	return py_transit;
+}
+
+static char quick_predict_docs[] =
+    "quick_predict((tle_line0, tle_line1, tle_line2), time, (gs_lat, gs_lon, gs_alt))\n";
+
+// Runs FindPasses() with the GIL released and returns the passes as a structured array.
+static PyObject *Passes(predict_t *p, double t0, double t1, double min_el)
+{
+	PyObject *result;
+	Py_buffer r_buf;
+	pass_summary *passes;
+	size_t i, count;
+	int status;
+	char errbuff[100];
+	double *row;
+
+	if (RecordDtype(&pass_dtype, pass_columns) == NULL)
+	{
+		return NULL;
+	}
+
+	Py_BEGIN_ALLOW_THREADS
+	status = FindPasses(p, (t0/86400.0)-3651.0, (t1/86400.0)-3651.0, min_el, &passes, &count, errbuff);
+	Py_END_ALLOW_THREADS
+
+	if (status != 0)
+	{
+		PyErr_SetString(PredictException, errbuff);
+		return NULL;
+	}
+
+	if ((result = RecordArray(pass_dtype, -1, count, &r_buf)) != NULL)
+	{
+		row = (double *)r_buf.buf;
+		for (i=0; i<count; i++, row+=PASS_COLUMNS)
+		{
+			row[0]=(passes[i].aos+3651.0)*86400.0;
+			row[1]=(passes[i].los+3651.0)*86400.0;
+			row[2]=passes[i].aos_az;
+			row[3]=passes[i].los_az;
+			row[4]=(passes[i].tca+3651.0)*86400.0;
+			row[5]=passes[i].max_el;
+			row[6]=row[1]-row[0];
+		}
+		PyBuffer_Release(&r_buf);
+	}
+	free(passes);
+	return result;
+}
+
+static PyObject* passes(PyObject* self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"tle", "qth", "t0", "t1", "min_el", NULL};
+	predict_t p;
+	const char *tle0, *tle1, *tle2;
+	double lat, lon, t0, t1, min_el=0.0;
+	int alt;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "(sss)(ddi)dd|d", kwlist,
+		&tle0, &tle1, &tle2, &lat, &lon, &alt, &t0, &t1, &min_el))
+	{
+		return NULL;
+	}
+
+	if (InitPredictor(&p, tle0, tle1, tle2, lat, lon, alt) != 0)
+	{
+		PyErr_SetString(PredictException, "Unable to process TLE");
+		return NULL;
+	}
+
+	return Passes(&p, t0, t1, min_el);
+}
+
+static char passes_docs[] =
+    "passes((tle_line0, tle_line1, tle_line2), (gs_lat, gs_lon, gs_alt), t0, t1, min_el=0)\n\n"
+    "Every pass in progress at or starting between unix times t0 and t1 that reaches min_el\n"
+    "degrees, as a numpy structured array with float64 columns start, end, start_az, end_az,\n"
+    "tca, max_el and duration (seconds).\n";
+
+static PyObject* observe_many(PyObject* self, PyObject *args)
+{
+	predict_t p;
+	const char *tle0, *tle1, *tle2;
+	double lat, lon;
+	int alt;
+	PyObject *times;
+
+	if (!PyArg_ParseTuple(args, "(sss)(ddi)O", &tle0, &tle1, &tle2, &lat, &lon, &alt, &times))
+	{
+		return NULL;
+	}
+
+	if (InitPredictor(&p, tle0, tle1, tle2, lat, lon, alt) != 0)
+	{
+		PyErr_SetString(PredictException, "Unable to process TLE");
+		return NULL;
+	}
+
+	return ObserveMany(&p, times);
+}
+
+static char observe_many_docs[] =
+    "observe_many((tle_line0, tle_line1, tle_line2), (gs_lat, gs_lon, gs_alt), times)\n\n"
+    "Observations at each unix time in 'times' as a numpy structured array with float64\n"
+    "columns epoch, azimuth, elevation, slant_range, range_rate (km/s), doppler, latitude,\n"
+    "longitude, altitude, azimuth_rate and elevation_rate (degrees/s).\n";
+
+/* .... Predictor type .... */
+
+// A Predictor owns the orbital state for one satellite seen from one ground station.
+// Propagation runs with the GIL released, so separate Predictors can be used from
+// separate threads at the same time.  Calls on the same Predictor are serialized by
+// its lock, which is made with the object so it exists even if __init__ never runs.
+typedef struct {
+	PyObject_HEAD
+	predict_t p;
+	PyThread_type_lock lock;
+	int ready;  // __init__ has set up p
+} Predictor;
+
+#define ACQUIRE_LOCK(obj) do { \
+	if (!PyThread_acquire_lock((obj)->lock, NOWAIT_LOCK)) { \
+		Py_BEGIN_ALLOW_THREADS \
+		PyThread_acquire_lock((obj)->lock, WAIT_LOCK); \
+		Py_END_ALLOW_THREADS \
+	} } while (0)
+#define RELEASE_LOCK(obj) PyThread_release_lock((obj)->lock)
+
+// Raises PredictException for a Predictor whose __init__ has not succeeded.
+static int CheckReady(Predictor *self)
+{
+	if (!self->ready)
+	{
+		PyErr_SetString(PredictException, "Predictor is not initialized");
+		return -1;
+	}
+	return 0;
+}
+
+static PyObject* Predictor_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
+{
+	Predictor *self = (Predictor *)type->tp_alloc(type, 0);
+
+	if (self == NULL)
+	{
+		return NULL;
+	}
+	self->lock = PyThread_allocate_lock();
+	if (self->lock == NULL)
+	{
+		Py_DECREF(self);
+		PyErr_SetString(PyExc_MemoryError, "unable to allocate lock");
+		return NULL;
+	}
+	return (PyObject *)self;
+}
+
+static int Predictor_init(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"tle", "qth", NULL};
+	const char *tle0, *tle1, *tle2;
+	double lat, lon;
+	int alt;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "(sss)(ddi)", kwlist,
+		&tle0, &tle1, &tle2, &lat, &lon, &alt))
+	{
+		return -1;
+	}
+
+	/* Parse and initialize once; every observation after this is a single SGP4/SDP4 step */
+	ACQUIRE_LOCK(self);
+	self->ready = 0;
+	if (InitPredictor(&self->p, tle0, tle1, tle2, lat, lon, alt) != 0)
+	{
+		RELEASE_LOCK(self);
+		PyErr_SetString(PredictException, "Unable to process TLE");
+		return -1;
+	}
+	self->ready = 1;
+	RELEASE_LOCK(self);
+
+	return 0;
+}
+
+static void Predictor_dealloc(Predictor *self)
+{
+	if (self->lock != NULL)
+	{
+		PyThread_free_lock(self->lock);
+	}
+	Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+// Converts an optional unix time argument to a PREDICT daynum.
+static int parse_daynum(PyObject *at, double *daynum)
+{
+	double epoch;
+
+	if (at == NULL || at == Py_None)
+	{
+		*daynum=CurrentDaynum();
+		return 0;
+	}
+
+	epoch = PyFloat_AsDouble(at);
+	if (epoch == -1.0 && PyErr_Occurred())
+	{
+		return -1;
+	}
+	*daynum=((epoch/86400.0)-3651.0);
+	return 0;
+}
+
+static PyObject* Predictor_observe(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"at", "fields", NULL};
+	PyObject *at = NULL, *fields = Py_None, *seq, *result;
+	double daynum;
+	int extras = OBS_ALL, index[32];
+	Py_ssize_t i, n = 0;
+	struct observation obs;
+
+	if (CheckReady(self) != 0)
+	{
+		return NULL;
+	}
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OO", kwlist, &at, &fields) ||
+		parse_daynum(at, &daynum) != 0)
+	{
+		return NULL;
+	}
+
+	// Only work out what the requested fields need
+	if (fields != Py_None)
+	{
+		if (PyUnicode_Check(fields))
+		{
+			PyErr_SetString(PyExc_TypeError, "fields must be a sequence of field names");
+			return NULL;
+		}
+		seq = PySequence_Fast(fields, "fields must be a sequence of field names");
+		if (seq == NULL)
+		{
+			return NULL;
+		}
+		n = PySequence_Fast_GET_SIZE(seq);
+		if (n > 32)
+		{
+			Py_DECREF(seq);
+			PyErr_SetString(PyExc_ValueError, "too many fields");
+			return NULL;
+		}
+		extras = 0;
+		for (i=0; i<n; i++)
+		{
+			index[i] = ObservationFieldIndex(PySequence_Fast_GET_ITEM(seq, i));
+			if (index[i] < 0)
+			{
+				Py_DECREF(seq);
+				return NULL;
+			}
+			extras |= observation_fields[index[i]].extras;
+		}
+		Py_DECREF(seq);
+	}
+
+	ACQUIRE_LOCK(self);
+	Py_BEGIN_ALLOW_THREADS
+	MakeObservation(&self->p, daynum, &obs, extras);
+	Py_END_ALLOW_THREADS
+	RELEASE_LOCK(self);
+
+	if (fields == Py_None)
+	{
+		return PythonifyObservation(&obs);
+	}
+
+	result = PyTuple_New(n);
+	for (i=0; result != NULL && i<n; i++)
+	{
+		PyObject *value = PythonifyObservationField(&obs, index[i]);
+		if (value == NULL)
+		{
+			Py_CLEAR(result);
+			break;
+		}
+		PyTuple_SET_ITEM(result, i, value);
+	}
+	return result;
+}
+
+static char Predictor_observe_docs[] =
+    "observe(at=None, fields=None)\n\nObservation of the satellite at unix time 'at' (default "
+    "now), as returned by quick_find.\nIf 'fields' is a sequence of field names, only those are "
+    "worked out and they are\nreturned as a tuple in the same order, e.g. "
+    "observe(fields=('azimuth', 'elevation')).\n";
+
+static PyObject* Predictor_observe_many(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"times", NULL};
+	PyObject *times, *result;
+
+	if (CheckReady(self) != 0)
+	{
+		return NULL;
+	}
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "O", kwlist, &times))
+	{
+		return NULL;
+	}
+
+	ACQUIRE_LOCK(self);
+	result = ObserveMany(&self->p, times);
+	RELEASE_LOCK(self);
+
+	return result;
+}
+
+static char Predictor_observe_many_docs[] =
+    "observe_many(times)\n\nObservations at each unix time in 'times' as a numpy structured "
+    "array, as returned by the module level observe_many.\n";
+
+static PyObject* Predictor_transit(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"at", NULL};
+	PyObject *at = NULL;
+	int status;
+	char errbuff[100];
+	observation * transit;
+	size_t count;
+	PyObject * py_transit;
+
+	if (CheckReady(self) != 0)
+	{
+		return NULL;
+	}
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "|O", kwlist, &at))
+	{
+		return NULL;
+	}
+
+	ACQUIRE_LOCK(self);
+	if (parse_daynum(at, &self->p.daynum) != 0)
+	{
+		RELEASE_LOCK(self);
+		return NULL;
+	}
+	Py_BEGIN_ALLOW_THREADS
+	status = MakeTransit(&self->p, &transit, &count, errbuff);
+	Py_END_ALLOW_THREADS
+	RELEASE_LOCK(self);
+
+	if (status != 0)
+	{
+		PyErr_SetString(PredictException, errbuff);
+		return NULL;
+	}
+
+	py_transit = PythonifyTransit(transit, count);
+	free(transit);
+	return py_transit;
+}
+
+static char Predictor_transit_docs[] =
+    "transit(at=None)\n\nList of observations for the next pass at or after unix time 'at' "
+    "(default now), as returned by quick_predict.\n";
+
+static PyStructSequence_Field PassSummary_fields[] = {
+    {"aos"   , "Acquisition of signal, unix time"},
+    {"los"   , "Loss of signal, unix time"},
+    {"tca"   , "Time of closest approach, unix time"},
+    {"max_el", "Highest elevation, degrees"},
+    {"aos_az", "Azimuth at AOS, degrees"},
+    {"los_az", "Azimuth at LOS, degrees"},
+    {NULL}
+};
+
+static PyStructSequence_Desc PassSummary_desc = {
+    "cpredict.PassSummary",
+    "Summary of one pass of a satellite over a ground station, see Predictor.next_pass.",
+    PassSummary_fields,
+    6
+};
+
+static PyTypeObject PassSummaryType;
+
+PyObject * PythonifyPassSummary(pass_summary * pass) {
+	PyObject *py_pass = PyStructSequence_New(&PassSummaryType);
+
+	if (py_pass == NULL)
+	{
+		return NULL;
+	}
+	PyStructSequence_SET_ITEM(py_pass, 0, PyFloat_FromDouble((pass->aos+3651.0)*86400.0));
+	PyStructSequence_SET_ITEM(py_pass, 1, PyFloat_FromDouble((pass->los+3651.0)*86400.0));
+	PyStructSequence_SET_ITEM(py_pass, 2, PyFloat_FromDouble((pass->tca+3651.0)*86400.0));
+	PyStructSequence_SET_ITEM(py_pass, 3, PyFloat_FromDouble(pass->max_el));
+	PyStructSequence_SET_ITEM(py_pass, 4, PyFloat_FromDouble(pass->aos_az));
+	PyStructSequence_SET_ITEM(py_pass, 5, PyFloat_FromDouble(pass->los_az));
+	if (PyErr_Occurred())
+	{
+		Py_DECREF(py_pass);
+		return NULL;
+	}
+	return py_pass;
+}
+
+static PyObject* Predictor_next_pass(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"at", "before", NULL};
+	PyObject *at = NULL, *before = NULL;
+	double start, end;
+	int status;
+	char errbuff[100];
+	pass_summary pass;
+
+	if (CheckReady(self) != 0)
+	{
+		return NULL;
+	}
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OO", kwlist, &at, &before) ||
+		parse_daynum(at, &start) != 0)
+	{
+		return NULL;
+	}
+	if (before == NULL || before == Py_None)
+	{
+		end=start+365.0;
+	}
+	else if (parse_daynum(before, &end) != 0)
+	{
+		return NULL;
+	}
+
+	ACQUIRE_LOCK(self);
+	Py_BEGIN_ALLOW_THREADS
+	status = FindPass(&self->p, start, end, &pass, errbuff);
+	Py_END_ALLOW_THREADS
+	RELEASE_LOCK(self);
+
+	if (status < 0)
+	{
+		PyErr_SetString(PredictException, errbuff);
+		return NULL;
+	}
+	if (status > 0)
+	{
+		Py_RETURN_NONE;
+	}
+	return PythonifyPassSummary(&pass);
+}
+
+static char Predictor_next_pass_docs[] =
+    "next_pass(at=None, before=None)\n\nPassSummary (aos, los, tca, max_el, aos_az, los_az) of the "
+    "pass in progress at unix\ntime 'at' (default now), or else of the next one.  None if no pass "
+    "starts before\n'before' (default a year after 'at').\n";
+
+static PyObject* Predictor_peak(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"start", "end", "epsilon", NULL};
+	double start, end, epsilon=0.1, peak, max_el;
+
+	if (CheckReady(self) != 0)
+	{
+		return NULL;
+	}
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "dd|d", kwlist, &start, &end, &epsilon))
+	{
+		return NULL;
+	}
+	if (end<start)
+	{
+		PyErr_SetString(PyExc_ValueError, "end is before start");
+		return NULL;
+	}
+
+	ACQUIRE_LOCK(self);
+	Py_BEGIN_ALLOW_THREADS
+	peak = FindPeak(&self->p, (start/86400.0)-3651.0, (end/86400.0)-3651.0,
+		epsilon/86400.0, &max_el);
+	Py_END_ALLOW_THREADS
+	RELEASE_LOCK(self);
+
+	return Py_BuildValue("(dd)", (peak+3651.0)*86400.0, max_el);
+}
+
+static char Predictor_peak_docs[] =
+    "peak(start, end, epsilon=0.1)\n\n(time, elevation) of the highest elevation between unix "
+    "times 'start' and 'end',\nwhich should span no more than one pass.  The time is found to "
+    "within 'epsilon' seconds.\n";
+
+// Converts a sequence of (lat(N), long(W), alt(m)) tuples to a malloc'd array of stations,
+// which the caller frees.  Returns -1 with an exception set if they can't be read.
+static int ParseStations(PyObject *stations, qth_t **qths, int *n)
+{
+	PyObject *seq, *item;
+	Py_ssize_t i, count;
+	int ok;
+
+	*qths = NULL;
+	*n = 0;
+	seq = PySequence_Fast(stations, "stations must be a sequence of (lat, long, alt) tuples");
+	if (seq == NULL)
+	{
+		return -1;
+	}
+	count = PySequence_Fast_GET_SIZE(seq);
+	if (count == 0 || count > INT_MAX)
+	{
+		Py_DECREF(seq);
+		PyErr_SetString(PyExc_ValueError, "stations must hold at least one station");
+		return -1;
+	}
+	if ((*qths = calloc(count, sizeof(qth_t))) == NULL)
+	{
+		Py_DECREF(seq);
+		PyErr_NoMemory();
+		return -1;
+	}
+	for (i=0; i<count; i++)
+	{
+		item = PySequence_Tuple(PySequence_Fast_GET_ITEM(seq, i));
+		ok = item != NULL && PyArg_ParseTuple(item, "ddi;stations must be (lat, long, alt) tuples",
+			&(*qths)[i].stnlat, &(*qths)[i].stnlong, &(*qths)[i].stnalt);
+		Py_XDECREF(item);
+		if (!ok)
+		{
+			free(*qths);
+			*qths = NULL;
+			Py_DECREF(seq);
+			return -1;
+		}
+	}
+	Py_DECREF(seq);
+	*n = (int)count;
+	return 0;
+}
+
+// Builds (once) the dtype of the arrays returned by Predictor.station_passes(): the pass
+// columns and an int64 station index.
+static PyObject *StationPassDtype(void)
+{
+	PyObject *fields, *station;
+
+	if (station_pass_dtype != NULL)
+	{
+		return station_pass_dtype;
+	}
+	if (RecordDtype(&pass_dtype, pass_columns) == NULL ||
+		(fields = PyObject_GetAttrString(pass_dtype, "descr")) == NULL)
+	{
+		return NULL;
+	}
+	station = Py_BuildValue("(ss)", "station", "<i8");
+	if (station == NULL || PyList_Append(fields, station) != 0)
+	{
+		Py_XDECREF(station);
+		Py_DECREF(fields);
+		return NULL;
+	}
+	Py_DECREF(station);
+	station_pass_dtype = PyObject_CallMethod(numpy_module, "dtype", "O", fields);
+	Py_DECREF(fields);
+	return station_pass_dtype;
+}
+
+static PyObject* Predictor_observe_stations(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"stations", "times", NULL};
+	PyObject *stations, *times, *t_array, *result;
+	Py_buffer t_buf, r_buf;
+	Py_ssize_t i, n_time;
+	qth_t *qths, home;
+	int n;
+	double *t, *row;
+
+	if (CheckReady(self) != 0)
+	{
+		return NULL;
+	}
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO", kwlist, &stations, &times))
+	{
+		return NULL;
+	}
+	if (ParseStations(stations, &qths, &n) != 0)
+	{
+		return NULL;
+	}
+	if ((t_array = TimesArray(times, &t_buf)) == NULL)
+	{
+		free(qths);
+		return NULL;
+	}
+	n_time = t_buf.shape[0];
+
+	if ((result = ObservationArray(n, n_time, &r_buf)) != NULL)
+	{
+		t = (double *)t_buf.buf;
+		row = (double *)r_buf.buf;
+		ACQUIRE_LOCK(self);
+		Py_BEGIN_ALLOW_THREADS
+		home = self->p.qth;
+		for (i=0; i<n_time; i++)
+		{
+			FillStationRows(&self->p, (t[i]/86400.0)-3651.0, qths, n, &row[i*OBSERVATION_COLUMNS],
+				n_time*OBSERVATION_COLUMNS);
+		}
+		ReadQTH(&self->p, home.stnlat, home.stnlong, home.stnalt);
+		Py_END_ALLOW_THREADS
+		RELEASE_LOCK(self);
+		PyBuffer_Release(&r_buf);
+	}
+	ReleaseArray(t_array, &t_buf);
+	free(qths);
+	return result;
+}
 
-	/* Set up translation table for computing TLE checksums */
-	for (x=0; x<=255; val[x]=0, x++);
-	for (x='0'; x<='9'; val[x]=x-'0', x++);
+static char Predictor_observe_stations_docs[] =
+    "observe_stations(stations, times)\n\nObservations from each (lat(N), long(W), alt(m)) station "
+    "in 'stations' at each unix\ntime in 'times', as a numpy structured array of shape "
+    "(len(stations), len(times)) with\nthe columns of observe_many.  The satellite is propagated "
+    "once for each time, and the\nrows are the same as observe_many from a Predictor for each "
+    "station.\n";
 
-	val['-']=1;
+static PyObject* Predictor_station_passes(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"stations", "t0", "t1", "min_el", NULL};
+	PyObject *stations, *result;
+	Py_buffer r_buf;
+	station_pass *passes;
+	qth_t *qths, home;
+	size_t i, count;
+	int n, status;
+	int64_t station;
+	char errbuff[100];
+	double t0, t1, min_el=0.0, *row;
 
-	double epoch;
-	const char *tle0, *tle1, *tle2;
+	if (CheckReady(self) != 0)
+	{
+		return NULL;
+	}
 
-	if (!PyArg_ParseTuple(args, "(sss)|d(ddi)",
-		&tle0, &tle1, &tle2, &epoch, &qth.stnlat, &qth.stnlong, &qth.stnalt))
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "Odd|d", kwlist, &stations, &t0, &t1, &min_el))
 	{
-		// PyArg_ParseTuple will set appropriate exception string
-		return -1;
-	};
+		return NULL;
+	}
+	if (StationPassDtype() == NULL || ParseStations(stations, &qths, &n) != 0)
+	{
+		return NULL;
+	}
 
-	if (ReadTLE(tle0,tle1,tle2) != 0)
+	ACQUIRE_LOCK(self);
+	Py_BEGIN_ALLOW_THREADS
+	home = self->p.qth;
+	status = FindStationPasses(&self->p, qths, n, (t0/86400.0)-3651.0, (t1/86400.0)-3651.0, min_el,
+		&passes, &count, errbuff);
+	ReadQTH(&self->p, home.stnlat, home.stnlong, home.stnalt);
+	Py_END_ALLOW_THREADS
+	RELEASE_LOCK(self);
+	free(qths);
+
+	if (status != 0)
 	{
-		PyErr_SetString(PredictException, "Unable to process TLE");
-		return -1;
+		PyErr_SetString(PredictException, errbuff);
+		return NULL;
 	}
 
-	// If time isn't set, use current time.
-	if (PyObject_Length(args) < 2)
+	if ((result = RecordArray(station_pass_dtype, -1, count, &r_buf)) != NULL)
 	{
-		daynum=CurrentDaynum();
+		row = (double *)r_buf.buf;
+		for (i=0; i<count; i++, row+=PASS_COLUMNS+1)
+		{
+			row[0]=(passes[i].pass.aos+3651.0)*86400.0;
+			row[1]=(passes[i].pass.los+3651.0)*86400.0;
+			row[2]=passes[i].pass.aos_az;
+			row[3]=passes[i].pass.los_az;
+			row[4]=(passes[i].pass.tca+3651.0)*86400.0;
+			row[5]=passes[i].pass.max_el;
+			row[6]=row[1]-row[0];
+			station=passes[i].station;
+			memcpy(&row[PASS_COLUMNS], &station, sizeof(station));
+		}
+		PyBuffer_Release(&r_buf);
 	}
-	else
+	free(passes);
+	return result;
+}
+
+static char Predictor_station_passes_docs[] =
+    "station_passes(stations, t0, t1, min_el=0)\n\nEvery pass between unix times t0 and t1 reaching "
+    "min_el degrees over any of the\n(lat(N), long(W), alt(m)) stations in 'stations', as the "
+    "columns of passes() and the\nindex of the station, sorted by start.  Time is stepped through "
+    "once for all the\nstations, and the times agree with passes() for each station to within a "
+    "millisecond.\nStations the satellite never rises above get no passes.\n";
+
+/* .... Pass iterator .... */
+
+// Iterator over the passes of a Predictor, from Predictor.iter_passes().  It keeps the
+// Predictor, with its TLE parsed and SGP4/SDP4 set up, and the time to search on from, so
+// each pass only costs the search from the last LOS to the next one.
+typedef struct {
+	PyObject_HEAD
+	Predictor *predictor;
+	double cursor, end, min_el;  /* Daynums, and degrees */
+	char bounded, finished;
+} PassIterator;
+
+static void PassIterator_dealloc(PassIterator *self)
+{
+	Py_XDECREF(self->predictor);
+	Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyObject* PassIterator_next(PassIterator *self)
+{
+	pass_summary pass;
+	int status=1;
+	char errbuff[100];
+
+	if (CheckReady(self->predictor) != 0)  /* Re-initialized with a bad TLE since */
 	{
-		daynum=((epoch/86400.0)-3651.0);
+		return NULL;
 	}
 
-	// If we haven't already set groundstation location, use predict's default.
-	if (PyObject_Length(args) < 3)
+	ACQUIRE_LOCK(self->predictor);
+	Py_BEGIN_ALLOW_THREADS
+	while (!self->finished)
 	{
-		FILE *fd;
-		env=getenv("HOME");
-		sprintf(qthfile,"%s/.predict/predict.qth",env);
-		fd=fopen(qthfile,"r");
-		if (fd!=NULL)
+		status = FindPass(&self->predictor->p, self->cursor,
+			self->bounded ? self->end : self->cursor+365.0, &pass, errbuff);
+		if (status != 0)
 		{
-			fgets(qth.callsign,16,fd);
-			qth.callsign[strlen(qth.callsign)-1]=0;
-			fscanf(fd,"%lf", &qth.stnlat);
-			fscanf(fd,"%lf", &qth.stnlong);
-			fscanf(fd,"%d", &qth.stnalt);
-			fclose(fd);
-		} else {
-			PyErr_SetString(PredictException, "QTH file could not be loaded.");
-			return -1;
+			self->finished = 1;
+			break;
+		}
+		self->cursor = pass.los+1.0/86400.0;  /* One second past LOS */
+		if (pass.max_el >= self->min_el)
+		{
+			break;
 		}
 	}
-	obs_geodetic.lat=qth.stnlat*deg2rad;
-	obs_geodetic.lon=-qth.stnlong*deg2rad;
-	obs_geodetic.alt=((double)qth.stnalt)/1000.0;
-	obs_geodetic.theta=0.0;
+	Py_END_ALLOW_THREADS
+	RELEASE_LOCK(self->predictor);
 
-	return 0;
+	if (status < 0)
+	{
+		PyErr_SetString(PredictException, errbuff);
+		return NULL;
+	}
+	if (status > 0)
+	{
+		return NULL;  /* StopIteration */
+	}
+	return PythonifyPassSummary(&pass);
 }
 
-static PyObject* quick_find(PyObject* self, PyObject *args)
+static PyTypeObject PassIteratorType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "cpredict.PassIterator",
+    .tp_basicsize = sizeof(PassIterator),
+    .tp_dealloc = (destructor)PassIterator_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_doc = "Iterator over the passes of a Predictor, from Predictor.iter_passes().",
+    .tp_iter = PyObject_SelfIter,
+    .tp_iternext = (iternextfunc)PassIterator_next,
+};
+
+static PyObject* Predictor_iter_passes(Predictor *self, PyObject *args, PyObject *kwds)
 {
-	struct observation obs = { 0 };
+	static char *kwlist[] = {"start", "end", "min_el", NULL};
+	PyObject *start = NULL, *end = NULL;
+	PassIterator *iter;
+	double cursor, stop = 0.0, min_el = 0.0;
 
-	if (load(args) != 0 || MakeObservation(daynum, &obs) != 0)
+	if (CheckReady(self) != 0)
 	{
-		// load or MakeObservation will set appropriate exceptions if either fails.
 		return NULL;
 	}
 
-	return PythonifyObservation(&obs);
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "|OOd", kwlist, &start, &end, &min_el) ||
+		parse_daynum(start, &cursor) != 0 ||
+		(end != NULL && end != Py_None && parse_daynum(end, &stop) != 0))
+	{
+		return NULL;
+	}
+
+	iter = PyObject_New(PassIterator, &PassIteratorType);
+	if (iter == NULL)
+	{
+		return NULL;
+	}
+	Py_INCREF(self);
+	iter->predictor = self;
+	iter->cursor = cursor;
+	iter->end = stop;
+	iter->bounded = (end != NULL && end != Py_None);
+	iter->min_el = min_el;
+	iter->finished = 0;
+	return (PyObject *)iter;
 }
 
-static char quick_find_docs[] =
-    "quick_find((tle_line0, tle_line1, tle_line2), time, (gs_lat, gs_lon, gs_alt))\n";
+static char Predictor_iter_passes_docs[] =
+    "iter_passes(start=None, end=None, min_el=0)\n\nIterator of the PassSummary of every pass "
+    "reaching min_el degrees, starting with the\none in progress at unix time 'start' (default "
+    "now) and ending with the last to begin\nbefore 'end' (default never).  Each pass is searched "
+    "for from the LOS of the last one,\nwith the Predictor's TLE and propagator set up only once.  "
+    "Without 'end' it stops if\nno pass begins for a year.\n";
 
-static PyObject* quick_predict(PyObject* self, PyObject *args)
+static PyObject* Predictor_passes(Predictor *self, PyObject *args, PyObject *kwds)
 {
-	double now;
-	int lastel=0;
-	char errbuff[100];
-	observation obs = { 0 };
+	static char *kwlist[] = {"t0", "t1", "min_el", NULL};
+	double t0, t1, min_el=0.0;
+	PyObject *result;
 
-	PyObject* transit = PyList_New(0);
-	if (transit == NULL)
+	if (CheckReady(self) != 0)
 	{
-		goto cleanup_and_raise_exception;
+		return NULL;
 	}
 
-	now=CurrentDaynum();
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "dd|d", kwlist, &t0, &t1, &min_el))
+	{
+		return NULL;
+	}
+
+	ACQUIRE_LOCK(self);
+	result = Passes(&self->p, t0, t1, min_el);
+	RELEASE_LOCK(self);
+
+	return result;
+}
 
-	if (load(args) != 0)
+static PyObject* Predictor_max_rates(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"starts", "ends", NULL};
+	PyObject *starts, *ends, *s_array, *e_array, *result;
+	Py_buffer s_buf, e_buf, r_buf;
+	Py_ssize_t i, n;
+	double *t0, *t1, *row;
+
+	if (CheckReady(self) != 0)
 	{
-		// load will set the appropriate exception string if it fails.
-		goto cleanup_and_raise_exception;
+		return NULL;
 	}
 
-	//TODO: Seems like this should be based on the freshness of the TLE, not wall clock.
-	if ((daynum<now-365.0) || (daynum>now+365.0))
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO", kwlist, &starts, &ends))
 	{
-		sprintf(errbuff, "time %s too far from present\n", Daynum2String(daynum));
-		PyErr_SetString(PredictException, errbuff);
-		goto cleanup_and_raise_exception;
+		return NULL;
+	}
+	if ((s_array = TimesArray(starts, &s_buf)) == NULL)
+	{
+		return NULL;
+	}
+	if ((e_array = TimesArray(ends, &e_buf)) == NULL)
+	{
+		ReleaseArray(s_array, &s_buf);
+		return NULL;
+	}
+	n = s_buf.shape[0];
+	if (e_buf.shape[0] != n)
+	{
+		PyErr_SetString(PyExc_ValueError, "starts and ends must be the same length");
+		result = NULL;
+	}
+	else if ((result = RecordArray(RecordDtype(&rate_dtype, rate_columns), -1, n, &r_buf)) != NULL)
+	{
+		t0 = (double *)s_buf.buf;
+		t1 = (double *)e_buf.buf;
+		row = (double *)r_buf.buf;
+		ACQUIRE_LOCK(self);
+		Py_BEGIN_ALLOW_THREADS
+		for (i=0; i<n; i++, row+=RATE_COLUMNS)
+		{
+			MaxRates(&self->p, (t0[i]/86400.0)-3651.0, (fmax(t1[i], t0[i])/86400.0)-3651.0,
+				&row[0], &row[1]);
+		}
+		Py_END_ALLOW_THREADS
+		RELEASE_LOCK(self);
+		PyBuffer_Release(&r_buf);
 	}
+	ReleaseArray(e_array, &e_buf);
+	ReleaseArray(s_array, &s_buf);
+	return result;
+}
+
+static char Predictor_max_rates_docs[] =
+    "max_rates(starts, ends)\n\nFastest azimuth and elevation rates (degrees/s, magnitudes) "
+    "between each pair of unix\ntimes in 'starts' and 'ends', e.g. the start and end columns of "
+    "passes(), as a numpy\nstructured array with float64 columns max_az_rate and max_el_rate.\n";
+
+static PyObject* Predictor_eclipses(Predictor *self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"t0", "t1", NULL};
+	double t0, t1, *row;
+	PyObject *result;
+	Py_buffer r_buf;
+	eclipse_interval *eclipses;
+	size_t i, count;
+	int status;
+	char errbuff[100];
 
-	PreCalc(0);
-	Calc();
-	if (MakeObservation(daynum, &obs) != 0)
+	if (CheckReady(self) != 0)
 	{
-		// MakeObservation will set appropriate exception string
-		goto cleanup_and_raise_exception;
+		return NULL;
 	}
 
-	if (!AosHappens(0))
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "dd", kwlist, &t0, &t1))
 	{
-		sprintf(errbuff, "%lu does not rise above horizon. No AOS.\n", sat.catnum);
-		PyErr_SetString(PredictException, errbuff);
-		goto cleanup_and_raise_exception;
+		return NULL;
+	}
+	if (RecordDtype(&eclipse_dtype, eclipse_columns) == NULL)
+	{
+		return NULL;
 	}
 
-	if (Geostationary(0)!=0)
+	ACQUIRE_LOCK(self);
+	Py_BEGIN_ALLOW_THREADS
+	status = FindEclipses(&self->p, (t0/86400.0)-3651.0, (t1/86400.0)-3651.0, &eclipses, &count, errbuff);
+	Py_END_ALLOW_THREADS
+	RELEASE_LOCK(self);
+
+	if (status != 0)
 	{
-		sprintf(errbuff, "%lu is geostationary.  Does not transit.\n", sat.catnum);
 		PyErr_SetString(PredictException, errbuff);
-		goto cleanup_and_raise_exception;
+		return NULL;
 	}
 
-	if (Decayed(indx,daynum)!=0)
+	if ((result = RecordArray(eclipse_dtype, -1, count, &r_buf)) != NULL)
 	{
-		sprintf(errbuff, "%lu has decayed. Cannot calculate transit.\n", sat.catnum);
-		PyErr_SetString(PredictException, errbuff);
-		goto cleanup_and_raise_exception;
+		row = (double *)r_buf.buf;
+		for (i=0; i<count; i++, row+=ECLIPSE_COLUMNS)
+		{
+			row[0]=(eclipses[i].enter+3651.0)*86400.0;
+			row[1]=(eclipses[i].exit+3651.0)*86400.0;
+			row[2]=row[1]-row[0];
+		}
+		PyBuffer_Release(&r_buf);
 	}
+	free(eclipses);
+	return result;
+}
 
-	/* Make Predictions */
-	daynum=FindAOS();
-	
-	/* Construct the pass */
-	PyObject * py_obs;
-	while (iel>=0)
+static char Predictor_eclipses_docs[] =
+    "eclipses(t0, t1)\n\nEvery eclipse of the satellite between unix times t0 and t1, as a numpy "
+    "structured\narray with float64 columns start, end and duration (seconds).  Eclipses in "
+    "progress\nat t0 or t1 are cut off there.\n";
+
+static char Predictor_passes_docs[] =
+    "passes(t0, t1, min_el=0)\n\nEvery pass between unix times t0 and t1 reaching min_el degrees, "
+    "as returned by the\nmodule level passes.\n";
+
+static PyObject* Predictor_get_name(Predictor *self, void *closure)
+{
+	return PyUnicode_FromString(self->p.sat.name);
+}
+
+static PyObject* Predictor_get_norad_id(Predictor *self, void *closure)
+{
+	return PyLong_FromLong(self->p.sat.catnum);
+}
+
+static PyObject* Predictor_get_qth(Predictor *self, void *closure)
+{
+	return Py_BuildValue("(ddi)", self->p.qth.stnlat, self->p.qth.stnlong, self->p.qth.stnalt);
+}
+
+static PyMethodDef Predictor_methods[] = {
+    {"observe", (PyCFunction)Predictor_observe, METH_VARARGS | METH_KEYWORDS, Predictor_observe_docs},
+    {"observe_many", (PyCFunction)Predictor_observe_many, METH_VARARGS | METH_KEYWORDS, Predictor_observe_many_docs},
+    {"transit", (PyCFunction)Predictor_transit, METH_VARARGS | METH_KEYWORDS, Predictor_transit_docs},
+    {"next_pass", (PyCFunction)Predictor_next_pass, METH_VARARGS | METH_KEYWORDS, Predictor_next_pass_docs},
+    {"peak", (PyCFunction)Predictor_peak, METH_VARARGS | METH_KEYWORDS, Predictor_peak_docs},
+    {"max_rates", (PyCFunction)Predictor_max_rates, METH_VARARGS | METH_KEYWORDS, Predictor_max_rates_docs},
+    {"passes", (PyCFunction)Predictor_passes, METH_VARARGS | METH_KEYWORDS, Predictor_passes_docs},
+    {"iter_passes", (PyCFunction)Predictor_iter_passes, METH_VARARGS | METH_KEYWORDS, Predictor_iter_passes_docs},
+    {"eclipses", (PyCFunction)Predictor_eclipses, METH_VARARGS | METH_KEYWORDS, Predictor_eclipses_docs},
+    {"observe_stations", (PyCFunction)Predictor_observe_stations, METH_VARARGS | METH_KEYWORDS, Predictor_observe_stations_docs},
+    {"station_passes", (PyCFunction)Predictor_station_passes, METH_VARARGS | METH_KEYWORDS, Predictor_station_passes_docs},
+    {NULL, NULL, 0, NULL}
+};
+
+static PyGetSetDef Predictor_getset[] = {
+    {"name"    , (getter)Predictor_get_name    , NULL, "Satellite name from line 0 of the TLE", NULL},
+    {"norad_id", (getter)Predictor_get_norad_id, NULL, "NORAD catalog number", NULL},
+    {"qth"     , (getter)Predictor_get_qth     , NULL, "Ground station (lat(N), long(W), alt(m))", NULL},
+    {NULL, NULL, NULL, NULL, NULL}
+};
+
+static char Predictor_docs[] =
+    "Predictor((tle_line0, tle_line1, tle_line2), (gs_lat, gs_lon, gs_alt))\n\n"
+    "Satellite predictor with its own propagation state.  The TLE is parsed and the\n"
+    "SGP4/SDP4 model initialized once, when the Predictor is created.  Predictors\n"
+    "release the GIL while propagating and may be used concurrently from separate\n"
+    "threads.\n";
+
+static PyTypeObject PredictorType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "cpredict.Predictor",
+    .tp_basicsize = sizeof(Predictor),
+    .tp_dealloc = (destructor)Predictor_dealloc,
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_doc = Predictor_docs,
+    .tp_methods = Predictor_methods,
+    .tp_getset = Predictor_getset,
+    .tp_init = (initproc)Predictor_init,
+    .tp_new = Predictor_new,
+};
+
+/* .... Threaded catalog observations .... */
+
+// Times observed in one go by a catalog worker.  Small enough to spread a few satellites over
+// every core, large enough that taking work off the shared counter costs little.
+#define CATALOG_BLOCK 256
+
+// Work shared by the threads of one observe_catalog() call.  The satellite states are copies
+// taken under each Predictor's lock, so no Predictor is locked while the threads run.  Work
+// is handed out one (satellite, block of times) unit at a time from 'next'.
+typedef struct {
+	predict_t *sats;
+	const double *times;
+	double *rows;
+	Py_ssize_t n_sat, n_time, blocks, units, next;
+	PyThread_type_lock lock;
+} catalog_work;
+
+typedef struct {
+	catalog_work *work;
+	PyThread_type_lock done;  /* Held until the worker finishes */
+	predict_t p;              /* The worker's own copy of the satellite it is observing */
+} catalog_worker;
+
+// Observes units of a catalog until none are left.  Each unit starts from a fresh copy of its
+// satellite, and an observation doesn't depend on what the predictor was asked before (see
+// MakeObservation()), so the rows are the same bit for bit whichever thread fills them.
+static void CatalogWorker(void *arg)
+{
+	catalog_worker *worker=(catalog_worker *)arg;
+	catalog_work *work=worker->work;
+	Py_ssize_t unit, sat, k, end, current=-1;
+	double *row;
+
+	while (1)
 	{
-		if (MakeObservation(daynum, &obs) != 0)
+		PyThread_acquire_lock(work->lock, WAIT_LOCK);
+		unit=work->next++;
+		PyThread_release_lock(work->lock);
+		if (unit>=work->units)
 		{
-			//MakeObservation will set appropriate exception string
-			goto cleanup_and_raise_exception;
+			break;
 		}
 
-		py_obs = PythonifyObservation(&obs);
-		if (py_obs == NULL) {
-			//PythonifyObservation will set appropriate exception string
-			goto cleanup_and_raise_exception;
+		sat=unit/work->blocks;
+		k=(unit%work->blocks)*CATALOG_BLOCK;
+		end=k+CATALOG_BLOCK<work->n_time ? k+CATALOG_BLOCK : work->n_time;
+		if (sat!=current)
+		{
+			memcpy(&worker->p, &work->sats[sat], sizeof(predict_t));
+			current=sat;
+		}
+		row=work->rows+(sat*work->n_time+k)*OBSERVATION_COLUMNS;
+		for (; k<end; k++, row+=OBSERVATION_COLUMNS)
+		{
+			FillObservationRow(&worker->p, (work->times[k]/86400.0)-3651.0, row);
 		}
+	}
 
-		if (PyList_Append(transit, py_obs) != 0)
+	if (worker->done!=NULL)
+	{
+		PyThread_release_lock(worker->done);
+	}
+}
+
+// Observes every satellite of 'work' on 'threads' threads, counting the calling one.  Falls
+// back to fewer threads if they can't be started.  Returns -1 if out of memory.  Does not
+// touch any Python state, so it may be called without the GIL.
+static int ObserveCatalog(catalog_work *work, int threads)
+{
+	catalog_worker *workers;
+	int i, started;
+
+	work->blocks=(work->n_time+CATALOG_BLOCK-1)/CATALOG_BLOCK;
+	work->units=work->n_sat*work->blocks;
+	work->next=0;
+	if (threads>work->units)
+	{
+		threads=work->units>0 ? (int)work->units : 1;
+	}
+
+	workers=calloc(threads, sizeof(catalog_worker));
+	if (workers==NULL)
+	{
+		return -1;
+	}
+	for (started=1; started<threads; started++)
+	{
+		workers[started].work=work;
+		workers[started].done=PyThread_allocate_lock();
+		if (workers[started].done==NULL)
+		{
+			break;
+		}
+		PyThread_acquire_lock(workers[started].done, WAIT_LOCK);
+		if (PyThread_start_new_thread(CatalogWorker, &workers[started])==PYTHREAD_INVALID_THREAD_ID)
 		{
-			goto cleanup_and_raise_exception;
+			PyThread_release_lock(workers[started].done);
+			PyThread_free_lock(workers[started].done);
+			break;
 		}
-		lastel=iel;
-		daynum+=cos((sat_ele-1.0)*deg2rad)*sqrt(sat_alt)/25000.0;
-		Calc();
 	}
+	workers[0].work=work;
+	CatalogWorker(&workers[0]);
 
-	if (lastel!=0)
+	for (i=1; i<started; i++)
 	{
-		daynum=FindLOS();
-		//TODO: FindLOS can fail.  Detect and log warning that transit end is approximate.	
-		if (daynum > 0) {
-			Calc();
-	
-			if (MakeObservation(daynum, &obs) != 0)
-			{
-				goto cleanup_and_raise_exception;
-			}
-	
-			py_obs = PythonifyObservation(&obs);
-			if (py_obs == NULL) {
-				goto cleanup_and_raise_exception;
-			}
-	
-			if (PyList_Append(transit, py_obs) != 0)
+		/* Wait for each worker to finish */
+		PyThread_acquire_lock(workers[i].done, WAIT_LOCK);
+		PyThread_release_lock(workers[i].done);
+		PyThread_free_lock(workers[i].done);
+	}
+	free(workers);
+	return 0;
+}
+
+static PyObject* observe_catalog(PyObject* self, PyObject *args, PyObject *kwds)
+{
+	static char *kwlist[] = {"predictors", "times", "threads", NULL};
+	PyObject *predictors, *times, *seq, *t_array, *result, *os_module, *count;
+	Py_buffer t_buf, r_buf;
+	Py_ssize_t i, k, n_sat, n_time;
+	Predictor *sat;
+	catalog_work work;
+	int threads=1, status=0;
+	double *t, *row;
+
+	if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO|i", kwlist, &predictors, &times, &threads))
+	{
+		return NULL;
+	}
+	if (threads<=0)
+	{
+		/* One per core */
+		threads=1;
+		if ((os_module = PyImport_ImportModule("os")) == NULL)
+		{
+			return NULL;
+		}
+		count = PyObject_CallMethod(os_module, "cpu_count", NULL);
+		Py_DECREF(os_module);
+		if (count == NULL)
+		{
+			return NULL;
+		}
+		if (count != Py_None)
+		{
+			threads = (int)PyLong_AsLong(count);
+		}
+		Py_DECREF(count);
+		if (PyErr_Occurred())
+		{
+			return NULL;
+		}
+	}
+
+	/* A tuple holds its own references and can't change while the GIL is released */
+	seq = PySequence_Tuple(predictors);
+	if (seq == NULL)
+	{
+		if (PyErr_ExceptionMatches(PyExc_TypeError))
+		{
+			PyErr_SetString(PyExc_TypeError, "predictors must be a sequence of Predictors");
+		}
+		return NULL;
+	}
+	n_sat = PyTuple_GET_SIZE(seq);
+	for (i=0; i<n_sat; i++)
+	{
+		if (!PyObject_TypeCheck(PyTuple_GET_ITEM(seq, i), &PredictorType))
+		{
+			Py_DECREF(seq);
+			PyErr_SetString(PyExc_TypeError, "predictors must be a sequence of Predictors");
+			return NULL;
+		}
+		if (CheckReady((Predictor *)PyTuple_GET_ITEM(seq, i)) != 0)
+		{
+			Py_DECREF(seq);
+			return NULL;
+		}
+	}
+
+	if ((t_array = TimesArray(times, &t_buf)) == NULL)
+	{
+		Py_DECREF(seq);
+		return NULL;
+	}
+	n_time = t_buf.shape[0];
+
+	if ((result = ObservationArray(n_sat, n_time, &r_buf)) == NULL)
+	{
+		ReleaseArray(t_array, &t_buf);
+		Py_DECREF(seq);
+		return NULL;
+	}
+
+	t = (double *)t_buf.buf;
+	row = (double *)r_buf.buf;
+	if (threads == 1)
+	{
+		for (i=0; i<n_sat; i++)
+		{
+			sat = (Predictor *)PyTuple_GET_ITEM(seq, i);
+			ACQUIRE_LOCK(sat);
+			Py_BEGIN_ALLOW_THREADS
+			for (k=0; k<n_time; k++)
 			{
-				goto cleanup_and_raise_exception;
+				FillObservationRow(&sat->p, (t[k]/86400.0)-3651.0, row);
+				row += OBSERVATION_COLUMNS;
 			}
+			Py_END_ALLOW_THREADS
+			RELEASE_LOCK(sat);
+		}
+	}
+	else if ((work.sats = malloc((n_sat ? n_sat : 1)*sizeof(predict_t))) == NULL ||
+		(work.lock = PyThread_allocate_lock()) == NULL)
+	{
+		free(work.sats);
+		Py_CLEAR(result);
+		PyErr_NoMemory();
+	}
+	else
+	{
+		for (i=0; i<n_sat; i++)
+		{
+			sat = (Predictor *)PyTuple_GET_ITEM(seq, i);
+			ACQUIRE_LOCK(sat);
+			memcpy(&work.sats[i], &sat->p, sizeof(predict_t));
+			RELEASE_LOCK(sat);
+		}
+		work.times = t;
+		work.rows = row;
+		work.n_sat = n_sat;
+		work.n_time = n_time;
+		Py_BEGIN_ALLOW_THREADS
+		status = ObserveCatalog(&work, threads);
+		Py_END_ALLOW_THREADS
+		PyThread_free_lock(work.lock);
+		free(work.sats);
+		if (status != 0)
+		{
+			Py_CLEAR(result);
+			PyErr_NoMemory();
 		}
 	}
 
-	return transit;
-
-cleanup_and_raise_exception:
-	Py_XDECREF(transit);
-	return NULL;
+	PyBuffer_Release(&r_buf);
+	ReleaseArray(t_array, &t_buf);
+	Py_DECREF(seq);
+	return result;
 }
 
-static char quick_predict_docs[] =
-    "quick_predict((tle_line0, tle_line1, tle_line2), time, (gs_lat, gs_lon, gs_alt))\n";
+static char observe_catalog_docs[] =
+    "observe_catalog(predictors, times, threads=1)\n\n"
+    "Observations of every Predictor at every unix time in 'times', as a numpy structured\n"
+    "array of shape (len(predictors), len(times)) with the columns of observe_many.  The work\n"
+    "is spread over 'threads' threads (one per core if 0), giving the same results as one.\n";
 
 static PyMethodDef pypredict_funcs[] = {
     {"quick_find"   , (PyCFunction)quick_find   , METH_VARARGS, quick_find_docs},
     {"quick_predict", (PyCFunction)quick_predict, METH_VARARGS, quick_predict_docs},
+    {"observe_many" , (PyCFunction)observe_many , METH_VARARGS, observe_many_docs},
+    {"observe_catalog", (PyCFunction)observe_catalog, METH_VARARGS | METH_KEYWORDS, observe_catalog_docs},
+    {"passes"       , (PyCFunction)passes       , METH_VARARGS | METH_KEYWORDS, passes_docs},
     {NULL, NULL, 0, NULL} 
 };
 
@@ -3597,15 +5895,40 @@ static struct PyModuleDef cpredict =
 static PyObject *initcpredict(void)
 {
 	PyObject *m;
+	int x;
+
+	/* Set up translation table for computing TLE checksums */
+	for (x=0; x<=255; val[x]=0, x++);
+	for (x='0'; x<='9'; val[x]=x-'0', x++);
+
+	val['-']=1;
+
+	if (PyType_Ready(&PredictorType) < 0) {
+		return NULL;
+	}
+	if (PyType_Ready(&PassIteratorType) < 0) {
+		return NULL;
+	}
+	if (PassSummaryType.tp_name == NULL && PyStructSequence_InitType2(&PassSummaryType, &PassSummary_desc) < 0) {
+		return NULL;
+	}
+
 	m = PyModule_Create(&cpredict);
 	if (m == NULL) {
 		fprintf(stderr, "ERROR: Unable to initialize python module 'cpredict'\n");
+		return NULL;
 	}
 
 	//Add custom exception for predict
 	PredictException = PyErr_NewException("cpredict.PredictException", NULL, NULL);
 	Py_INCREF(PredictException);
 	PyModule_AddObject(m, "PredictException", PredictException);
+
+	Py_INCREF(&PredictorType);
+	PyModule_AddObject(m, "Predictor", (PyObject *)&PredictorType);
+
+	Py_INCREF(&PassSummaryType);
+	PyModule_AddObject(m, "PassSummary", (PyObject *)&PassSummaryType);
     return m;
 }
 
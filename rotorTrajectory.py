@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Rotor Trajectory
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file turns a planned pass (a setpoint table from mountPlanner.plan_mount) into as few
+# motor commands as will keep the antenna within a pointing error bound, such as half the
+# beamwidth. Sending a command every time the satellite moves 0.3 degrees makes the rotor
+# follow a staircase and fills the 600 baud link with packets. Here the rotor is modelled as
+# moving each axis to its last setpoint at a top speed, speeding up and slowing down at a
+# fixed acceleration, with setpoints rounded to the controller's pulse resolution. Each
+# command is aimed at a point further along the pass, the rotor's path to it is simulated,
+# and the one keeping the error within bound longest is sent. The next command is due at the
+# last sample still within bound.
+
+# The model starts each move from rest, and the error is checked on the samples of the
+# table, so the bound holds on that grid for a rotor that behaves like the model.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+from mountPlanner import MOUNT_DTYPE
+
+##############################################################################################
+COMMAND_DTYPE = np.dtype(MOUNT_DTYPE.descr + [('max_error', 'f8')])
+
+def travel(distance, t, rate, accel=None):
+    """ Function to find how far (degrees) an axis starting from rest has moved towards a
+    setpoint 'distance' degrees away after t seconds, with top speed rate (degrees/s) and
+    acceleration accel (degrees/s^2, None for instant). """
+    distance, t = np.abs(distance), np.maximum(t, 0)
+    if accel is None:
+        return np.minimum(rate*t, distance)
+    peak = np.minimum(rate, np.sqrt(distance*accel)) # Triangular profile on short moves
+    ramp = peak/accel # Time to reach the peak speed
+    end = np.where(peak > 0, distance/np.maximum(peak, 1e-12) + ramp, 0) # Time to stop on the setpoint
+    moved = np.where(t < ramp, 0.5*accel*t**2, 0.5*peak*ramp + peak*(t - ramp))
+    return np.where(t < end - ramp, moved, distance - 0.5*accel*np.maximum(end - t, 0)**2)
+
+def separation(az1, el1, az2, el2):
+    """ Function to find the angle (degrees) between two mount pointings. """
+    az1, el1, az2, el2 = np.radians(az1), np.radians(el1), np.radians(az2), np.radians(el2)
+    cosine = np.cos(el1)*np.cos(el2)*np.cos(az1 - az2) + np.sin(el1)*np.sin(el2)
+    return np.degrees(np.arccos(np.clip(cosine, -1, 1)))
+
+def quantize(angle, pulse):
+    """ Function to round angles to the controller's resolution of 1/pulse degrees, the way
+    set commands encode them. """
+    return np.round(pulse*(np.asarray(angle) + 360))/pulse - 360
+
+def trajectory(table, start=None, max_error=0.5, rate=(3.0, 3.0), accel=(6.0, 6.0), pulse=10,
+               horizon=120.0):
+    """ Function to find the fewest motor commands that keep the rotor within max_error
+    degrees of a setpoint table (from mountPlanner.plan_mount). start is the rotor's
+    (azimuth, elevation), default the first setpoint. rate and accel are the (azimuth,
+    elevation) top speeds and accelerations, pulse the controller's pulses per degree, and
+    no command is aimed more than horizon seconds ahead. Returns a record array of commands:
+    the time to send each, where it points, and the worst error until the next. """
+    n = len(table)
+    if n == 0:
+        return np.zeros(0, dtype=COMMAND_DTYPE)
+    times = table['time']
+    targetAz, targetEl = quantize(table['azimuth'], pulse), quantize(table['elevation'], pulse)
+    az, el = (table['azimuth'][0], table['elevation'][0]) if start is None else start
+    commands, j = [], 0
+    while j < n - 1:
+        last = max(int(np.searchsorted(times, times[j] + horizon, side='right')) - 1, j + 1)
+        aim = np.arange(j + 1, last + 1) # Candidate setpoints to aim at
+        dt = times[j+1:last+1] - times[j] # Samples to check after sending
+        # Rotor pointing for each aim (rows) at each later sample (columns)
+        dAz, dEl = targetAz[aim] - az, targetEl[aim] - el
+        rotorAz = az + np.sign(dAz)[:, None]*travel(dAz[:, None], dt[None, :], rate[0], accel[0])
+        rotorEl = el + np.sign(dEl)[:, None]*travel(dEl[:, None], dt[None, :], rate[1], accel[1])
+        error = separation(rotorAz, rotorEl, table['azimuth'][None, j+1:last+1],
+                           table['elevation'][None, j+1:last+1])
+        good = error <= max_error
+        # Soonest to get within bound (at once unless catching up), then longest to stay there
+        first = np.where(good.any(axis=1), np.argmax(good, axis=1), len(dt))
+        bad = ~good & (np.arange(len(dt))[None, :] >= first[:, None])
+        stay = np.where(bad.any(axis=1), np.argmax(bad, axis=1), len(dt)) - 1
+        if first.min() == len(dt): # Too slow to catch up within the horizon
+            best, stay = len(aim) - 1, np.full(len(aim), len(dt) - 1)
+        else:
+            best = int(np.lexsort((-stay, first))[0])
+        step = max(int(stay[best]), 0) # Samples until the next command
+        commands.append((times[j], targetAz[aim[best]], targetEl[aim[best]],
+                         table['flipped'][aim[best]], error[best, :step+1].max()))
+        az, el = rotorAz[best, step], rotorEl[best, step]
+        j += step + 1
+    return np.array(commands, dtype=COMMAND_DTYPE)
+
+def follow(commands, times, rate=(3.0, 3.0), accel=(6.0, 6.0), start=None):
+    """ Function to simulate the rotor's (azimuth, elevation) at each time in times under a
+    list of commands, with the same model as trajectory. start is the rotor's (azimuth,
+    elevation) before the first command, default where the first command points. """
+    times = np.asarray(times, dtype=float)
+    az, el = np.zeros(len(times)), np.zeros(len(times))
+    posAz, posEl = (commands['azimuth'][0], commands['elevation'][0]) if start is None else start
+    for k in range(len(commands)):
+        t0 = commands['time'][k]
+        t1 = commands['time'][k+1] if k + 1 < len(commands) else np.inf
+        dAz, dEl = commands['azimuth'][k] - posAz, commands['elevation'][k] - posEl
+        rows = (times >= t0) & (times < t1)
+        az[rows] = posAz + np.sign(dAz)*travel(dAz, times[rows] - t0, rate[0], accel[0])
+        el[rows] = posEl + np.sign(dEl)*travel(dEl, times[rows] - t0, rate[1], accel[1])
+        if k + 1 < len(commands):
+            posAz = posAz + np.sign(dAz)*travel(dAz, t1 - t0, rate[0], accel[0])
+            posEl = posEl + np.sign(dEl)*travel(dEl, t1 - t0, rate[1], accel[1])
+    before = times < commands['time'][0]
+    az[before], el[before] = (commands['azimuth'][0], commands['elevation'][0]) if start is None else start
+    return az, el
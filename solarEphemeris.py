@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Solar Ephemeris
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file gives the Sun and Moon positions seen from one ground station. It keeps one
+# ephem Observer per station instead of building one (and formatting its location as a
+# string) every time. Positions at many times are interpolated from directions computed every
+# 'step' seconds, which stay within 0.005 degrees for the Sun and Moon at the default 10
+# minute step. Positions are geometric (no refraction) to match the satellite positions.
+
+# It also finds when the Sun is within the antenna beam during predicted passes ("sun
+# outages"), where the Sun's noise drowns out the satellite. The GUI lists them with the
+# upcoming passes, and passScheduler with -s.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+import ephem, threading
+
+##############################################################################################
+UNIX_EPOCH = 25567.5 # 1970/1/1 as an ephem (Dublin Julian) date
+OUTAGE_DTYPE = np.dtype([('pass', 'i8'), ('start', 'f8'), ('end', 'f8'), ('min_separation', 'f8')])
+
+def direction(az, el):
+    """ Function to convert azimuth and elevation (degrees) to unit east, north, up vectors. """
+    az, el = np.radians(az), np.radians(el)
+    return np.stack([np.sin(az)*np.cos(el), np.cos(az)*np.cos(el), np.sin(el)], axis=-1)
+
+def azel(vectors):
+    """ Function to convert east, north, up vectors to azimuth and elevation (degrees). """
+    e, n, u = vectors[..., 0], vectors[..., 1], vectors[..., 2]
+    return np.degrees(np.arctan2(e, n)) % 360, np.degrees(np.arctan2(u, np.hypot(e, n)))
+
+class SolarEphemeris:
+    """ SolarEphemeris is a class for finding the Sun and Moon from one ground station. """
+    def __init__(self, lat, lon, alt, step=600.0):
+        """ Initialization function. lon is west positive, as in a qth tuple. Interpolated
+        positions use samples every 'step' seconds. """
+        self.qth = (lat, lon, alt)
+        self.observer = ephem.Observer()
+        self.observer.lat = np.radians(lat) # ephem takes floats as radians
+        self.observer.lon = np.radians(-lon)
+        self.observer.elevation = alt
+        self.observer.pressure = 0 # No refraction, like the satellite elevations from cpredict
+        self.bodies = {'sun': ephem.Sun(), 'moon': ephem.Moon()}
+        self.step = float(step)
+        self.samples = {} # body -> (first sample time, directions)
+        self.lock = threading.RLock() # The GUI calls from the Tk and plotting threads
+
+    def position(self, t, body='sun'):
+        """ Function to compute the azimuth and elevation (degrees) of the Sun or Moon at a
+        single unix time t, without interpolating. """
+        with self.lock: # The observer and body are shared
+            self.observer.date = ephem.Date(t/86400.0 + UNIX_EPOCH)
+            b = self.bodies[body]
+            b.compute(self.observer)
+            return float(b.az)*180/np.pi, float(b.alt)*180/np.pi
+
+    def directions(self, times, body='sun'):
+        """ Function to interpolate the unit east, north, up direction of the Sun or Moon at
+        each unix time in times. """
+        times = np.asarray(times, dtype=float)
+        if times.size == 0:
+            return np.zeros(times.shape + (3,))
+        lo = np.floor(times.min()/self.step)*self.step
+        hi = np.floor(times.max()/self.step)*self.step + self.step
+        with self.lock:
+            first, samples = self.samples.get(body, (lo, np.zeros((0, 3))))
+            if len(samples) == 0 or lo < first or hi > first + self.step*(len(samples)-1):
+                # Extend the samples to cover times, keeping the ones already computed
+                if len(samples):
+                    lo, hi = min(lo, first), max(hi, first + self.step*(len(samples)-1))
+                vectors = np.empty((int(round((hi-lo)/self.step))+1, 3))
+                offset = int(round((first-lo)/self.step))
+                vectors[offset:offset+len(samples)] = samples
+                for k in list(range(offset)) + list(range(offset+len(samples), len(vectors))):
+                    vectors[k] = direction(*self.position(lo + self.step*k, body))
+                first, samples = lo, vectors
+                self.samples[body] = (first, samples)
+        x = (times - first)/self.step
+        k = np.minimum(x.astype(int), len(samples)-2)
+        frac = (x - k)[..., None]
+        v = samples[k]*(1 - frac) + samples[k+1]*frac
+        return v/np.linalg.norm(v, axis=-1, keepdims=True)
+
+    def azel(self, times, body='sun'):
+        """ Function to interpolate the azimuth and elevation (degrees) of the Sun or Moon at
+        each unix time in times. """
+        return azel(self.directions(times, body))
+
+    def separation(self, predictor, times, body='sun'):
+        """ Function to find the angle (degrees) between the satellite and the Sun or Moon at
+        each unix time in times, and how fast the satellite moves across the sky (degrees/s). """
+        data = predictor.observe_many(times)
+        cosine = np.sum(direction(data['azimuth'], data['elevation']) *
+                        self.directions(times, body), axis=1)
+        speed = np.hypot(data['azimuth_rate']*np.cos(np.radians(data['elevation'])),
+                         data['elevation_rate'])
+        return np.degrees(np.arccos(np.clip(cosine, -1, 1))), speed
+
+    def outages(self, predictors, table, radius=5.0, body='sun', step=5.0, resolution=0.1):
+        """ Function to find when the Sun (or Moon) is within 'radius' degrees of the
+        satellite during each pass of a pass table (from cpredict.passes, or
+        passScheduler.schedule for the same station). predictors is one Predictor, or a list
+        indexed by the table's satellite column. Returns a record array of the pass index,
+        start and end times and smallest separation (degrees) of each outage. """
+        rows = []
+        many = isinstance(predictors, (list, tuple))
+        satellites = table['satellite'] if many else np.zeros(len(table), dtype=int)
+        for sat in np.unique(satellites).tolist():
+            predictor = predictors[sat] if many else predictors
+            index = np.flatnonzero(satellites == sat)
+            # Every pass of the satellite sampled every 'step' seconds in one call
+            grids = [np.append(np.arange(a, b, step), b)
+                     for a, b in zip(table['start'][index], table['end'][index])]
+            times = np.concatenate(grids)
+            which = np.repeat(index, [len(g) for g in grids])
+            separation, speed = self.separation(predictor, times, body)
+            # Samples the satellite could get within radius of before the next sample
+            near = separation <= radius + speed*step
+            for k in np.unique(which[near]).tolist():
+                start, end = float(table['start'][k]), float(table['end'][k])
+                fine = np.unique(np.concatenate([np.arange(max(t-step, start), min(t+step, end), resolution)
+                                                 for t in times[near & (which == k)].tolist()] + [[end]]))
+                separation, _ = self.separation(predictor, fine, body)
+                inside = separation <= radius
+                # Runs inside the beam, with edges interpolated between samples
+                edges = np.flatnonzero(np.diff(np.concatenate(([0], inside.astype(int), [0]))))
+                for a, b in zip(edges[::2].tolist(), edges[1::2].tolist()):
+                    t0, t1 = fine[a], fine[b-1]
+                    if a > 0:
+                        t0 = np.interp(radius, [separation[a], separation[a-1]], [fine[a], fine[a-1]])
+                    if b < len(fine):
+                        t1 = np.interp(radius, [separation[b-1], separation[b]], [fine[b-1], fine[b]])
+                    rows.append((k, t0, t1, separation[a:b].min()))
+        rows.sort()
+        return np.array(rows, dtype=OUTAGE_DTYPE)
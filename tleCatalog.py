@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station TLE Catalog
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file loads multi-satellite 3 line TLE files (e.g. the Celestrak active catalog) without
+# splitting the whole file into Python strings. The file is memory mapped and numpy finds the
+# line boundaries, checks every checksum and reads every NORAD id in a few array operations.
+# Satellites are looked up by NORAD id or name through an index, and only the selected TLE
+# is decoded. open_catalog() keeps the catalog of each file until the file changes, so
+# selecting a satellite again does not rescan the file. Catalogs from open_catalog are shared
+# between threads, so they are never closed; a replaced one is unmapped once nothing holds it.
+
+# NOTE: Replace catalog files (write a new file and rename it) rather than truncating them
+# while they are open, as reading a mapping past the end of a truncated file crashes.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+import os, mmap, threading
+from cpredict import Predictor, PredictException
+
+##############################################################################################
+WHITESPACE = np.zeros(256, dtype=bool)
+WHITESPACE[[9, 11, 12, 13, 32]] = True # Trailing characters ignored at the end of a line
+ALPHA5 = np.zeros(256, dtype=np.int64) # Alpha-5 first character of NORAD ids above 99999
+ALPHA5[np.frombuffer(b'ABCDEFGHJKLMNPQRSTUVWXYZ', dtype=np.uint8)] = np.arange(10, 34)
+ALPHA5[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+DIGIT = np.full(256, 255, dtype=np.uint8) # Value of each digit character
+DIGIT[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+CHECKSUM = np.where(DIGIT < 10, DIGIT, 0).astype(np.uint8) # Checksum value of each character
+CHECKSUM[ord('-')] = 1
+CHUNK = 4096 # Entries checksummed at a time
+
+class TLECatalog:
+    """ TLECatalog is a class for looking up satellites in a memory mapped 3 line TLE file. """
+    def __init__(self, path):
+        """ Initialization function. Raises PredictException if the file is not made of 3
+        line TLEs. Entries with a bad checksum are kept out of the index and listed in bad. """
+        self.path = path
+        with open(path, 'rb') as myfile:
+            if os.fstat(myfile.fileno()).st_size:
+                self.map = mmap.mmap(myfile.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.map = b'' # Can't map an empty file
+        data = np.frombuffer(self.map, dtype=np.uint8)
+        # Line boundaries, without trailing whitespace and blank lines
+        ends = np.flatnonzero(data == 10)
+        if len(data) and data[-1] != 10:
+            ends = np.append(ends, len(data))
+        starts = np.concatenate(([0], ends[:-1]+1)).astype(ends.dtype)
+        strip = (ends > starts) & WHITESPACE[data[np.maximum(ends-1, 0)]]
+        while np.any(strip):
+            ends[strip] -= 1
+            strip = (ends > starts) & WHITESPACE[data[np.maximum(ends-1, 0)]]
+        keep = ends > starts
+        starts, ends = starts[keep], ends[keep]
+        if len(starts) % 3 != 0:
+            raise PredictException("%s does not contain whole 3 line TLEs" % path)
+        self.starts, self.ends = starts.reshape(-1, 3), ends.reshape(-1, 3)
+        # Element lines must start with their line number and hold at least 69 characters
+        first = data[self.starts[:, 1:]] if len(starts) else np.zeros((0, 2), dtype=np.uint8)
+        shape = (first == np.array([ord('1'), ord('2')])) & (self.ends[:, 1:]-self.starts[:, 1:] >= 69)
+        if not np.all(shape):
+            entry = int(np.flatnonzero(~np.all(shape, axis=1))[0])
+            raise PredictException("%s: entry %d is not a 3 line TLE: %s" %
+                                   (path, entry, self.lines(entry)))
+        # Checksums: the sum of the digits, with 1 for each '-', modulo 10, over columns 1-68
+        # of the element lines, read straight from the mapping a chunk of entries at a time
+        total = np.zeros((len(self.starts), 2), dtype=np.uint32)
+        columns = np.arange(68)
+        for k in range(0, len(self.starts), CHUNK):
+            chunk = CHECKSUM[data[self.starts[k:k+CHUNK, 1:, None] + columns]]
+            total[k:k+CHUNK] = chunk.sum(axis=2, dtype=np.uint32)
+        valid = np.all(total % 10 == DIGIT[data[self.starts[:, 1:] + 68]], axis=1)
+        self.bad = np.flatnonzero(~valid)
+        # NORAD ids from columns 3-7 of line 1 (blanks count as zero)
+        norad = data[self.starts[:, 1, None] + np.arange(2, 7)]
+        self.norad_ids = ALPHA5[norad[:, 0]]*10000 + \
+            CHECKSUM[norad[:, 1:]].astype(np.int64) @ np.array([1000, 100, 10, 1])
+        entries = np.flatnonzero(valid)[::-1] # Reversed so the first of repeated ids wins
+        self.index = dict(zip(self.norad_ids[entries].tolist(), entries.tolist()))
+        self.valid = valid
+        self.nameIndex = None # Built on the first lookup by name
+        self.shared = False # Handed out by open_catalog, so never closed
+
+    def __len__(self):
+        """ Function to return the number of entries, including ones with bad checksums. """
+        return len(self.starts)
+
+    def lines(self, entry):
+        """ Function to decode the 3 lines of an entry. """
+        return [bytes(self.map[a:b]).decode('ascii', 'replace').strip()
+                for a, b in zip(self.starts[entry].tolist(), self.ends[entry].tolist())]
+
+    def names(self):
+        """ Function to return the names of all entries. """
+        return [bytes(self.map[a:b]).decode('ascii', 'replace').strip()
+                for a, b in zip(self.starts[:, 0].tolist(), self.ends[:, 0].tolist())]
+
+    def find(self, key):
+        """ Function to find the entry of a satellite by NORAD id (int) or name (str). """
+        if isinstance(key, str):
+            if self.nameIndex is None:
+                names, entries = self.names(), np.flatnonzero(self.valid)[::-1].tolist()
+                self.nameIndex = {names[entry]: entry for entry in entries}
+            return self.nameIndex[key.strip()]
+        return self.index[int(key)]
+
+    def __contains__(self, key):
+        """ Function to check if a satellite is in the catalog. """
+        try:
+            self.find(key)
+            return True
+        except (KeyError, ValueError, TypeError):
+            return False
+
+    def __getitem__(self, key):
+        """ Function to return the 3 line TLE of a satellite by NORAD id or name. """
+        return self.lines(self.find(key))
+
+    def tles(self):
+        """ Function to return the 3 line TLEs of every entry with good checksums. """
+        return [self.lines(entry) for entry in np.flatnonzero(self.valid).tolist()]
+
+    def first(self):
+        """ Function to return the first TLE in the file. """
+        if len(self) == 0:
+            raise PredictException("%s contains no TLEs" % self.path)
+        if not self.valid[0]:
+            raise PredictException("%s: bad checksum in %s" % (self.path, self.lines(0)))
+        return self.lines(0)
+
+    def predictor(self, key, qth):
+        """ Function to make a Predictor for a satellite and ground station. """
+        return Predictor(self[key], qth)
+
+    def close(self):
+        """ Function to unmap the file, unless the catalog came from open_catalog and other
+        threads may still be using it. """
+        if isinstance(self.map, mmap.mmap) and not self.shared:
+            self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+_catalogs, _catalogsLock = {}, threading.Lock()
+
+def open_catalog(path):
+    """ Function to get the catalog of a file, only loading it again when the file changes. """
+    info = os.stat(path)
+    key = (info.st_mtime_ns, info.st_size, info.st_ino)
+    with _catalogsLock:
+        cached = _catalogs.get(os.path.abspath(path))
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        catalog = TLECatalog(path)
+        catalog.shared = True
+        # The catalog it replaces may still be in use, and is unmapped when it is collected
+        _catalogs[os.path.abspath(path)] = (key, catalog)
+    return catalog
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+##############################################################################################
+# ARGUS Ground Station Tracking Scheduler
+# Date Created: 10/18/2026
+# Date Modified:
+##############################################################################################
+# Description / Notes:
+
+# This file runs the tracking loop at a fixed rate. Ticks are due every 'period' seconds on the
+# monotonic clock from when tracking started, rather than 'period' seconds after the last
+# tick's work finished, so the time spent predicting and sending commands doesn't add up into
+# drift. Each tick comes with the wall clock time it was scheduled for, which is the time the
+# pointing should be predicted for. A tick whose work runs past the following deadlines skips
+# them instead of firing them late one after another.
+
+# How late each tick woke up and how far its work ran past the next deadline are counted in
+# histograms, to check that the loop keeps up at the chosen rate.
+
+##############################################################################################
+### Necessary Modules
+import numpy as np
+import time
+
+##############################################################################################
+HISTOGRAM_EDGES = np.array([0, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0]) # seconds
+
+class TrackScheduler:
+    """ TrackScheduler is a class for running a loop at a fixed rate without drift. """
+    def __init__(self, period, clock=time.monotonic, wallclock=time.time, sleep=time.sleep):
+        """ Initialization function. Ticks are period seconds apart. """
+        if period <= 0:
+            raise ValueError("period must be positive")
+        self.period = float(period)
+        self.clock, self.wallclock, self.sleep = clock, wallclock, sleep
+        self.lateness = np.zeros(len(HISTOGRAM_EDGES), dtype=int) # Counts per bin, last is >= 1 s
+        self.overrun = np.zeros(len(HISTOGRAM_EDGES), dtype=int) # Only ticks that ran past the next deadline
+        self.ticks, self.skipped, self.worst = 0, 0, 0.0 # worst lateness in seconds
+
+    def run(self, running=lambda: True):
+        """ Function to generate (tick number, scheduled unix time) at each deadline while
+        running() is true. The tick number counts deadlines, including skipped ones. """
+        start = self.clock()
+        wallStart = self.wallclock() # Wall time of the first deadline
+        k = 0
+        while running():
+            deadline = start + k*self.period
+            now = self.clock()
+            if deadline > now:
+                self.sleep(deadline - now)
+                now = self.clock()
+            late = now - deadline
+            self.record(self.lateness, late)
+            self.worst = max(self.worst, late)
+            self.ticks += 1
+            yield k, wallStart + k*self.period
+            # Work done; skip the deadlines it ran past
+            now = self.clock()
+            over = now - (deadline + self.period)
+            if over > 0:
+                self.record(self.overrun, over)
+            missed = int(over // self.period) + 1 if over > 0 else 0
+            self.skipped += missed
+            k += 1 + missed
+
+    def record(self, histogram, seconds):
+        """ Function to count a time in a histogram. """
+        histogram[np.searchsorted(HISTOGRAM_EDGES, seconds, side='right') - 1] += 1
+
+    def summary(self):
+        """ Function to describe the lateness and overrun histograms in text. """
+        labels = ["%g-%g ms" % (1000*a, 1000*b) for a, b in zip(HISTOGRAM_EDGES[:-1], HISTOGRAM_EDGES[1:])]
+        labels.append(">= %g ms" % (1000*HISTOGRAM_EDGES[-1]))
+        lines = ["%d ticks every %g s, %d skipped, worst lateness %.1f ms" %
+                 (self.ticks, self.period, self.skipped, 1000*self.worst),
+                 "%-14s %8s %8s" % ("", "Late", "Overrun")]
+        lines += ["%-14s %8d %8d" % (label, late, over)
+                  for label, late, over in zip(labels, self.lateness, self.overrun) if late or over]
+        return "\n".join(lines)
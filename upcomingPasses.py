@@ -6,17 +6,23 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import time, threading, os, ephem, serial, curses
 from copy import copy
-from cpredict import quick_find, quick_predict, PredictException
+from cpredict import quick_find, Predictor, PredictException
+from tleCatalog import open_catalog
 
-def load_tle(tlefile):
-    """ Function to Load orbital elements. """
+def load_tle(tlefile, satellite=None):
+    """ Function to Load orbital elements, of the given satellite (NORAD id or name) if the
+    file holds many. """
     try:
-        with open(tlefile, 'r') as myfile: # Try reading file
-            tle = myfile.read()
+        catalog = open_catalog(tlefile)
     except IOError:
         print('Error Reading '+tlefile+". Exiting.")
         os._exit(1)
-    tle = massage_tle(tle) #use predict.py to separate elements
+    if satellite is None:
+        tle = catalog.first()
+    elif satellite in catalog:
+        tle = catalog[satellite]
+    else:
+        raise PredictException("%s is not in %s" % (satellite, tlefile))
     satname = tle[0]
     return tle, satname
 
@@ -69,62 +75,37 @@ def transits(tle, qth, ending_after=None, ending_before=None):
     qth = massage_qth(qth)
     if ending_after is None: #If not specified
         ending_after = time.time()
-    ts = ending_after
-    while True: #Find passes
-        transit = quick_predict(tle, ts, qth)
-        t = Transit(tle, qth, start=transit[0]['epoch'], end=transit[-1]['epoch'])
-        if (ending_before != None and t.end > ending_before):
+    predictor = Predictor(tle, qth)
+    for summary in predictor.iter_passes(ending_after): #Each pass searched for from the last LOS
+        if (ending_before != None and summary.los > ending_before):
             break
-        if (t.end > ending_after):
-            yield t
-        # Need to advance time cursor so predict doesn't yield same pass
-        ts = t.end + 60 #60 seconds after end
+        if (summary.los > ending_after):
+            yield Transit(tle, qth, start=summary.aos, end=summary.los, predictor=predictor)
         
 class Transit():
     """ Transit is a class representing a pass of a satellite over a groundstation. """
-    def __init__(self, tle, qth, start, end):
-        """ Initialization class. """
+    def __init__(self, tle, qth, start, end, predictor=None):
+        """ Initialization class. predictor can be shared with other passes of the same
+        satellite and ground station. """
         self.tle = massage_tle(tle)
         self.qth = massage_qth(qth)
         self.start = start
         self.end = end
+        if predictor is None:
+            predictor = Predictor(self.tle, self.qth) # Parsed once for all observations
+        self.predictor = predictor
 
     def peak(self, epsilon=0.1):
         """ Function to find peak elevation. """
-        # NOTE: Assumes elevation is strictly monotonic or concave over the [start,end] interval
-        ts =  (self.end + self.start)/2
-        step = (self.end - self.start)
-        while (step > epsilon):
-            step /= 4
-            # Ascend the gradient at this step size
-            direction = None
-            while True:
-                mid   = observe(self.tle, self.qth, ts)['elevation']
-                left  = observe(self.tle, self.qth, ts - step)['elevation']
-                right = observe(self.tle, self.qth, ts + step)['elevation']
-                # Break if we're at a peak
-                if (left <= mid >= right):
-                    break
-                # Ascend up slope
-                slope = -1 if (left > right) else 1
-                # Break if we stepped over a peak (switched directions)
-                if direction is None:
-                    direction = slope
-                if direction != slope:
-                    break
-                # Break if stepping would take us outside of transit
-                next_ts = ts + (direction * step)
-                if (next_ts < self.start) or (next_ts > self.end):
-                    break
-                # Step towards the peak
-                ts = next_ts
+        # Bracketed and refined to within epsilon seconds by Brent's method in cpredict
+        ts, _ = self.predictor.peak(self.start, self.end, epsilon)
         return self.at(ts)
 
     def at(self, t):
         """ Function to return azimuth and elevation at certain time. """
         if t < self.start or t > self.end:
             raise PredictException("time %f outside transit [%f, %f]" % (t, self.start, self.end))
-        return observe(self.tle, self.qth, t)
+        return self.predictor.observe(t)
 
 
 